@@ -8,6 +8,7 @@ class CustomerApp {
     this.queueActive = false
     this.queueTimer = null
     this.lastWaitTime = null
+    this.visitPlan = null
 
     this.init()
   }
@@ -265,9 +266,12 @@ class CustomerApp {
     }
   }
 
-  showBestTimes() {
+  async showBestTimes() {
     const section = document.getElementById("bestTimesSection")
 
+    // Fetch predicted waits for every slot this week
+    await this.loadVisitPlan()
+
     // Generate recommendations
     this.generateTimeRecommendations()
 
@@ -275,6 +279,29 @@ class CustomerApp {
     section.scrollIntoView({ behavior: "smooth" })
   }
 
+  async loadVisitPlan() {
+    this.visitPlan = null
+    const branch = document.getElementById("customerBranch").value
+    const service = document.getElementById("customerService").value
+    if (!branch || !service) return
+
+    try {
+      const params = new URLSearchParams({ branch: branch, service_type: service })
+      const response = await fetch(`${this.apiBaseUrl}/api/best-time?${params}`)
+      const data = await response.json()
+
+      if (response.ok) {
+        // Index predicted waits by "day-hour" for quick lookups
+        this.visitPlan = {}
+        data.slots.forEach((slot) => {
+          this.visitPlan[`${slot.day_of_week}-${slot.hour}`] = slot.predicted_wait_minutes
+        })
+      }
+    } catch (error) {
+      console.error("Best time lookup failed:", error)
+    }
+  }
+
   generateTimeRecommendations() {
     const now = new Date()
 
@@ -306,7 +333,7 @@ class CustomerApp {
       timeSlot.className = "time-slot"
 
       // Simulate wait times for different hours
-      const estimatedWait = this.getHourlyWaitEstimate(hour)
+      const estimatedWait = this.getHourlyWaitEstimate(hour, date)
 
       if (estimatedWait <= 10) {
         timeSlot.classList.add("recommended")
@@ -332,7 +359,18 @@ class CustomerApp {
     container.innerHTML = ""
 
     const days = ["Mon", "Tue", "Wed", "Thu", "Fri"]
-    const dayWaitTimes = [15, 8, 6, 7, 12] // Simulated average wait times
+    let dayWaitTimes = [15, 8, 6, 7, 12] // Simulated average wait times
+
+    // Use the average predicted wait per day when the planner is available
+    if (this.visitPlan) {
+      dayWaitTimes = days.map((_, dayIndex) => {
+        const waits = Object.keys(this.visitPlan)
+          .filter((key) => key.startsWith(`${dayIndex}-`))
+          .map((key) => this.visitPlan[key])
+        if (waits.length === 0) return 0
+        return Math.round(waits.reduce((a, b) => a + b, 0) / waits.length)
+      })
+    }
 
     days.forEach((day, index) => {
       const daySlot = document.createElement("div")
@@ -353,7 +391,14 @@ class CustomerApp {
     })
   }
 
-  getHourlyWaitEstimate(hour) {
+  getHourlyWaitEstimate(hour, date) {
+    // Prefer the model's prediction for this day and hour
+    if (this.visitPlan && date) {
+      const dayOfWeek = date.getDay() === 0 ? 6 : date.getDay() - 1
+      const predicted = this.visitPlan[`${dayOfWeek}-${hour}`]
+      if (predicted !== undefined) return Math.round(predicted)
+    }
+
     // Simulate realistic wait time patterns
     const patterns = {
       8: 5, // Early morning - low
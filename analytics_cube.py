@@ -0,0 +1,280 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+CUBE_PATH = os.path.join(PROJECT_ROOT, 'data', 'analytics_cube.npz')
+
+# Additive measures kept per cell; max queue length is stored separately
+MEASURES = ['count', 'wait_sum', 'wait_sumsq', 'service_sum', 'service_sumsq', 'queue_sum']
+ROLLUPS = ['hour', 'day_of_week', 'branch', 'service_type', 'date']
+
+def _cell_measures(df):
+    """Per-row values of the additive measures, in MEASURES order"""
+    wait = df['wait_time_minutes'].to_numpy(dtype=float)
+    service = df['service_duration_minutes'].to_numpy(dtype=float)
+    queue = df['queue_length_on_arrival'].to_numpy(dtype=float)
+    return [np.ones(len(df)), wait, wait ** 2, service, service ** 2, queue]
+
+class AnalyticsCube:
+    """Materialized aggregates keyed by (branch, date, hour, service_type)
+
+    ``sums`` holds the additive measures, indexed [branch, date, hour,
+    service, measure]; ``max_queue`` the longest queue seen per cell.
+    Means and standard deviations of any roll-up follow from counts, sums
+    and sums of squares, so no query has to touch row-level data.
+    """
+
+    def __init__(self, branches, dates, hours, services, sums, max_queue):
+        self.branches = list(branches)
+        self.dates = [str(d) for d in dates]
+        self.hours = [int(h) for h in hours]
+        self.services = list(services)
+        self.sums = sums
+        self.max_queue = max_queue
+        self._index()
+
+    def _index(self):
+        self.branch_index = {b: i for i, b in enumerate(self.branches)}
+        self.service_index = {s: i for i, s in enumerate(self.services)}
+        self.weekdays = pd.DatetimeIndex(self.dates).dayofweek.to_numpy()
+
+    @classmethod
+    def empty(cls, branches=(), hours=(), services=()):
+        shape = (len(branches), 0, len(hours), len(services))
+        return cls(branches, [], hours, services,
+                   np.zeros(shape + (len(MEASURES),)), np.zeros(shape, dtype=np.int32))
+
+    @classmethod
+    def from_frame(cls, df, branches=(), hours=(), services=()):
+        """Build a cube from processed rows; labels missing from the arguments are added"""
+        return cls.empty(branches, hours, services).update(df)
+
+    def update(self, df):
+        """Fold in processed rows, replacing any (branch, date) pairs they cover
+
+        Branch-days that already exist in the cube are rebuilt from ``df``
+        so re-processing a day does not double count it; other branches on
+        the same date, and other days, are left as they are. Returns the
+        cube.
+        """
+        if len(df) == 0:
+            return self
+
+        dates = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+        self._expand(
+            sorted(set(df['branch']) - set(self.branches)),
+            sorted(set(dates) - set(self.dates)),
+            sorted(set(df['hour'].astype(int)) - set(self.hours)),
+            sorted(set(df['service_type']) - set(self.services))
+        )
+
+        date_index = {d: i for i, d in enumerate(self.dates)}
+        hour_index = {h: i for i, h in enumerate(self.hours)}
+        idx = (
+            df['branch'].map(self.branch_index).to_numpy(),
+            dates.map(date_index).to_numpy(),
+            df['hour'].astype(int).map(hour_index).to_numpy(),
+            df['service_type'].map(self.service_index).to_numpy()
+        )
+
+        touched = np.unique(np.stack(idx[:2]), axis=1)
+        self.sums[touched[0], touched[1]] = 0
+        self.max_queue[touched[0], touched[1]] = 0
+
+        shape = self.max_queue.shape
+        flat = np.ravel_multi_index(idx, shape)
+        size = int(np.prod(shape))
+        for m, values in enumerate(_cell_measures(df)):
+            self.sums[..., m] += np.bincount(flat, weights=values, minlength=size).reshape(shape)
+
+        np.maximum.at(self.max_queue, idx, df['queue_length_on_arrival'].to_numpy(dtype=np.int32))
+        return self
+
+    def _expand(self, branches, dates, hours, services):
+        """Grow the axes with new labels, keeping dates and hours sorted"""
+        if not (branches or dates or hours or services):
+            return
+
+        old = [self.branches, self.dates, self.hours, self.services]
+        new = [self.branches + branches, sorted(self.dates + dates),
+               sorted(self.hours + hours), self.services + services]
+        positions = [
+            np.array([labels.index(label) for label in old_labels], dtype=int)
+            for old_labels, labels in zip(old, new)
+        ]
+        shape = tuple(len(labels) for labels in new)
+
+        sums = np.zeros(shape + (len(MEASURES),))
+        max_queue = np.zeros(shape, dtype=np.int32)
+        sums[np.ix_(*positions)] = self.sums
+        max_queue[np.ix_(*positions)] = self.max_queue
+
+        self.branches, self.dates, self.hours, self.services = new
+        self.sums, self.max_queue = sums, max_queue
+        self._index()
+
+    def save(self, path=CUBE_PATH):
+        """Store the cube as a compressed numpy archive, replaced atomically"""
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f'{name}.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    branches=np.array(self.branches), dates=np.array(self.dates),
+                    hours=np.array(self.hours), services=np.array(self.services),
+                    sums=self.sums, max_queue=self.max_queue
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        """Load a cube written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['branches'].tolist(), data['dates'].tolist(), data['hours'].tolist(),
+                data['services'].tolist(), data['sums'], data['max_queue']
+            )
+
+    def _selection(self, branch=None, service_type=None, start_date=None, end_date=None):
+        """Index arrays along each axis for the requested filters"""
+        branches = np.arange(len(self.branches))
+        if branch is not None:
+            branches = np.array([self.branch_index[branch]] if branch in self.branch_index else [], dtype=int)
+
+        services = np.arange(len(self.services))
+        if service_type is not None:
+            services = np.array([self.service_index[service_type]] if service_type in self.service_index else [], dtype=int)
+
+        dates = np.array(self.dates, dtype=str)
+        keep = np.ones(len(dates), dtype=bool)
+        if start_date is not None:
+            keep &= dates >= str(start_date)
+        if end_date is not None:
+            keep &= dates <= str(end_date)
+
+        return branches, np.flatnonzero(keep), np.arange(len(self.hours)), services
+
+    def rollup(self, by='hour', branch=None, service_type=None, start_date=None, end_date=None):
+        """Aggregate statistics grouped by one dimension
+
+        ``by`` is one of hour, day_of_week, branch, service_type or date.
+        Each group reports customer count, mean and standard deviation of
+        waits and service durations, mean and max queue length, and
+        customers per branch-day.
+        """
+        if by not in ROLLUPS:
+            raise ValueError(f"Unknown roll-up '{by}'. Must be one of: {', '.join(ROLLUPS)}")
+
+        selection = self._selection(branch, service_type, start_date, end_date)
+        sums = self.sums[np.ix_(*selection)]
+        max_queue = self.max_queue[np.ix_(*selection)]
+        # Branch-days with any customers, for per-day averages
+        open_days = sums[..., 0].sum(axis=(2, 3)) > 0
+
+        if by == 'day_of_week':
+            weekdays = self.weekdays[selection[1]]
+            labels = sorted(set(weekdays.tolist()))
+            group = np.searchsorted(labels, weekdays)
+            totals = np.zeros((len(labels), len(MEASURES)))
+            np.add.at(totals, group, sums.sum(axis=(0, 2, 3)))
+            peaks = np.zeros(len(labels), dtype=np.int32)
+            np.maximum.at(peaks, group, max_queue.max(axis=(0, 2, 3), initial=0))
+            days = np.bincount(group, weights=open_days.sum(axis=0), minlength=len(labels))
+        else:
+            axis = {'branch': 0, 'date': 1, 'hour': 2, 'service_type': 3}[by]
+            axis_labels = [self.branches, self.dates, self.hours, self.services][axis]
+            labels = [axis_labels[i] for i in selection[axis]]
+            others = tuple(a for a in range(4) if a != axis)
+            totals = sums.sum(axis=others)
+            peaks = max_queue.max(axis=others, initial=0)
+            if by == 'branch':
+                days = open_days.sum(axis=1)
+            elif by == 'date':
+                days = open_days.sum(axis=0)
+            else:
+                days = np.full(len(labels), open_days.sum())
+
+        return [
+            self._summarize(label, by, row, int(peak), int(n_days))
+            for label, row, peak, n_days in zip(labels, totals, peaks, days)
+            if row[0] > 0
+        ]
+
+    @staticmethod
+    def _summarize(label, by, totals, max_queue, days):
+        count, wait_sum, wait_sumsq, service_sum, service_sumsq, queue_sum = totals.tolist()
+        wait_mean = wait_sum / count
+        service_mean = service_sum / count
+        return {
+            by: int(label) if by in ('hour', 'day_of_week') else label,
+            'customers': int(count),
+            'customers_per_day': round(count / days, 1) if days else None,
+            'wait_mean': round(wait_mean, 2),
+            'wait_std': round(float(np.sqrt(max(wait_sumsq / count - wait_mean ** 2, 0))), 2),
+            'service_mean': round(service_mean, 2),
+            'service_std': round(float(np.sqrt(max(service_sumsq / count - service_mean ** 2, 0))), 2),
+            'queue_mean': round(queue_sum / count, 2),
+            'max_queue': max_queue
+        }
+
+    def summary(self):
+        """Shape and coverage of the cube"""
+        return {
+            'branches': self.branches,
+            'services': self.services,
+            'hours': self.hours,
+            'dates': len(self.dates),
+            'first_date': self.dates[0] if self.dates else None,
+            'last_date': self.dates[-1] if self.dates else None,
+            'customers': int(self.sums[..., 0].sum())
+        }
+
+def update_cube(df, path=CUBE_PATH, config_path=CONFIG_PATH):
+    """Fold processed rows into the stored cube, creating it if needed"""
+    if os.path.exists(path):
+        cube = AnalyticsCube.load(path)
+    else:
+        with open(config_path) as f:
+            config = json.load(f)
+        hours = range(config['working_hours']['start'], config['working_hours']['end'])
+        cube = AnalyticsCube.empty(config['bank_branches'], list(hours), config['service_types'])
+    cube.update(df)
+    cube.save(path)
+    return cube
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the analytics cube from processed data")
+    parser.add_argument('--input', default=HISTORY_PATH)
+    parser.add_argument('--output', default=CUBE_PATH)
+    parser.add_argument('--rebuild', action='store_true', help="Discard the stored cube first")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.output):
+        os.remove(args.output)
+
+    df = pd.read_csv(args.input)
+    started = time.perf_counter()
+    cube = update_cube(df, args.output)
+    elapsed = time.perf_counter() - started
+
+    summary = cube.summary()
+    print(f"Cube covers {summary['customers']:,} customers over {summary['dates']} days "
+          f"({summary['first_date']} to {summary['last_date']})")
+    print(f"Built in {elapsed * 1000:.0f} ms and saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at a fixed rate"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take one token. Returns (acquired, seconds until a token is available)"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True, 0.0
+
+            return False, (1 - self.tokens) / self.rate
+
+class AdmissionDecision:
+    """Outcome of an admission attempt"""
+
+    __slots__ = ('admitted', 'status_code', 'reason', 'retry_after')
+
+    def __init__(self, admitted, status_code=200, reason=None, retry_after=0):
+        self.admitted = admitted
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Per-branch rate limiting in front of a bounded pool of prediction slots
+
+    Each branch gets its own token bucket so one branch's opening rush
+    cannot starve the others. Admitted requests then take one of
+    ``max_concurrent`` slots, waiting at most ``max_wait`` seconds in a
+    queue of at most ``max_queue`` requests. Anything beyond that is shed
+    immediately instead of piling up behind slow predictions.
+    """
+
+    def __init__(self, branch_rate=20.0, branch_burst=40, max_concurrent=4,
+                 max_queue=32, max_wait=2.0, enabled=True):
+        self.branch_rate = branch_rate
+        self.branch_burst = branch_burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.enabled = enabled
+
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.waiting = 0
+        self.waiting_lock = threading.Lock()
+        self.counters = {'admitted': 0, 'rate_limited': 0, 'queue_full': 0, 'queue_timeout': 0}
+
+    @classmethod
+    def from_env(cls):
+        """Build a controller from QUEUESMART_* environment variables"""
+        return cls(
+            branch_rate=float(os.environ.get('QUEUESMART_BRANCH_RATE', 20)),
+            branch_burst=int(os.environ.get('QUEUESMART_BRANCH_BURST', 40)),
+            max_concurrent=int(os.environ.get('QUEUESMART_MAX_CONCURRENT', 4)),
+            max_queue=int(os.environ.get('QUEUESMART_MAX_QUEUE', 32)),
+            max_wait=float(os.environ.get('QUEUESMART_MAX_WAIT', 2.0)),
+            enabled=os.environ.get('QUEUESMART_ADMISSION', '1') != '0'
+        )
+
+    def _bucket(self, branch):
+        bucket = self.buckets.get(branch)
+        if bucket is None:
+            with self.buckets_lock:
+                bucket = self.buckets.setdefault(
+                    branch, TokenBucket(self.branch_rate, self.branch_burst)
+                )
+        return bucket
+
+    def try_admit(self, branch):
+        """Try to admit a request for a branch. Call release() after an admitted request"""
+        if not self.enabled:
+            return AdmissionDecision(True)
+
+        acquired, wait_seconds = self._bucket(branch).try_acquire()
+        if not acquired:
+            self.counters['rate_limited'] += 1
+            return AdmissionDecision(False, 429, "Branch request rate exceeded",
+                                     max(1, math.ceil(wait_seconds)))
+
+        # Fast path: a slot is free right now
+        if self.slots.acquire(blocking=False):
+            self.counters['admitted'] += 1
+            return AdmissionDecision(True)
+
+        with self.waiting_lock:
+            if self.waiting >= self.max_queue:
+                self.counters['queue_full'] += 1
+                return AdmissionDecision(False, 503, "Prediction queue is full",
+                                         max(1, math.ceil(self.max_wait)))
+            self.waiting += 1
+
+        try:
+            acquired = self.slots.acquire(timeout=self.max_wait)
+        finally:
+            with self.waiting_lock:
+                self.waiting -= 1
+
+        if not acquired:
+            self.counters['queue_timeout'] += 1
+            return AdmissionDecision(False, 503, "Timed out waiting for a prediction slot",
+                                     max(1, math.ceil(self.max_wait)))
+
+        self.counters['admitted'] += 1
+        return AdmissionDecision(True)
+
+    def release(self):
+        """Free the slot taken by an admitted request"""
+        if self.enabled:
+            self.slots.release()
+
+    def get_status(self):
+        """Current configuration, queue depth and counters"""
+        return {
+            'enabled': self.enabled,
+            'branch_rate': self.branch_rate,
+            'branch_burst': self.branch_burst,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'max_wait': self.max_wait,
+            'waiting': self.waiting,
+            'counters': dict(self.counters)
+        }
+
+class PredictionCache:
+    """Small LRU cache of recent predictions used when shedding load"""
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(branch, service_type, hour, day_of_week, current_queue_length):
+        return (branch, service_type, int(hour), int(day_of_week), int(current_queue_length))
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
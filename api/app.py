@@ -1,19 +1,77 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, request, jsonify, send_from_directory, send_file, Response
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import json
 import os
+import time
+import numpy as np
 
 from .models import PredictionRequest, PredictionResponse, ErrorResponse
-from .utils import ModelManager, RequestValidator, calculate_confidence_level, calculate_estimated_service_time
+from .utils import ModelManager, RequestValidator, FastJSONProvider, calculate_confidence_level, calculate_estimated_service_time, estimate_queue_wait, resolve_arrival_profile, get_arrival_forecast, get_staffing_plan, staffing_targets, get_analytics_cube, load_wait_sketches, get_wait_sketches, get_feature_store, get_branch_registry, load_config
+from .admission import AdmissionController, PredictionCache
+from analytics_cube import ROLLUPS
+from wait_sketch import DEFAULT_PERCENTILES, worker_sketch_path
+from feature_store import minute_of
+from event_log import EventLog, encode_events
+from profiling import sampled_profile
+from queue_simulation import sample_day, simulate_waits, summarize_waits, expand_teller_schedule
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # Enable Cross-Origin Resource Sharing
 
-# Initialize model manager
+# Initialize model manager; the model loads and warms up in the background (see /api/ready)
 model_manager = ModelManager()
 
+# Admission control for the prediction endpoint. When shedding load we either
+# reject with Retry-After ('reject') or answer with a cheap estimate ('degrade')
+admission_controller = AdmissionController.from_env()
+prediction_cache = PredictionCache()
+SHED_MODE = os.environ.get('QUEUESMART_SHED_MODE', 'reject')
+# Answer predictions with the analytic Erlang C estimate while the model is not loaded, instead of 503
+MODEL_FALLBACK = os.environ.get('QUEUESMART_MODEL_FALLBACK', '1') not in ('', '0')
+wait_sketches = load_wait_sketches()
+SKETCH_FLUSH_SECONDS = float(os.environ.get('QUEUESMART_SKETCH_FLUSH', 60))
+last_sketch_flush = time.monotonic()
+event_log = EventLog()
+
+def degraded_prediction(pred_request):
+    """Low-confidence answer without the model: a cached model prediction, else the Erlang C estimate"""
+    cache_key = PredictionCache.make_key(
+        pred_request.branch, pred_request.service_type, pred_request.hour,
+        pred_request.day_of_week, pred_request.current_queue_length
+    )
+    wait_time = prediction_cache.get(cache_key)
+    if wait_time is None:
+        wait_time = estimate_queue_wait(
+            pred_request.branch, pred_request.hour, pred_request.day_of_week,
+            pred_request.current_queue_length
+        )
+
+    response = PredictionResponse(
+        wait_time_minutes=wait_time,
+        confidence_level="Low",
+        branch=pred_request.branch,
+        queue_position=pred_request.current_queue_length + 1,
+        estimated_service_time=calculate_estimated_service_time(wait_time),
+        timestamp=datetime.now().isoformat(),
+        degraded=True
+    )
+    return jsonify(response.to_dict()), 200
+
+def shed_prediction(pred_request, decision):
+    """Respond to a prediction request that was not admitted"""
+    if SHED_MODE == 'degrade':
+        return degraded_prediction(pred_request)
+
+    error = ErrorResponse(
+        error_code="RATE_LIMITED" if decision.status_code == 429 else "OVERLOADED",
+        message="Too many prediction requests, please retry shortly",
+        details=decision.reason
+    )
+    return jsonify(error.to_dict()), decision.status_code, {'Retry-After': str(decision.retry_after)}
+
 # Dashboard Routes
 @app.route('/dashboard')
 @app.route('/dashboard/')
@@ -52,16 +110,18 @@ def home():
         'status': 'running',
         'timestamp': datetime.now().isoformat(),
         'model_ready': model_manager.is_model_ready(),
+        'ready': model_manager.is_warm(),
         'dashboard_url': '/dashboard',
         'customer_url': '/customer'  # Add this line
     })
 
 @app.route('/api/predict', methods=['POST'])
+@sampled_profile('predict')
 def predict_wait_time():
     """Main prediction endpoint"""
     try:
-        # Check if model is ready
-        if not model_manager.is_model_ready():
+        # Check if model is ready; with the fallback on, requests are answered analytically below
+        if not model_manager.is_model_ready() and not MODEL_FALLBACK:
             error = ErrorResponse(
                 error_code="MODEL_NOT_READY",
                 message="ML model is not loaded or ready",
@@ -93,19 +153,43 @@ def predict_wait_time():
         # Create prediction request
         pred_request = PredictionRequest.from_dict(data)
         
+        if not model_manager.is_model_ready():
+            return degraded_prediction(pred_request)
+        
+        # Admission control: shed load quickly instead of queueing without bound
+        decision = admission_controller.try_admit(pred_request.branch)
+        if not decision.admitted:
+            return shed_prediction(pred_request, decision)
+        
         # Get prediction
-        wait_time = model_manager.get_prediction(
-            branch=pred_request.branch,
-            service_type=pred_request.service_type,
-            hour=pred_request.hour,
-            day_of_week=pred_request.day_of_week,
-            service_duration=pred_request.service_duration,
-            current_queue_length=pred_request.current_queue_length
+        try:
+            wait_time, lower, upper = model_manager.get_prediction_interval(
+                branch=pred_request.branch,
+                service_type=pred_request.service_type,
+                hour=pred_request.hour,
+                day_of_week=pred_request.day_of_week,
+                service_duration=pred_request.service_duration,
+                current_queue_length=pred_request.current_queue_length
+            )
+        finally:
+            admission_controller.release()
+        
+        if SHED_MODE == 'degrade':
+            prediction_cache.put(PredictionCache.make_key(
+                pred_request.branch, pred_request.service_type, pred_request.hour,
+                pred_request.day_of_week, pred_request.current_queue_length
+            ), wait_time)
+        
+        prediction_id = model_manager.track_prediction(
+            pred_request.branch, pred_request.service_type, pred_request.hour, pred_request.day_of_week,
+            pred_request.service_duration, pred_request.current_queue_length, wait_time
         )
         
         # Calculate additional response data
-        confidence = calculate_confidence_level(wait_time, pred_request.current_queue_length)
-        estimated_time = calculate_estimated_service_time(wait_time)
+        now = datetime.now()
+        interval = (lower, upper)
+        confidence = calculate_confidence_level(wait_time, pred_request.current_queue_length, interval)
+        estimated_time = calculate_estimated_service_time(wait_time, now)
         
         # Create response
         response = PredictionResponse(
@@ -114,7 +198,9 @@ def predict_wait_time():
             branch=pred_request.branch,
             queue_position=pred_request.current_queue_length + 1,
             estimated_service_time=estimated_time,
-            timestamp=datetime.now().isoformat()
+            timestamp=now.isoformat(),
+            wait_time_range=interval,
+            prediction_id=prediction_id
         )
         
         return jsonify(response.to_dict()), 200
@@ -127,6 +213,496 @@ def predict_wait_time():
         )
         return jsonify(error.to_dict()), 500
 
+@app.route('/api/simulate', methods=['POST'])
+def simulate_staffing():
+    """What-if staffing simulation for one branch day"""
+    try:
+        if not request.is_json:
+            error = ErrorResponse(
+                error_code="INVALID_REQUEST",
+                message="Request must be JSON",
+                details="Content-Type must be application/json"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        data = request.get_json()
+        
+        is_valid, validation_message = RequestValidator.validate_simulation_request(data)
+        if not is_valid:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid simulation request",
+                details=validation_message
+            )
+            return jsonify(error.to_dict()), 400
+        
+        started = time.perf_counter()
+        branch = data['branch']
+        day_of_week = int(data['day_of_week'])
+        hours = RequestValidator.opening_hours
+        replications = int(data.get('replications', 100))
+        
+        arrival_rates, profile_source = resolve_arrival_profile(
+            branch, day_of_week, data.get('arrival_profile', 'history')
+        )
+        
+        # Scenario and baseline share the same sampled days (common random
+        # numbers), so differences come from staffing rather than noise
+        rng = np.random.default_rng(data.get('seed'))
+        arrivals, durations = sample_day(arrival_rates, replications, rng)
+        
+        tellers = expand_teller_schedule(data['tellers'], len(hours))
+        waits = simulate_waits(arrivals, durations, tellers)
+        result = {
+            'status': 'success',
+            'branch': branch,
+            'day_of_week': day_of_week,
+            'replications': replications,
+            'arrival_profile_source': profile_source,
+            'expected_arrivals_per_hour': [round(float(r), 2) for r in arrival_rates],
+            'scenario': dict(tellers=tellers, **summarize_waits(arrivals, waits, hours[0], len(hours)))
+        }
+        
+        if 'baseline_tellers' in data:
+            baseline_tellers = expand_teller_schedule(data['baseline_tellers'], len(hours))
+            baseline_waits = simulate_waits(arrivals, durations, baseline_tellers)
+            result['baseline'] = dict(
+                tellers=baseline_tellers,
+                **summarize_waits(arrivals, baseline_waits, hours[0], len(hours))
+            )
+        
+        result['runtime_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        result['timestamp'] = datetime.now().isoformat()
+        return jsonify(result), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/best-time', methods=['GET'])
+def best_time_to_visit():
+    """Rank every working hour and day of the week for a branch and service"""
+    try:
+        if not model_manager.is_model_ready():
+            error = ErrorResponse(
+                error_code="MODEL_NOT_READY",
+                message="ML model is not loaded or ready",
+                details="Please contact system administrator"
+            )
+            return jsonify(error.to_dict()), 503
+        
+        branch = request.args.get('branch')
+        service_type = request.args.get('service_type')
+        if branch not in RequestValidator.valid_branches or service_type not in RequestValidator.valid_services:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details="Query parameters 'branch' and 'service_type' must be a valid branch and service type"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        plan, cached = model_manager.get_visit_plan(branch, service_type)
+        limit = request.args.get('limit', type=int)
+        
+        return jsonify({
+            'status': 'success',
+            'branch': branch,
+            'service_type': service_type,
+            'best': plan[0] if plan else None,
+            'slots': plan[:limit] if limit else plan,
+            'model_version': model_manager.get_model_version(branch),
+            'cached': cached,
+            'timestamp': datetime.now().isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/forecast', methods=['GET'])
+def arrival_forecast():
+    """Forecast hourly customer arrivals per branch"""
+    try:
+        branch = request.args.get('branch')
+        if branch is not None and branch not in RequestValidator.valid_branches:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"Unknown branch: {branch}"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        try:
+            start = date.fromisoformat(request.args['date']) if 'date' in request.args else date.today()
+            days = int(request.args.get('days', 1))
+        except ValueError as e:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"date must be YYYY-MM-DD and days an integer: {str(e)}"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        if not (1 <= days <= 31):
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details="days must be between 1 and 31"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        forecast = get_arrival_forecast()
+        branches = [branch] if branch else forecast.branches
+        forecasts = []
+        for branch_name in branches:
+            for offset in range(days):
+                day = start + timedelta(days=offset)
+                curve = forecast.curve(branch_name, day)
+                forecasts.append({
+                    'branch': branch_name,
+                    'date': day.isoformat(),
+                    'hourly_arrivals': [round(float(v), 2) for v in curve],
+                    'expected_customers': round(float(curve.sum()), 1)
+                })
+        
+        return jsonify({
+            'status': 'success',
+            'hours': forecast.hours,
+            'forecasts': forecasts,
+            'fitted_through': forecast.fitted_through.isoformat() if forecast.fitted_through else None,
+            'timestamp': datetime.now().isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/analytics', methods=['GET'])
+def analytics():
+    """Historical roll-ups per hour, weekday, branch, service type or date"""
+    try:
+        by = request.args.get('by', 'hour')
+        branch = request.args.get('branch')
+        service_type = request.args.get('service_type')
+        
+        details = None
+        if by not in ROLLUPS:
+            details = f"by must be one of: {', '.join(ROLLUPS)}"
+        elif branch is not None and branch not in RequestValidator.valid_branches:
+            details = f"Unknown branch: {branch}"
+        elif service_type is not None and service_type not in RequestValidator.valid_services:
+            details = f"Unknown service type: {service_type}"
+        
+        try:
+            start = date.fromisoformat(request.args['start']) if 'start' in request.args else None
+            end = date.fromisoformat(request.args['end']) if 'end' in request.args else None
+        except ValueError as e:
+            details = f"start and end must be YYYY-MM-DD: {str(e)}"
+        
+        if details:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=details
+            )
+            return jsonify(error.to_dict()), 400
+        
+        cube = get_analytics_cube()
+        groups = cube.rollup(by, branch, service_type, start, end)
+        
+        return jsonify({
+            'status': 'success',
+            'by': by,
+            'filters': {
+                'branch': branch,
+                'service_type': service_type,
+                'start': start.isoformat() if start else None,
+                'end': end.isoformat() if end else None
+            },
+            'groups': groups,
+            'coverage': cube.summary(),
+            'timestamp': datetime.now().isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/observations', methods=['POST'])
+def record_observations():
+    """Feed observed waits into the live percentile sketches, rolling features and drift tracker
+    
+    An observation with wait_time_minutes is a customer reaching a teller;
+    one without it is a customer joining the queue. A wait sent with the
+    prediction_id of an earlier /api/predict response is joined to that
+    prediction for the live accuracy metrics.
+    """
+    global last_sketch_flush
+    try:
+        if not request.is_json:
+            error = ErrorResponse(
+                error_code="INVALID_REQUEST",
+                message="Request must be JSON",
+                details="Content-Type must be application/json"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        data = request.get_json()
+        observations = data.get('observations', [data]) if isinstance(data, dict) else data
+        is_valid, validation_message = RequestValidator.validate_observations(observations)
+        if not is_valid:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=validation_message
+            )
+            return jsonify(error.to_dict()), 400
+        
+        now = datetime.now()
+        arrival_times = [
+            datetime.fromisoformat(o['arrival_time']) if 'arrival_time' in o else now
+            for o in observations
+        ]
+        waits = [(o, t) for o, t in zip(observations, arrival_times) if 'wait_time_minutes' in o]
+        recorded = wait_sketches.add_many(
+            [o['branch'] for o, _ in waits],
+            [t.date() for _, t in waits],
+            [t.hour for _, t in waits],
+            [float(o['wait_time_minutes']) for o, _ in waits]
+        ) if waits else 0
+        
+        feature_store = get_feature_store()
+        for o, arrival_time in zip(observations, arrival_times):
+            if 'wait_time_minutes' in o:
+                wait = float(o['wait_time_minutes'])
+                start = arrival_time + timedelta(minutes=wait) if 'arrival_time' in o else now
+                feature_store.record_start(o['branch'], minute_of(start), wait)
+            else:
+                feature_store.record_arrival(o['branch'], minute_of(arrival_time))
+        
+        # Score the predictions these waits answer
+        joined = sum(
+            model_manager.record_actual(o['prediction_id'], float(o['wait_time_minutes']))
+            for o, _ in waits if 'prediction_id' in o
+        )
+        
+        # Persist at most every SKETCH_FLUSH_SECONDS so bursts stay cheap
+        if time.monotonic() - last_sketch_flush >= SKETCH_FLUSH_SECONDS:
+            last_sketch_flush = time.monotonic()
+            wait_sketches.save(worker_sketch_path())
+        
+        return jsonify({
+            'status': 'success',
+            'received': len(observations),
+            'recorded': recorded,
+            'joined': joined,
+            'timestamp': now.isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/events', methods=['POST'])
+def record_events():
+    """Append live queue events (arrival, service_start, service_end, abandon) to the event log
+    
+    Arrivals and service starts that carry their wait (value, in minutes)
+    also feed the rolling features.
+    """
+    try:
+        if not request.is_json:
+            error = ErrorResponse(
+                error_code="INVALID_REQUEST",
+                message="Request must be JSON",
+                details="Content-Type must be application/json"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        data = request.get_json()
+        events = data.get('events', [data]) if isinstance(data, dict) else data
+        is_valid, validation_message = RequestValidator.validate_events(events)
+        if not is_valid:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=validation_message
+            )
+            return jsonify(error.to_dict()), 400
+        
+        # Encode the whole batch first, so a bad event cannot leave part of it written
+        now = datetime.now()
+        try:
+            branches, records = encode_events(events, now)
+        except ValueError as e:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=str(e)
+            )
+            return jsonify(error.to_dict()), 400
+        event_log.append_many(branches, records)
+        
+        feature_store = get_feature_store()
+        for event in events:
+            at = datetime.fromisoformat(event['time']) if 'time' in event else now
+            value = float(event['value']) if 'value' in event else None
+            if event['kind'] == 'arrival':
+                feature_store.record_arrival(event['branch'], minute_of(at))
+            elif event['kind'] == 'service_start' and value is not None:
+                feature_store.record_start(event['branch'], minute_of(at), value)
+        
+        return jsonify({
+            'status': 'success',
+            'received': len(events),
+            'timestamp': now.isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/wait-percentiles', methods=['GET'])
+def wait_percentiles():
+    """Wait-time percentiles per hour over a sliding window of days"""
+    try:
+        branch = request.args.get('branch')
+        if branch is not None and branch not in RequestValidator.valid_branches:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"Unknown branch: {branch}"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        sketches = get_wait_sketches(wait_sketches)
+        try:
+            days = int(request.args.get('days', sketches.window_days))
+            percentiles = (
+                [float(p) for p in request.args['percentiles'].split(',')]
+                if 'percentiles' in request.args else DEFAULT_PERCENTILES
+            )
+            end = date.fromisoformat(request.args['end']) if 'end' in request.args else None
+        except ValueError as e:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"days must be an integer, percentiles comma-separated numbers and end YYYY-MM-DD: {str(e)}"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        if not (1 <= days <= sketches.window_days) or not all(0 <= p <= 100 for p in percentiles):
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"days must be between 1 and {sketches.window_days} and percentiles between 0 and 100"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        percentiles = [int(p) if p == int(p) else p for p in percentiles]
+        return jsonify({
+            'status': 'success',
+            'branch': branch,
+            'days': days,
+            'hours': sketches.quantiles(branch, percentiles, days, end),
+            'window': sketches.window(),
+            'timestamp': datetime.now().isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/staffing', methods=['GET'])
+def staffing_plan():
+    """Minimum tellers per branch, day and hour that keep waits under an SLA"""
+    try:
+        branch = request.args.get('branch')
+        if branch is not None and branch not in RequestValidator.valid_branches:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"Unknown branch: {branch}"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        try:
+            sla_minutes = float(request.args.get('sla', 15))
+            quantile = int(request.args.get('quantile', 90))
+        except ValueError as e:
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details=f"sla and quantile must be numbers: {str(e)}"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        if not (0 < sla_minutes <= 240) or not (50 <= quantile <= 99):
+            error = ErrorResponse(
+                error_code="VALIDATION_ERROR",
+                message="Invalid request data",
+                details="sla must be in (0, 240] minutes and quantile between 50 and 99"
+            )
+            return jsonify(error.to_dict()), 400
+        
+        requested = {'sla_minutes': sla_minutes, 'quantile': quantile}
+        sla_minutes, quantile = staffing_targets(sla_minutes, quantile)
+        plan = get_staffing_plan(branch, sla_minutes, quantile)
+        
+        if request.args.get('format') == 'csv':
+            filename = f"staffing_plan_p{quantile}_{sla_minutes:g}min.csv"
+            return Response(
+                plan.to_csv(index=False),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
+        
+        return jsonify({
+            'status': 'success',
+            'sla_minutes': sla_minutes,
+            'quantile': quantile,
+            'requested': requested,
+            'total_teller_hours': int(plan['tellers'].sum()),
+            'plan': plan.to_dict(orient='records'),
+            'timestamp': datetime.now().isoformat()
+        }), 200
+        
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
 @app.route('/api/model/status', methods=['GET'])
 def model_status():
     """Get model status and information"""
@@ -142,6 +718,7 @@ def model_status():
             return jsonify({
                 'status': 'error',
                 'message': 'Model not loaded',
+                'state': model_manager.state,
                 'timestamp': datetime.now().isoformat()
             }), 503
     except Exception as e:
@@ -152,20 +729,104 @@ def model_status():
         )
         return jsonify(error.to_dict()), 500
 
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 until then
+    
+    Load balancers should route traffic to a worker only after this
+    returns 200, so no request lands on a cold model.
+    """
+    startup = model_manager.get_startup_status()
+    return jsonify({
+        'status': 'success' if startup['warm'] else 'error',
+        'ready': startup['warm'],
+        **startup,
+        'timestamp': datetime.now().isoformat()
+    }), 200 if startup['warm'] else 503
+
+@app.route('/api/model/drift', methods=['GET'])
+def model_drift():
+    """Live accuracy of joined predictions, feature drift against training, and the retrain signal"""
+    try:
+        if not model_manager.is_model_ready():
+            error = ErrorResponse(
+                error_code="MODEL_NOT_READY",
+                message="ML model is not loaded or ready",
+                details="Please contact system administrator"
+            )
+            return jsonify(error.to_dict()), 503
+        
+        return jsonify({
+            'status': 'success',
+            **model_manager.drift.summary(),
+            'timestamp': datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        error = ErrorResponse(
+            error_code="INTERNAL_ERROR",
+            message="Internal server error",
+            details=str(e)
+        )
+        return jsonify(error.to_dict()), 500
+
+@app.route('/api/model/shadow', methods=['GET'])
+def model_shadow():
+    """Disagreement between the shadow model and the primary model on sampled live requests"""
+    shadow = model_manager.shadow
+    if shadow is None:
+        return jsonify({
+            'status': 'success',
+            'enabled': False,
+            'timestamp': datetime.now().isoformat()
+        }), 200
+    
+    return jsonify({
+        'status': 'success',
+        'enabled': True,
+        **shadow.stats(),
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+@app.route('/api/admission/status', methods=['GET'])
+def admission_status():
+    """Get admission control configuration and shedding counters"""
+    return jsonify({
+        'status': 'success',
+        'shed_mode': SHED_MODE,
+        'admission': admission_controller.get_status(),
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
 @app.route('/api/branches', methods=['GET'])
 def get_branches():
-    """Get list of available branches"""
-    branches = [
-        "Victoria Island",
-        "Ikeja", 
-        "Surulere",
-        "Abuja",
-        "Port Harcourt"
-    ]
+    """Get registered branches with their region, tellers and model encoding
+    
+    Optional query parameter: region. model_encoding is 'trained' for
+    branches the model was trained on and names the stand-in otherwise.
+    """
+    registry = get_branch_registry()
+    region = request.args.get('region')
+    if region is not None and region not in registry.by_region:
+        error = ErrorResponse(
+            error_code="VALIDATION_ERROR",
+            message="Invalid request data",
+            details=f"Unknown region. Must be one of: {', '.join(sorted(registry.by_region))}"
+        )
+        return jsonify(error.to_dict()), 400
+    
+    basis = model_manager.model_data.get('branch_basis', {}) if model_manager.is_model_ready() else {}
+    shards = model_manager.shards
+    branches = registry.by_region[region] if region is not None else registry.branches
     
     return jsonify({
         'status': 'success',
-        'branches': branches,
+        'branches': [b.name for b in branches],
+        'details': [
+            dict(b.to_dict(), model_encoding=basis.get(b.name),
+                 model_shard=shards.shard_for(b.name) if shards is not None else None)
+            for b in branches
+        ],
+        'regions': sorted(registry.by_region),
         'count': len(branches),
         'timestamp': datetime.now().isoformat()
     }), 200
@@ -173,13 +834,7 @@ def get_branches():
 @app.route('/api/services', methods=['GET'])
 def get_services():
     """Get list of available service types"""
-    services = [
-        "Account Opening",
-        "Cash Withdrawal", 
-        "Transfer",
-        "Loan Application",
-        "General Inquiry"
-    ]
+    services = load_config()['service_types']
     
     return jsonify({
         'status': 'success',
@@ -210,7 +865,7 @@ def method_not_allowed(error):
 
 if __name__ == '__main__':
     print("Starting QueueSmart API with Dashboard...")
-    print(f"Model ready: {model_manager.is_model_ready()}")
+    print(f"Model state: {model_manager.state} (GET /api/ready reports when warmed up)")
     print("API available at: http://localhost:5000")
     print("Dashboard available at: http://localhost:5000/dashboard")
     
@@ -5,6 +5,9 @@ import json
 class PredictionRequest:
     """Model for prediction request data"""
     
+    __slots__ = ('branch', 'service_type', 'hour', 'day_of_week',
+                 'service_duration', 'current_queue_length')
+    
     def __init__(self, branch, service_type, hour, day_of_week, 
                  service_duration, current_queue_length):
         self.branch = branch
@@ -26,29 +29,34 @@ class PredictionRequest:
     
     @classmethod
     def from_dict(cls, data):
+        get = data.get
         return cls(
-            branch=data.get('branch'),
-            service_type=data.get('service_type'),
-            hour=data.get('hour'),
-            day_of_week=data.get('day_of_week'),
-            service_duration=data.get('service_duration'),
-            current_queue_length=data.get('current_queue_length')
+            get('branch'), get('service_type'), get('hour'),
+            get('day_of_week'), get('service_duration'), get('current_queue_length')
         )
 
 class PredictionResponse:
     """Model for prediction response data"""
     
+    __slots__ = ('wait_time_minutes', 'confidence_level', 'branch', 'queue_position',
+                 'estimated_service_time', 'timestamp', 'degraded', 'wait_time_range',
+                 'prediction_id')
+    
     def __init__(self, wait_time_minutes, confidence_level, branch, 
-                 queue_position, estimated_service_time, timestamp):
+                 queue_position, estimated_service_time, timestamp, degraded=False,
+                 wait_time_range=None, prediction_id=None):
         self.wait_time_minutes = wait_time_minutes
         self.confidence_level = confidence_level
         self.branch = branch
         self.queue_position = queue_position
         self.estimated_service_time = estimated_service_time
         self.timestamp = timestamp
+        self.degraded = degraded
+        self.wait_time_range = wait_time_range
+        self.prediction_id = prediction_id
     
     def to_dict(self):
-        return {
+        response = {
             'wait_time_minutes': round(self.wait_time_minutes, 1),
             'confidence_level': self.confidence_level,
             'branch': self.branch,
@@ -57,10 +65,22 @@ class PredictionResponse:
             'timestamp': self.timestamp,
             'status': 'success'
         }
+        if self.wait_time_range is not None and self.wait_time_range[0] is not None:
+            response['wait_time_range'] = {
+                'lower': round(self.wait_time_range[0], 1),
+                'upper': round(self.wait_time_range[1], 1)
+            }
+        if self.prediction_id is not None:
+            response['prediction_id'] = self.prediction_id
+        if self.degraded:
+            response['degraded'] = True
+        return response
 
 class ErrorResponse:
     """Model for error responses"""
     
+    __slots__ = ('error_code', 'message', 'details', 'timestamp')
+    
     def __init__(self, error_code, message, details=None):
         self.error_code = error_code
         self.message = message
@@ -0,0 +1,168 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from ml_predictor import predict_wait_times
+from drift_monitor import ErrorRing, error_metrics, WINDOW
+
+# Fields of a queued request copy, in order; the columns predict_wait_times reads plus bookkeeping
+REQUEST_COLUMNS = ['prediction_id', 'branch', 'service_type', 'hour', 'day_of_week',
+                   'service_duration', 'current_queue_length', 'primary_prediction']
+
+class ShadowEvaluator:
+    """Scores a candidate model on a sample of live requests, off the request path
+
+    The request thread only samples and hands the request's fields to a
+    bounded queue with put_nowait; when the queue is full the copy is
+    dropped and counted, so serving never waits on the shadow. A single
+    background thread lets copies collect for ``linger`` seconds and
+    scores up to ``batch_size`` of them in one model call, which keeps its
+    CPU share, and so its contention with serving threads, small. Each
+    copy's disagreement with the primary prediction is recorded overall
+    and per branch in fixed-size rings. Shadow and primary predictions are
+    also kept (bounded) by prediction_id so observed waits can score both
+    models on the same requests.
+    """
+
+    def __init__(self, model_data, extra_features=None, sample_rate=1.0,
+                 max_queue=1000, batch_size=64, linger=0.05, window=WINDOW, max_pending=10000):
+        self.model_data = model_data
+        self.extra_features = extra_features
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.linger = linger
+        self.window = window
+        self.max_pending = max_pending
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self.disagreement = ErrorRing(window)
+        self.by_branch = {}
+        self.errors = {'primary': ErrorRing(window), 'shadow': ErrorRing(window)}
+        self.pending = OrderedDict()
+        self.counters = {'sampled': 0, 'dropped': 0, 'scored': 0, 'failed': 0, 'joined': 0}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.worker = threading.Thread(target=self._run, name='shadow-model', daemon=True)
+        self.worker.start()
+
+    @classmethod
+    def from_env(cls, model_data, extra_features=None):
+        """Build an evaluator with QUEUESMART_SHADOW_* settings"""
+        return cls(
+            model_data, extra_features,
+            sample_rate=float(os.environ.get('QUEUESMART_SHADOW_SAMPLE', 1.0)),
+            max_queue=int(os.environ.get('QUEUESMART_SHADOW_QUEUE', 1000))
+        )
+
+    def submit(self, prediction_id, branch, service_type, hour, day_of_week,
+               service_duration, current_queue_length, primary_prediction):
+        """Queue a sampled copy of a served request; never blocks"""
+        if random.random() >= self.sample_rate:
+            return False
+        try:
+            self.queue.put_nowait((prediction_id, branch, service_type, hour, day_of_week,
+                                   service_duration, current_queue_length, primary_prediction))
+        except queue.Full:
+            self.counters['dropped'] += 1
+            return False
+        self.counters['sampled'] += 1
+        return True
+
+    def _next_batch(self):
+        """Block for one queued copy, let more collect for ``linger`` seconds, then take up to batch_size"""
+        batch = [self.queue.get(timeout=0.5)]
+        if self.linger:
+            time.sleep(self.linger)
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                continue
+            try:
+                requests_df = pd.DataFrame(batch, columns=REQUEST_COLUMNS)
+                if self.extra_features is not None:
+                    extra = [self.extra_features(row.branch, row.hour, row.day_of_week, self.model_data)
+                             for row in requests_df.itertuples()]
+                    if extra[0]:
+                        requests_df = requests_df.join(pd.DataFrame(extra, index=requests_df.index))
+                shadow = predict_wait_times(self.model_data, requests_df)
+            except Exception:
+                self.counters['failed'] += len(batch)
+                continue
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            with self.lock:
+                for item, prediction in zip(batch, shadow):
+                    prediction_id, branch, primary = item[0], item[1], item[-1]
+                    difference = float(prediction) - primary
+                    self.disagreement.add(difference)
+                    ring = self.by_branch.get(branch)
+                    if ring is None:
+                        ring = self.by_branch[branch] = ErrorRing(self.window)
+                    ring.add(difference)
+                    if prediction_id is not None:
+                        self.pending[prediction_id] = (primary, float(prediction))
+                        if len(self.pending) > self.max_pending:
+                            self.pending.popitem(last=False)
+                self.counters['scored'] += len(batch)
+
+    def record_actual(self, prediction_id, actual_wait):
+        """Score both models against an observed wait; False when the request was not shadowed"""
+        with self.lock:
+            entry = self.pending.pop(prediction_id, None)
+            if entry is None:
+                return False
+            primary, shadow = entry
+            self.errors['primary'].add(float(actual_wait) - primary)
+            self.errors['shadow'].add(float(actual_wait) - shadow)
+            self.counters['joined'] += 1
+        return True
+
+    def drain(self):
+        """Block until every queued copy has been scored (for tests and benchmarks)"""
+        self.queue.join()
+
+    def close(self):
+        self.stopped.set()
+        self.worker.join(timeout=2)
+
+    def stats(self):
+        """Disagreement with the primary model and accuracy of both on joined waits"""
+        def disagreement(ring):
+            metrics = error_metrics(ring.values())
+            values = ring.values()
+            return {
+                'count': metrics['count'],
+                'mean_difference': round(float(values.mean()), 3) if len(values) else None,
+                'mean_abs_difference': metrics['mae'],
+                'rms_difference': metrics['rmse'],
+                'within_5min_pct': metrics['accuracy_5min']
+            }
+
+        with self.lock:
+            return {
+                'model_name': self.model_data['model_name'],
+                'trained_date': self.model_data['timestamp'],
+                'sample_rate': self.sample_rate,
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.queue.maxsize,
+                **self.counters,
+                'disagreement': disagreement(self.disagreement),
+                'disagreement_by_branch': {b: disagreement(r) for b, r in sorted(self.by_branch.items())},
+                'live_accuracy': {name: error_metrics(ring.values()) for name, ring in self.errors.items()}
+            }
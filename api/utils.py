@@ -1,65 +1,249 @@
 import os
 import sys
-from datetime import datetime, timedelta
+import json
+import calendar
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
 import joblib
 import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
 
 # Add parent directory to path to import our models
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
+CONFIG_PATH = os.path.join(parent_dir, 'data', 'config.json')
+HISTORY_PATH = os.path.join(parent_dir, 'data', 'processed_banking_data.csv')
+MODEL_PATH = os.path.join(parent_dir, 'models', 'random_forest_tuned_model.joblib')
 
 # Now import from the models directory
 sys.path.append(os.path.join(parent_dir, 'models'))
-from ml_predictor import predict_wait_time, load_model
+from ml_predictor import predict_wait_time, predict_wait_time_interval, predict_wait_times, load_model, PEAK_HOURS
+from data.data_generator import SERVICE_TYPES
+from queue_simulation import generator_arrival_profile, history_arrival_profile
+from demand_forecast import ArrivalForecast, build_forecast, FORECAST_PATH
+from staffing_optimizer import plan_staffing
+from analytics_cube import AnalyticsCube, CUBE_PATH
+from wait_sketch import (WaitSketchStore, SKETCH_PATH, worker_sketch_path, worker_sketch_paths, load_merged,
+                         adopt_dead_workers)
+from feature_store import RollingFeatureStore, FEATURE_COLUMNS as ROLLING_FEATURES
+from branch_registry import load_registry
+from shard_models import ShardRouter
+from drift_monitor import DriftTracker, reference_from_history
+from event_log import EVENT_KINDS, NO_TELLER, MAX_CUSTOMER
+from queue_theory import build_estimator
+from .shadow import ShadowEvaluator
+
+# Mean service time across the generator's service mix, the default service duration
+MEAN_SERVICE_MINUTES = sum(
+    s['weight'] * (s['min'] + s['max']) / 2 for s in SERVICE_TYPES.values()
+) / sum(s['weight'] for s in SERVICE_TYPES.values())
+
+# Quantiles of the per-tree predictions reported as the wait time range
+PREDICTION_INTERVAL = (10, 90)
+
+# Interval widths (minutes) up to which a prediction counts as High / Medium confidence
+CONFIDENCE_WIDTHS = {'High': 10, 'Medium': 20}
+
+# Route predictions to per-branch (or per-region) shard models from shard_models.py
+SHARDS_ENABLED = os.environ.get('QUEUESMART_MODEL_SHARDS', '0') not in ('', '0')
+
+# Candidate model scored on sampled live requests in the background, relative to the project root
+SHADOW_MODEL_PATH = os.environ.get('QUEUESMART_SHADOW_MODEL')
+
+# Load and warm up the model in a background thread so importing the app does not wait on it
+BACKGROUND_LOAD = os.environ.get('QUEUESMART_BACKGROUND_LOAD', '1') not in ('', '0')
+
+# Queue length of the representative requests scored during warm-up
+WARMUP_QUEUE_LENGTH = 5
 
 class ModelManager:
     """Manages the ML model loading and predictions"""
     
-    def __init__(self):
+    def __init__(self, background=BACKGROUND_LOAD):
         self.model_data = None
         self.model_loaded = False
+        self.plan_cache = {}
+        self.shards = None
+        self.drift = DriftTracker()
+        self.shadow = None
+        # 'loading' -> 'warming' -> 'ready', or 'failed' when no model could be loaded or warmed up
+        self.state = 'loading'
+        self.warmup = None
+        self.started = threading.Event()
+        if background:
+            threading.Thread(target=self.start, name='model-loader', daemon=True).start()
+        else:
+            self.start()
+    
+    def start(self):
+        """Load the model (and shadow model), then warm it up before reporting ready"""
+        started = time.perf_counter()
+        get_queueing_estimator()
         self.load_model()
+        if SHADOW_MODEL_PATH:
+            self.load_shadow(os.path.join(parent_dir, SHADOW_MODEL_PATH))
+        load_seconds = time.perf_counter() - started
+        
+        if self.is_model_ready():
+            self.state = 'warming'
+            try:
+                self.warmup = self.warm_up()
+                self.warmup['load_seconds'] = round(load_seconds, 3)
+                self.state = 'ready'
+                print(f"Model warmed up: {self.warmup['requests']} requests in {self.warmup['seconds']:.2f}s")
+            except Exception as e:
+                print(f"Error warming up model: {str(e)}")
+                self.warmup = {'error': str(e)}
+                self.state = 'failed'
+        else:
+            self.state = 'failed'
+        self.started.set()
     
     def load_model(self):
         """Load the trained model"""
         try:
-            # Get the correct path to the model file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(current_dir)
-
-            # ADD THESE DEBUG LINES:
-            print(f"DEBUG: current_dir = {current_dir}")
-            print(f"DEBUG: parent_dir = {parent_dir}")
-            print(f"DEBUG: Files in parent_dir = {os.listdir(parent_dir) if os.path.exists(parent_dir) else 'NOT_FOUND'}")
-            models_dir = os.path.join(parent_dir, 'models')
-            print(f"DEBUG: models_dir = {models_dir}")
-            print(f"DEBUG: models_dir exists = {os.path.exists(models_dir)}")
-            if os.path.exists(models_dir):
-                print(f"DEBUG: Files in models_dir = {os.listdir(models_dir)}")
-
-            sys.path.insert(0, parent_dir)
-            # Now import from the models directory
-            sys.path.append(os.path.join(parent_dir, 'models'))
-            from ml_predictor import predict_wait_time, load_model
-            
-            model_path = os.path.join(project_root, 'models', 'random_forest_tuned_model.joblib')
-            
-            if os.path.exists(model_path):
-                self.model_data = load_model(model_path)
+            if os.path.exists(MODEL_PATH):
+                model_data = load_model(MODEL_PATH)
+                self.attach_branch_encoding(model_data)
+                if SHARDS_ENABLED:
+                    self.shards = ShardRouter(registry=get_branch_registry(), prepare=self.attach_branch_encoding)
+                self.drift = self.build_drift_tracker(model_data)
+                self.plan_cache.clear()
+                self.model_data = model_data
                 self.model_loaded = True
                 print(f"Model loaded successfully: {self.model_data['model_name']}")
             else:
-                print(f"Model file not found: {model_path}")
+                print(f"Model file not found: {MODEL_PATH}")
                 self.model_loaded = False
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             self.model_loaded = False
     
+    def warm_up(self):
+        """Score representative requests so the first real ones do not pay for cold caches
+        
+        Runs the /api/predict path (interval prediction and extra features)
+        for every registered branch and service type at a peak hour, which
+        also loads each branch's shard when sharding is on, scores the same
+        requests as one batch, and builds one visit plan, which loads the
+        history and forecast caches /api/best-time reads.
+        """
+        started = time.perf_counter()
+        branches = [b.name for b in get_branch_registry().branches]
+        services = list(SERVICE_TYPES)
+        hour, day_of_week = PEAK_HOURS[0], 0
+        requests = pd.DataFrame([
+            {
+                'branch': branch, 'service_type': service, 'hour': hour, 'day_of_week': day_of_week,
+                'service_duration': (SERVICE_TYPES[service]['min'] + SERVICE_TYPES[service]['max']) / 2,
+                'current_queue_length': WARMUP_QUEUE_LENGTH
+            }
+            for branch in branches for service in services
+        ])
+        for row in requests.itertuples(index=False):
+            self.get_prediction_interval(*row)
+        for branch, index in requests.groupby('branch').indices.items():
+            model_data = self.model_for(branch)
+            batch = requests.iloc[index]
+            extra = self.get_extra_features(branch, hour, day_of_week, model_data)
+            if extra:
+                batch = batch.assign(**extra)
+            predict_wait_times(model_data, batch)
+        self.get_visit_plan(branches[0], services[0])
+        return {'requests': len(requests), 'seconds': round(time.perf_counter() - started, 3)}
+    
+    def is_warm(self):
+        """Check if the model is loaded and warmed up, so the worker can take traffic"""
+        return self.state == 'ready'
+    
+    def wait_until_ready(self, timeout=None):
+        """Block until loading and warm-up finish; returns whether the model is ready"""
+        self.started.wait(timeout)
+        return self.is_warm()
+    
+    def get_startup_status(self):
+        """Loading state and warm-up timings"""
+        return {
+            'state': self.state,
+            'model_ready': self.is_model_ready(),
+            'warm': self.is_warm(),
+            'warmup': self.warmup
+        }
+    
+    @staticmethod
+    def attach_branch_encoding(model_data):
+        """Give every registered branch a model code, standing in for branches the model never saw"""
+        encoding = get_branch_registry().encoding_for(list(model_data['encoders']['branch'].classes_))
+        model_data['branch_codes'] = {name: code for name, (code, _) in encoding.items()}
+        model_data['branch_basis'] = {name: basis for name, (_, basis) in encoding.items()}
+    
+    def load_shadow(self, model_path):
+        """Load a candidate model to score sampled requests next to the primary one"""
+        try:
+            model_data = load_model(model_path)
+            self.attach_branch_encoding(model_data)
+        except Exception as e:
+            print(f"Error loading shadow model: {str(e)}")
+            return False
+        if self.shadow is not None:
+            self.shadow.close()
+        self.shadow = ShadowEvaluator.from_env(model_data, self.get_extra_features)
+        print(f"Shadow model loaded: {model_data['model_name']}")
+        return True
+    
+    def build_drift_tracker(self, model_data):
+        """Drift tracker for a model, with its reference rebuilt from history if it was saved without one"""
+        histograms = model_data.get('feature_histograms')
+        baseline_mae = (model_data.get('metrics') or {}).get('mae')
+        if histograms is None and os.path.exists(HISTORY_PATH):
+            histograms, baseline_mae = reference_from_history(model_data, load_history())
+        return DriftTracker(histograms, baseline_mae, f"{model_data['model_name']}@{model_data['timestamp']}")
+    
+    def track_prediction(self, branch, service_type, hour, day_of_week,
+                         service_duration, current_queue_length, prediction):
+        """Register a served prediction with the drift tracker and shadow model; returns its prediction_id"""
+        model_data = self.model_data
+        service_codes = model_data.get('_service_codes')
+        if service_codes is None:
+            service_codes = model_data['_service_codes'] = {
+                name: code for code, name in enumerate(model_data['encoders']['service_type'].classes_)
+            }
+        features = {
+            'hour': hour,
+            'day_of_week': day_of_week,
+            'branch_encoded': model_data.get('branch_codes', {}).get(branch),
+            'service_type_encoded': service_codes.get(service_type),
+            'service_duration_minutes': service_duration,
+            'queue_length_on_arrival': current_queue_length,
+            'is_peak_hour': 1 if hour in PEAK_HOURS else 0
+        }
+        prediction_id = self.drift.record_prediction(branch, hour, prediction, features)
+        if self.shadow is not None:
+            self.shadow.submit(prediction_id, branch, service_type, hour, day_of_week,
+                               service_duration, current_queue_length, prediction)
+        return prediction_id
+    
+    def record_actual(self, prediction_id, actual_wait):
+        """Score a served prediction (and its shadow, if any) against the observed wait"""
+        joined = self.drift.record_actual(prediction_id, actual_wait)
+        if self.shadow is not None:
+            self.shadow.record_actual(prediction_id, actual_wait)
+        return joined
+    
     def is_model_ready(self):
         """Check if model is loaded and ready"""
         return self.model_loaded and self.model_data is not None
     
+    def model_for(self, branch):
+        """Model serving a branch: its shard when sharding is on and one covers it, else the global model"""
+        if self.shards is not None:
+            return self.shards.model_for(branch) or self.model_data
+        return self.model_data
+    
     def get_prediction(self, branch, service_type, hour, day_of_week, 
                       service_duration, current_queue_length):
         """Get wait time prediction"""
@@ -67,14 +251,101 @@ class ModelManager:
             raise Exception("Model not loaded")
         
         try:
+            model_data = self.model_for(branch)
             prediction = predict_wait_time(
-                self.model_data, branch, service_type, hour, 
-                day_of_week, service_duration, current_queue_length
+                model_data, branch, service_type, hour, 
+                day_of_week, service_duration, current_queue_length,
+                extra_features=self.get_extra_features(branch, hour, day_of_week, model_data)
             )
             return prediction
         except Exception as e:
             raise Exception(f"Prediction error: {str(e)}")
     
+    def get_prediction_interval(self, branch, service_type, hour, day_of_week,
+                                service_duration, current_queue_length):
+        """Get wait time prediction with p10/p90 bounds from the forest's trees
+        
+        Returns (prediction, lower, upper); the bounds are None when the
+        loaded model is not a tree ensemble.
+        """
+        if not self.is_model_ready():
+            raise Exception("Model not loaded")
+        
+        try:
+            model_data = self.model_for(branch)
+            return predict_wait_time_interval(
+                model_data, branch, service_type, hour,
+                day_of_week, service_duration, current_queue_length,
+                quantiles=PREDICTION_INTERVAL,
+                extra_features=self.get_extra_features(branch, hour, day_of_week, model_data)
+            )
+        except Exception as e:
+            raise Exception(f"Prediction error: {str(e)}")
+    
+    def get_extra_features(self, branch, hour, day_of_week, model_data=None):
+        """Values for optional model features beyond the request fields"""
+        columns = (model_data or self.model_data)['feature_columns']
+        extra = {}
+        if 'forecast_arrival_rate' in columns:
+            extra['forecast_arrival_rate'] = get_arrival_forecast().weekday_rate(branch, day_of_week, hour)
+        if any(column in columns for column in ROLLING_FEATURES):
+            extra.update(get_feature_store().features(branch))
+        if 'erlang_c_wait' in columns:
+            extra['erlang_c_wait'] = get_queueing_estimator().estimate(branch, hour, day_of_week)
+        return extra or None
+    
+    def get_model_version(self, branch=None):
+        """Identifier that changes whenever a different model is loaded
+        
+        With a branch, identifies the model serving that branch, so it also
+        changes when only that branch's shard is retrained.
+        """
+        if not self.is_model_ready():
+            return None
+        model_data = self.model_data if branch is None else self.model_for(branch)
+        return f"{model_data['model_name']}@{model_data['timestamp']}"
+    
+    def get_visit_plan(self, branch, service_type):
+        """Rank every working hour and day for a visit, cached per model version
+        
+        Returns (plan, cached). All slots are scored in one batched model call.
+        """
+        if not self.is_model_ready():
+            raise Exception("Model not loaded")
+        
+        key = (self.get_model_version(branch), branch, service_type)
+        plan = self.plan_cache.get(key)
+        if plan is not None:
+            return plan, True
+        
+        history = load_history() if os.path.exists(HISTORY_PATH) else None
+        slots = build_visit_slots(
+            history, branch, service_type,
+            RequestValidator.opening_hours, RequestValidator.working_days
+        )
+        model_data = self.model_for(branch)
+        extra = [self.get_extra_features(branch, row.hour, row.day_of_week, model_data) for row in slots.itertuples()]
+        if extra[0]:
+            slots = slots.join(pd.DataFrame(extra, index=slots.index))
+        try:
+            slots['predicted_wait_minutes'] = predict_wait_times(model_data, slots)
+        except Exception as e:
+            raise Exception(f"Prediction error: {str(e)}")
+        
+        slots = slots.sort_values(['predicted_wait_minutes', 'current_queue_length'], kind='stable')
+        plan = [
+            {
+                'day_of_week': int(row.day_of_week),
+                'day_name': calendar.day_name[int(row.day_of_week)],
+                'hour': int(row.hour),
+                'expected_queue_length': round(float(row.current_queue_length), 1),
+                'predicted_wait_minutes': round(float(row.predicted_wait_minutes), 1)
+            }
+            for row in slots.itertuples(index=False)
+        ]
+        self.plan_cache[key] = plan
+        return plan, False
+    
     def get_model_info(self):
         """Get information about the loaded model"""
         if not self.is_model_ready():
@@ -84,59 +355,443 @@ class ModelManager:
             'model_name': self.model_data['model_name'],
             'trained_date': self.model_data['timestamp'],
             'features': self.model_data['feature_columns'],
-            'status': 'active'
+            'status': 'active',
+            'shards': self.shards.info() if self.shards is not None else None
         }
 
+def load_config(config_path=CONFIG_PATH):
+    """Load the project configuration (branches, services, working hours)"""
+    with open(config_path) as f:
+        return json.load(f)
+
+@lru_cache(maxsize=1)
+def get_branch_registry():
+    """Registered branches and their metadata (data/branches.csv, or config)"""
+    return load_registry()
+
+@lru_cache(maxsize=1)
+def load_history(history_path=HISTORY_PATH):
+    """Load the processed history once and keep it for later requests"""
+    return pd.read_csv(history_path)
+
+@lru_cache(maxsize=1)
+def get_arrival_forecast():
+    """Precomputed arrival forecast, fitted from history if none was stored"""
+    if os.path.exists(FORECAST_PATH):
+        return ArrivalForecast.load(FORECAST_PATH)
+    return build_forecast()
+
+@lru_cache(maxsize=1)
+def get_queueing_estimator():
+    """Erlang C estimator fitted from history, with tellers from the branch registry"""
+    return build_estimator(HISTORY_PATH)
+
+def get_analytics_cube():
+    """Materialized analytics cube, reloaded when processing writes a new one"""
+    mtime = os.path.getmtime(CUBE_PATH) if os.path.exists(CUBE_PATH) else None
+    return _load_analytics_cube(mtime)
+
+@lru_cache(maxsize=1)
+def _load_analytics_cube(mtime):
+    if mtime is not None:
+        return AnalyticsCube.load(CUBE_PATH)
+    config = load_config()
+    return AnalyticsCube.from_frame(
+        load_history(), get_branch_registry().names,
+        list(range(config['working_hours']['start'], config['working_hours']['end'])),
+        config['service_types']
+    )
+
+def load_wait_sketches():
+    """This worker's sketches of live waits, continued from its own file (worker_sketch_path)
+    
+    Each worker saves only what it observed to a file of its own, so
+    workers never overwrite each other's or the processing pipeline's
+    counts; get_wait_sketches merges them all for queries. Files left by
+    workers that are no longer running are folded in and removed, so they
+    do not pile up across restarts.
+    """
+    path = worker_sketch_path()
+    if os.path.exists(path):
+        store = WaitSketchStore.load(path)
+    else:
+        store = WaitSketchStore(get_branch_registry().names)
+    adopt_dead_workers(store, path)
+    return store
+
+def get_wait_sketches(live):
+    """Sketches for queries: processed history, every other worker's saved sketches and ``live``"""
+    own = worker_sketch_path()
+    paths = [p for p in [SKETCH_PATH] + worker_sketch_paths() if p != own]
+    stamps = tuple((p, os.path.getmtime(p)) for p in paths if os.path.exists(p))
+    return _load_saved_sketches(stamps).copy().merge(live.copy())
+
+@lru_cache(maxsize=1)
+def _load_saved_sketches(stamps):
+    paths = [path for path, _ in stamps]
+    store = load_merged(paths)
+    if SKETCH_PATH not in paths and os.path.exists(HISTORY_PATH):
+        # No processed-history store yet: seed from history
+        history = load_history()
+        store.add_many(history['branch'].tolist(), history['date'], history['hour'], history['wait_time_minutes'])
+    return store
+
+@lru_cache(maxsize=1)
+def get_feature_store():
+    """Live rolling queue features, fed by /api/observations"""
+    return RollingFeatureStore(get_branch_registry().names)
+
+# Staffing plans are computed on these grids so requests share a bounded set of cached plans
+STAFFING_SLA_STEPS = (1, 2, 3, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240)
+STAFFING_QUANTILES = (50, 75, 80, 85, 90, 95, 99)
+
+def staffing_targets(sla_minutes, quantile):
+    """Snap an SLA and quantile to the grids, toward the stricter side
+
+    The SLA rounds down and the quantile up, so the plan served meets the
+    target asked for (SLAs under the first step use that step).
+    """
+    sla = max((s for s in STAFFING_SLA_STEPS if s <= sla_minutes), default=STAFFING_SLA_STEPS[0])
+    return sla, min(q for q in STAFFING_QUANTILES if q >= quantile)
+
+def get_staffing_plan(branch, sla_minutes, quantile):
+    """Staffing table for one branch (or all when branch is None) at the snapped SLA and quantile"""
+    return _plan_staffing(branch, *staffing_targets(sla_minutes, quantile))
+
+@lru_cache(maxsize=None)
+def _plan_staffing(branch, sla_minutes, quantile):
+    # Keys are bounded by the branches and the staffing grids
+    return plan_staffing(
+        branches=[branch] if branch else None, sla_minutes=sla_minutes, quantile=quantile,
+        forecast=get_arrival_forecast()
+    )
+
+def build_visit_slots(history, branch, service_type, hours, days):
+    """One prediction request per (day, hour) slot with inputs taken from history
+    
+    The queue length for each slot is the historical mean for the branch,
+    falling back to all branches and then to the hour alone. The service
+    duration is the historical mean for the service type.
+    """
+    slots = pd.DataFrame(
+        [(day, hour) for day in days for hour in hours],
+        columns=['day_of_week', 'hour']
+    )
+    slots['branch'] = branch
+    slots['service_type'] = service_type
+    
+    if history is None or len(history) == 0:
+        slots['current_queue_length'] = 0.0
+        limits = SERVICE_TYPES.get(service_type, {'min': MEAN_SERVICE_MINUTES, 'max': MEAN_SERVICE_MINUTES})
+        slots['service_duration'] = (limits['min'] + limits['max']) / 2
+        return slots
+    
+    queue = history['queue_length_on_arrival']
+    branch_means = queue[history['branch'] == branch].groupby(
+        [history['day_of_week'], history['hour']]).mean()
+    all_means = queue.groupby([history['day_of_week'], history['hour']]).mean()
+    hour_means = queue.groupby(history['hour']).mean()
+    
+    slot_index = pd.MultiIndex.from_frame(slots[['day_of_week', 'hour']])
+    expected_queue = branch_means.reindex(slot_index).to_numpy()
+    expected_queue = np.where(np.isnan(expected_queue), all_means.reindex(slot_index).to_numpy(), expected_queue)
+    expected_queue = np.where(np.isnan(expected_queue), hour_means.reindex(slots['hour']).to_numpy(), expected_queue)
+    slots['current_queue_length'] = np.nan_to_num(expected_queue)
+    
+    durations = history.loc[history['service_type'] == service_type, 'service_duration_minutes']
+    slots['service_duration'] = durations.mean() if len(durations) else MEAN_SERVICE_MINUTES
+    return slots
+
+def resolve_arrival_profile(branch, day_of_week, profile='history'):
+    """Expected arrivals per opening hour and where they came from
+
+    ``profile`` is 'history', 'generator' or an explicit list of hourly
+    rates. History falls back to the generator's weights when the branch
+    has no recorded days for that weekday.
+    """
+    hours = RequestValidator.opening_hours
+    if isinstance(profile, (list, tuple)):
+        return np.asarray(profile, dtype=float), 'custom'
+    
+    if profile == 'history' and os.path.exists(HISTORY_PATH):
+        rates = history_arrival_profile(load_history(), branch, day_of_week, hours[0], len(hours))
+        if rates is not None:
+            return rates, 'history'
+    
+    return generator_arrival_profile(day_of_week), 'generator'
+
 class RequestValidator:
-    """Validates API requests"""
+    """Validates API requests
+
+    Lookup tables and error messages are compiled once from the project
+    config (see compile()), so each validation is only set membership and
+    range checks.
+    """
     
-    @staticmethod
-    def validate_prediction_request(data):
-        """Validate prediction request data"""
-        required_fields = [
-            'branch', 'service_type', 'hour', 'day_of_week',
-            'service_duration', 'current_queue_length'
-        ]
+    REQUIRED_FIELDS = (
+        'branch', 'service_type', 'hour', 'day_of_week',
+        'service_duration', 'current_queue_length'
+    )
+    REQUIRED_FIELD_SET = frozenset(REQUIRED_FIELDS)
+    
+    # Inclusive (min, max) limits for the numeric request fields
+    LIMITS = {
+        'hour': (8, 16),
+        'day_of_week': (0, 6),
+        'service_duration': (1, 120),
+        'current_queue_length': (0, 100)
+    }
+    
+    # Upper bounds for what-if simulation requests
+    MAX_TELLERS = 20
+    MAX_REPLICATIONS = 1000
+    # Custom hourly arrival rates up to this multiple of the generator's busiest hour
+    MAX_ARRIVAL_RATE = 10 * max(generator_arrival_profile(day).max() for day in range(7))
+    
+    # Largest batch and wait accepted by the observation feed
+    MAX_OBSERVATIONS = 1000
+    MAX_OBSERVED_WAIT = 24 * 60
+    
+    valid_branches = frozenset()
+    valid_services = frozenset()
+    opening_hours = []
+    working_days = []
+    
+    @classmethod
+    def compile(cls, config, branches=None):
+        """Build the lookup tables and messages from a config dict and the branch names
         
+        branches defaults to the branch registry.
+        """
+        branches = list(branches if branches is not None else get_branch_registry().names)
+        cls.LIMITS = dict(cls.LIMITS)
+        cls.LIMITS['hour'] = (config['working_hours']['start'], config['working_hours']['end'])
+        cls.working_days = list(config['working_days'])
+        cls.opening_hours = list(range(config['working_hours']['start'], config['working_hours']['end']))
+        cls.valid_branches = frozenset(branches)
+        cls.valid_services = frozenset(config['service_types'])
+        
+        cls._ranges = tuple(
+            cls.LIMITS[field] for field in
+            ('hour', 'day_of_week', 'service_duration', 'current_queue_length')
+        )
+        (hour_min, hour_max), (day_min, day_max), \
+            (duration_min, duration_max), (queue_min, queue_max) = cls._ranges
+        cls._messages = {
+            'hour': f"Hour must be between {hour_min} and {hour_max} (banking hours)",
+            'day_of_week': f"Day of week must be between {day_min} (Monday) and {day_max} (Sunday)",
+            'service_duration': f"Service duration must be between {duration_min} and {duration_max} minutes",
+            'current_queue_length': f"Queue length must be between {queue_min} and {queue_max}",
+            'branch': (
+                f"Invalid branch. Must be one of: {', '.join(branches)}" if len(branches) <= 10
+                else "Invalid branch. See /api/branches for the registered branches"
+            ),
+            'service_type': f"Invalid service type. Must be one of: {', '.join(config['service_types'])}"
+        }
+    
+    @classmethod
+    def validate_prediction_request(cls, data):
+        """Validate prediction request data"""
         # Check required fields
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
+        if not cls.REQUIRED_FIELD_SET.issubset(data):
+            missing_fields = [field for field in cls.REQUIRED_FIELDS if field not in data]
             return False, f"Missing required fields: {', '.join(missing_fields)}"
         
+        messages = cls._messages
+        (hour_min, hour_max), (day_min, day_max), \
+            (duration_min, duration_max), (queue_min, queue_max) = cls._ranges
+        
         # Validate data types and ranges
         try:
-            hour = int(data['hour'])
-            if not (8 <= hour <= 16):
-                return False, "Hour must be between 8 and 16 (banking hours)"
+            if not (hour_min <= int(data['hour']) <= hour_max):
+                return False, messages['hour']
             
-            day_of_week = int(data['day_of_week'])
-            if not (0 <= day_of_week <= 6):
-                return False, "Day of week must be between 0 (Monday) and 6 (Sunday)"
+            if not (day_min <= int(data['day_of_week']) <= day_max):
+                return False, messages['day_of_week']
             
-            service_duration = float(data['service_duration'])
-            if not (1 <= service_duration <= 120):
-                return False, "Service duration must be between 1 and 120 minutes"
+            if not (duration_min <= float(data['service_duration']) <= duration_max):
+                return False, messages['service_duration']
             
-            queue_length = int(data['current_queue_length'])
-            if not (0 <= queue_length <= 100):
-                return False, "Queue length must be between 0 and 100"
+            if not (queue_min <= int(data['current_queue_length']) <= queue_max):
+                return False, messages['current_queue_length']
             
             # Validate branch and service type
-            valid_branches = ["Victoria Island", "Ikeja", "Surulere", "Abuja", "Port Harcourt"]
-            if data['branch'] not in valid_branches:
-                return False, f"Invalid branch. Must be one of: {', '.join(valid_branches)}"
+            if data['branch'] not in cls.valid_branches:
+                return False, messages['branch']
             
-            valid_services = ["Account Opening", "Cash Withdrawal", "Transfer", "Loan Application", "General Inquiry"]
-            if data['service_type'] not in valid_services:
-                return False, f"Invalid service type. Must be one of: {', '.join(valid_services)}"
+            if data['service_type'] not in cls.valid_services:
+                return False, messages['service_type']
             
         except (ValueError, TypeError) as e:
             return False, f"Invalid data type: {str(e)}"
         
         return True, "Valid"
+    
+    @classmethod
+    def validate_simulation_request(cls, data):
+        """Validate what-if simulation request data"""
+        missing_fields = [field for field in ('branch', 'day_of_week', 'tellers') if field not in data]
+        if missing_fields:
+            return False, f"Missing required fields: {', '.join(missing_fields)}"
+        
+        if data['branch'] not in cls.valid_branches:
+            return False, cls._messages['branch']
+        
+        n_hours = len(cls.opening_hours)
+        try:
+            day_min, day_max = cls.LIMITS['day_of_week']
+            if not (day_min <= int(data['day_of_week']) <= day_max):
+                return False, cls._messages['day_of_week']
+            
+            for field in ('tellers', 'baseline_tellers'):
+                if field not in data:
+                    continue
+                schedule = data[field]
+                if isinstance(schedule, list):
+                    if len(schedule) != n_hours:
+                        return False, f"{field} must be a number or a list of {n_hours} hourly counts"
+                else:
+                    schedule = [schedule]
+                counts = [int(t) for t in schedule]
+                if min(counts) < 0 or max(counts) > cls.MAX_TELLERS:
+                    return False, f"{field} must be between 0 and {cls.MAX_TELLERS} per hour"
+                if max(counts) == 0:
+                    return False, f"{field} must have at least one teller on duty"
+            
+            profile = data.get('arrival_profile', 'history')
+            if isinstance(profile, list):
+                rates = np.array([float(r) for r in profile])
+                if (len(rates) != n_hours or not np.isfinite(rates).all()
+                        or rates.min() < 0 or rates.max() > cls.MAX_ARRIVAL_RATE):
+                    return False, (f"arrival_profile must be 'history', 'generator' or {n_hours} hourly rates "
+                                   f"between 0 and {cls.MAX_ARRIVAL_RATE:.0f}")
+            elif profile not in ('history', 'generator'):
+                return False, f"arrival_profile must be 'history', 'generator' or {n_hours} non-negative hourly rates"
+            
+            if not (1 <= int(data.get('replications', 100)) <= cls.MAX_REPLICATIONS):
+                return False, f"replications must be between 1 and {cls.MAX_REPLICATIONS}"
+            
+            # Passed to np.random.default_rng as is, so only a plain non-negative integer will do
+            seed = data.get('seed')
+            if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+                return False, "seed must be a non-negative integer"
+        
+        except (ValueError, TypeError) as e:
+            return False, f"Invalid data type: {str(e)}"
+        
+        return True, "Valid"
+
+    @classmethod
+    def validate_observations(cls, observations):
+        """Validate a batch of observed waits (or bare arrivals, without a wait)
+        
+        An observed wait may carry the prediction_id /api/predict returned
+        for that customer, to score the prediction against it.
+        """
+        if not isinstance(observations, list) or not observations:
+            return False, "observations must be a non-empty list"
+        if len(observations) > cls.MAX_OBSERVATIONS:
+            return False, f"At most {cls.MAX_OBSERVATIONS} observations per request"
+        
+        for i, observation in enumerate(observations):
+            if not isinstance(observation, dict):
+                return False, f"Observation {i} must be an object"
+            if 'branch' not in observation:
+                return False, f"Observation {i} is missing: branch"
+            if observation['branch'] not in cls.valid_branches:
+                return False, f"Observation {i}: {cls._messages['branch']}"
+            try:
+                if 'wait_time_minutes' in observation and not (
+                        0 <= float(observation['wait_time_minutes']) <= cls.MAX_OBSERVED_WAIT):
+                    return False, f"Observation {i}: wait_time_minutes must be between 0 and {cls.MAX_OBSERVED_WAIT}"
+                if 'arrival_time' in observation:
+                    datetime.fromisoformat(observation['arrival_time'])
+                if 'prediction_id' in observation and not (
+                        isinstance(observation['prediction_id'], str) and 'wait_time_minutes' in observation):
+                    return False, f"Observation {i}: prediction_id must be a string sent with wait_time_minutes"
+            except (ValueError, TypeError) as e:
+                return False, f"Observation {i}: invalid data type: {str(e)}"
+        
+        return True, "Valid"
+    
+    @classmethod
+    def validate_events(cls, events):
+        """Validate a batch of queue events for the event log"""
+        if not isinstance(events, list) or not events:
+            return False, "events must be a non-empty list"
+        if len(events) > cls.MAX_OBSERVATIONS:
+            return False, f"At most {cls.MAX_OBSERVATIONS} events per request"
+        
+        for i, event in enumerate(events):
+            if not isinstance(event, dict):
+                return False, f"Event {i} must be an object"
+            missing = [field for field in ('branch', 'kind') if field not in event]
+            if missing:
+                return False, f"Event {i} is missing: {', '.join(missing)}"
+            if event['branch'] not in cls.valid_branches:
+                return False, f"Event {i}: {cls._messages['branch']}"
+            if event['kind'] not in EVENT_KINDS:
+                return False, f"Event {i}: kind must be one of: {', '.join(EVENT_KINDS)}"
+            if 'service_type' in event and event['service_type'] not in cls.valid_services:
+                return False, f"Event {i}: {cls._messages['service_type']}"
+            customer_id = event.get('customer_id')
+            if customer_id is None and event['kind'] != 'arrival':
+                return False, f"Event {i}: customer_id is required for {event['kind']} events"
+            if customer_id is not None and (
+                    isinstance(customer_id, bool) or not isinstance(customer_id, (str, int))
+                    or isinstance(customer_id, int) and not 0 <= customer_id <= MAX_CUSTOMER):
+                return False, f"Event {i}: customer_id must be a string or an integer between 0 and {MAX_CUSTOMER}"
+            try:
+                if 'value' in event and not 0 <= float(event['value']) <= cls.MAX_OBSERVED_WAIT:
+                    return False, f"Event {i}: value must be between 0 and {cls.MAX_OBSERVED_WAIT} minutes"
+                if 'teller' in event and not 0 <= int(event['teller']) < NO_TELLER:
+                    return False, f"Event {i}: teller must be between 0 and {NO_TELLER - 1}"
+                if 'time' in event:
+                    datetime.fromisoformat(event['time'])
+            except (ValueError, TypeError) as e:
+                return False, f"Event {i}: invalid data type: {str(e)}"
+        
+        return True, "Valid"
+
+RequestValidator.compile(load_config())
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that reuses one compact encoder instead of building one per response"""
+    
+    sort_keys = False
+    
+    def __init__(self, app):
+        super().__init__(app)
+        self._encoder = json.JSONEncoder(
+            default=self.default, ensure_ascii=self.ensure_ascii,
+            sort_keys=self.sort_keys, separators=(",", ":")
+        )
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encoder.encode(obj)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self._encoder.encode(obj) + "\n", mimetype=self.mimetype
+        )
 
-def calculate_confidence_level(wait_time, queue_length):
-    """Calculate confidence level for prediction"""
+def calculate_confidence_level(wait_time, queue_length, interval=None):
+    """Calculate confidence level for prediction
+    
+    With an interval (lower, upper) from the model the level follows its
+    width; otherwise it falls back to the queue-length heuristic.
+    """
+    if interval is not None and interval[0] is not None:
+        width = interval[1] - interval[0]
+        if width <= CONFIDENCE_WIDTHS['High']:
+            return "High"
+        elif width <= CONFIDENCE_WIDTHS['Medium']:
+            return "Medium"
+        return "Low"
+    
     # Simple confidence calculation based on queue length and wait time
     if queue_length == 0:
         return "High"
@@ -145,8 +800,15 @@ def calculate_confidence_level(wait_time, queue_length):
     else:
         return "Low"
 
-def calculate_estimated_service_time(wait_time_minutes):
+def calculate_estimated_service_time(wait_time_minutes, now=None):
     """Calculate estimated service completion time"""
-    now = datetime.now()
-    service_time = now + timedelta(minutes=wait_time_minutes)
-    return service_time.strftime("%H:%M")
+    if now is None:
+        now = datetime.now()
+    # Clock arithmetic on seconds-of-day avoids building a timedelta and strftime
+    seconds = (now.hour * 3600 + now.minute * 60 + now.second
+               + now.microsecond / 1e6 + wait_time_minutes * 60)
+    return f"{int(seconds // 3600) % 24:02d}:{int(seconds % 3600 // 60):02d}"
+
+def estimate_queue_wait(branch, hour, day_of_week, current_queue_length):
+    """Cheap analytic wait estimate: the M/G/c wait behind the customers ahead at the branch's tellers"""
+    return get_queueing_estimator().estimate(branch, hour, day_of_week, current_queue_length)
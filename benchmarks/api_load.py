@@ -0,0 +1,307 @@
+"""Load test and latency benchmark for the QueueSmart API
+
+Starts the API locally (or targets a running server with --url), drives
+the prediction endpoints at one or more concurrency levels with a request
+mix drawn from the branch/service distributions, and writes throughput,
+latency percentiles and error rates as JSON. Each run is compared with a
+stored baseline so regressions show up as a non-zero exit code.
+
+Usage:
+    python -m benchmarks.api_load --concurrency 1,8,32 --requests 2000
+    python -m benchmarks.api_load --save-baseline
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import requests
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, latency_summary, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+
+sys.path.insert(0, PROJECT_ROOT)
+from data.data_generator import HOUR_WEIGHTS, DAY_MULTIPLIER, SERVICE_TYPES
+
+BENCHMARK_NAME = 'api_load'
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+
+# Endpoints the harness knows how to drive. Endpoints that the target
+# server does not expose (404) are skipped.
+ENDPOINTS = {
+    'predict': {'method': 'POST', 'path': '/api/predict'}
+}
+
+# Which direction is better for each compared metric
+COMPARISON_RULES = {
+    'throughput_rps': 'higher',
+    'p50_ms': 'lower',
+    'p95_ms': 'lower',
+    'p99_ms': 'lower',
+    'error_rate': 'lower'
+}
+
+def build_request_mix(source='history', size=1000, seed=42):
+    """Build a pool of prediction payloads representative of real traffic"""
+    rng = np.random.default_rng(seed)
+
+    if source == 'history' and os.path.exists(HISTORY_PATH):
+        history = pd.read_csv(HISTORY_PATH)
+        sample = history.sample(n=size, replace=True, random_state=seed)
+        return [
+            {
+                'branch': row.branch,
+                'service_type': row.service_type,
+                'hour': int(row.hour),
+                'day_of_week': int(row.day_of_week),
+                'service_duration': float(row.service_duration_minutes),
+                'current_queue_length': int(min(row.queue_length_on_arrival, 100))
+            }
+            for row in sample.itertuples(index=False)
+        ]
+
+    # Fall back to the synthetic data generator's distributions
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+
+    services = list(SERVICE_TYPES.keys())
+    service_p = np.array([SERVICE_TYPES[s]['weight'] for s in services])
+    days = config['working_days']
+    day_p = np.array([DAY_MULTIPLIER[d] for d in days])
+    day_p = day_p / day_p.sum()
+
+    payloads = []
+    for _ in range(size):
+        service = services[rng.choice(len(services), p=service_p / service_p.sum())]
+        limits = SERVICE_TYPES[service]
+        payloads.append({
+            'branch': config['bank_branches'][rng.integers(len(config['bank_branches']))],
+            'service_type': service,
+            'hour': int(rng.choice(range(8, 16), p=HOUR_WEIGHTS)),
+            'day_of_week': int(rng.choice(days, p=day_p)),
+            'service_duration': int(rng.integers(limits['min'], limits['max'] + 1)),
+            'current_queue_length': int(rng.integers(0, 11))
+        })
+    return payloads
+
+def start_server(port, server='flask', workers=2):
+    """Start the API in a subprocess and return the process handle"""
+    if server == 'gunicorn':
+        cmd = [
+            sys.executable, '-m', 'gunicorn', '-w', str(workers),
+            '-b', f'127.0.0.1:{port}', 'api.app:app'
+        ]
+    else:
+        cmd = [
+            sys.executable, '-c',
+            'from api.app import app; '
+            f'app.run(host="127.0.0.1", port={port}, threaded=True)'
+        ]
+
+    log_path = os.path.join(PROJECT_ROOT, 'benchmarks', 'results', 'server.log')
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    log_file = open(log_path, 'w')
+    return subprocess.Popen(cmd, cwd=PROJECT_ROOT, stdout=log_file, stderr=subprocess.STDOUT)
+
+def wait_until_ready(base_url, timeout=60):
+    """Poll the readiness probe until the model is loaded and warmed up"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            response = requests.get(f"{base_url}/api/ready", timeout=2)
+            if response.ok and response.json().get('ready'):
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def endpoint_available(base_url, endpoint):
+    """Check whether the server exposes an endpoint"""
+    try:
+        response = requests.request('OPTIONS', f"{base_url}{endpoint['path']}", timeout=5)
+    except requests.exceptions.RequestException:
+        return False
+    return response.status_code != 404
+
+def run_load(base_url, endpoint, payloads, concurrency, total_requests=None,
+             duration=None, timeout=10):
+    """Drive one endpoint at a fixed concurrency and collect latencies"""
+    url = f"{base_url}{endpoint['path']}"
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration if duration else None
+    per_thread = []
+
+    def worker():
+        session = requests.Session()
+        latencies = []
+        statuses = Counter()
+        while True:
+            i = next(counter)
+            if total_requests is not None and i >= total_requests:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            payload = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            try:
+                response = session.request(endpoint['method'], url, json=payload, timeout=timeout)
+                statuses[str(response.status_code)] += 1
+            except requests.exceptions.RequestException as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        per_thread.append((latencies, statuses))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [value for thread_latencies, _ in per_thread for value in thread_latencies]
+    statuses = Counter()
+    for _, thread_statuses in per_thread:
+        statuses.update(thread_statuses)
+
+    completed = len(latencies)
+    errors = sum(count for status, count in statuses.items()
+                 if not (status.isdigit() and int(status) < 400))
+    latency = latency_summary(latencies)
+
+    return {
+        'endpoint': endpoint['path'],
+        'concurrency': concurrency,
+        'requests': completed,
+        'errors': errors,
+        'error_rate': round(errors / completed, 4) if completed else None,
+        'status_counts': dict(statuses),
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(completed / elapsed, 2) if elapsed > 0 else None,
+        'p50_ms': latency['p50'],
+        'p95_ms': latency['p95'],
+        'p99_ms': latency['p99'],
+        'latency_ms': latency
+    }
+
+def compare_with_baseline(results, baseline, threshold_pct):
+    """Compare every run with the matching baseline run"""
+    regressed = False
+    comparisons = {}
+    for key, run in results['runs'].items():
+        if key not in baseline.get('runs', {}):
+            print(f"\n{key}: no baseline run to compare with")
+            continue
+        comparison = compare_metrics(run, baseline['runs'][key], COMPARISON_RULES, threshold_pct)
+        comparisons[key] = comparison
+        regressed = print_comparison(f"{key} vs baseline:", comparison) or regressed
+    return comparisons, regressed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="QueueSmart API load benchmark")
+    parser.add_argument('--url', help="Target a running server instead of starting one")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--server', choices=['flask', 'gunicorn'], default='flask')
+    parser.add_argument('--workers', type=int, default=2, help="Gunicorn worker count")
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--concurrency', default='1,8,32',
+                        help="Comma separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=1000, help="Requests per run")
+    parser.add_argument('--duration', type=float, help="Seconds per run (overrides --requests)")
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--mix', choices=['history', 'generator'], default='history')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/)")
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Allowed regression in percent")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("QueueSmart API Load Benchmark")
+    print("=" * 50)
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        print(f"Starting {args.server} server on port {args.port}...")
+        process = start_server(args.port, args.server, args.workers)
+
+    try:
+        if not wait_until_ready(base_url):
+            print("ERROR: API did not become ready (see benchmarks/results/server.log)")
+            return 2
+
+        payloads = build_request_mix(args.mix, seed=args.seed)
+        concurrency_levels = [int(c) for c in args.concurrency.split(',')]
+        results = {
+            'benchmark': BENCHMARK_NAME,
+            'meta': run_metadata(),
+            'config': {
+                'server': 'external' if args.url else args.server,
+                'workers': args.workers,
+                'requests': args.requests,
+                'duration': args.duration,
+                'mix': args.mix,
+                'seed': args.seed
+            },
+            'runs': {}
+        }
+
+        for name in args.endpoints.split(','):
+            endpoint = ENDPOINTS[name]
+            if not endpoint_available(base_url, endpoint):
+                print(f"Skipping {name}: {endpoint['path']} not available")
+                continue
+
+            run_load(base_url, endpoint, payloads, 1, total_requests=args.warmup)
+
+            for concurrency in concurrency_levels:
+                run = run_load(
+                    base_url, endpoint, payloads, concurrency,
+                    total_requests=None if args.duration else args.requests,
+                    duration=args.duration
+                )
+                results['runs'][f"{name}@c{concurrency}"] = run
+                print(f"{name} @ concurrency {concurrency}: "
+                      f"{run['throughput_rps']} req/s, "
+                      f"p50 {run['p50_ms']} ms, p95 {run['p95_ms']} ms, "
+                      f"p99 {run['p99_ms']} ms, errors {run['error_rate']:.2%}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    output_path = save_results(results, BENCHMARK_NAME, args.output)
+    print(f"\nResults saved to {output_path}")
+
+    if args.save_baseline:
+        save_results(results, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to store one")
+        return 0
+
+    _, regressed = compare_with_baseline(results, load_results(args.baseline), args.threshold)
+    return 1 if regressed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
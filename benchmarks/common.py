@@ -0,0 +1,109 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, 'baselines')
+
+def run_metadata():
+    """Describe the machine and code version a benchmark ran on"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def latency_summary(latencies_ms):
+    """Summarize a list of latencies in milliseconds"""
+    if len(latencies_ms) == 0:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+
+    values = np.asarray(latencies_ms, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values.max()), 3)
+    }
+
+def save_results(results, name, output_path=None):
+    """Write benchmark results as JSON and return the file path"""
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_path = os.path.join(RESULTS_DIR, f'{name}_{stamp}.json')
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    return output_path
+
+def load_results(path):
+    """Load benchmark results written by save_results"""
+    with open(path) as f:
+        return json.load(f)
+
+def default_baseline_path(name):
+    """Location of the stored baseline for a benchmark"""
+    return os.path.join(BASELINES_DIR, f'{name}.json')
+
+def compare_metrics(current, baseline, rules, threshold_pct=10.0):
+    """Compare flat metric dicts and flag regressions beyond a threshold
+
+    ``rules`` maps each metric name to 'lower' or 'higher', meaning which
+    direction is better. Metrics missing from either side are skipped.
+    """
+    comparisons = []
+
+    for metric, better in rules.items():
+        new_value = current.get(metric)
+        old_value = baseline.get(metric)
+        if new_value is None or old_value is None:
+            continue
+
+        if old_value == 0:
+            change_pct = 0.0 if new_value == 0 else float('inf')
+        else:
+            change_pct = (new_value - old_value) / abs(old_value) * 100
+
+        worse_pct = change_pct if better == 'lower' else -change_pct
+        comparisons.append({
+            'metric': metric,
+            'baseline': old_value,
+            'current': new_value,
+            'change_pct': round(change_pct, 2) if np.isfinite(change_pct) else None,
+            'regression': bool(worse_pct > threshold_pct)
+        })
+
+    return comparisons
+
+def print_comparison(title, comparisons):
+    """Print a comparison table and return True if anything regressed"""
+    print(f"\n{title}")
+    regressed = False
+    for item in comparisons:
+        flag = "REGRESSION" if item['regression'] else "ok"
+        change = "n/a" if item['change_pct'] is None else f"{item['change_pct']:+.1f}%"
+        print(f"  {item['metric']:<24} {item['baseline']:>12} -> {item['current']:>12}  {change:>8}  {flag}")
+        regressed = regressed or item['regression']
+    return regressed
@@ -0,0 +1,125 @@
+"""Benchmark of event log appends and replay
+
+Writes ``--events`` synthetic events for every configured branch into a
+temporary event log and measures:
+
+- single appends: EventLog.append per event, the path /api/events takes
+- batch appends: EventLog.append_many with one write per segment
+- replay: counting event kinds straight off every segment's memory map
+  (no copy), and rebuilding a time-ordered frame with EventLog.replay
+
+Usage:
+    python -m benchmarks.event_log
+    python -m benchmarks.event_log --events 1000000 --save-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+
+sys.path.insert(0, PROJECT_ROOT)
+from event_log import EventLog, RECORD, SERVICE_NAMES, EVENT_KINDS
+
+BENCHMARK_NAME = 'event_log'
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+SINGLE_APPENDS = 50_000
+
+def synthetic_events(n, branches, seed=42):
+    """n events over one working day, spread across branches, in time order"""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=RECORD)
+    start_ms = int(np.datetime64('2024-01-01T08:00', 'ms').astype(np.int64))
+    records['time_ms'] = np.sort(start_ms + rng.integers(0, 8 * 3600 * 1000, n))
+    records['customer'] = rng.integers(0, n // 3 + 1, n)
+    records['kind'] = rng.integers(0, len(EVENT_KINDS), n)
+    records['service'] = rng.integers(0, len(SERVICE_NAMES), n)
+    records['value'] = rng.uniform(0, 60, n)
+    return np.array(branches)[rng.integers(0, len(branches), n)], records
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds > 0 else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Event log append and replay throughput")
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with open(CONFIG_PATH) as f:
+        branches = json.load(f)['bank_branches']
+    event_branches, records = synthetic_events(args.events, branches, args.seed)
+    singles = min(args.events, SINGLE_APPENDS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog(os.path.join(tmp, 'single'))
+        started = time.perf_counter()
+        for branch, record in zip(event_branches[:singles], records[:singles].tolist()):
+            log.append(branch, record[3], customer=record[1], value=record[2])
+        single_s = time.perf_counter() - started
+        log.close()
+
+        log = EventLog(os.path.join(tmp, 'batch'))
+        started = time.perf_counter()
+        log.append_many(event_branches, records)
+        batch_s = time.perf_counter() - started
+        log.close()
+
+        started = time.perf_counter()
+        mapped = sum(int(np.bincount(r['kind']).sum()) for _, _, r in log.read())
+        map_s = time.perf_counter() - started
+        started = time.perf_counter()
+        events = log.replay()
+        replay_s = time.perf_counter() - started
+        size_mb = sum(os.path.getsize(p) for _, _, p in log.segments()) / 1e6
+
+    results = {
+        'events': args.events,
+        'single_appends': singles,
+        'single_appends_per_s': rate(singles, single_s),
+        'batch_appends_per_s': rate(args.events, batch_s),
+        'mapped_events_per_s': rate(mapped, map_s),
+        'replay_events_per_s': rate(len(events), replay_s),
+        'bytes_per_event': RECORD.itemsize,
+        'log_mb': round(size_mb, 2)
+    }
+    print(f"Event log with {args.events:,} events ({size_mb:.1f} MB, {RECORD.itemsize} bytes per event)")
+    print("=" * 50)
+    print(f"  Single appends: {results['single_appends_per_s']:>14,.0f} events/s ({singles:,} events)")
+    print(f"  Batch appends:  {results['batch_appends_per_s']:>14,.0f} events/s")
+    print(f"  Memory-mapped:  {results['mapped_events_per_s']:>14,.0f} events/s")
+    print(f"  Replay frame:   {results['replay_events_per_s']:>14,.0f} events/s")
+
+    output = {'benchmark': BENCHMARK_NAME, 'meta': run_metadata(), 'results': results}
+    output_path = save_results(output, BENCHMARK_NAME, args.output)
+    print(f"\nResults saved to {output_path}")
+
+    if args.save_baseline:
+        save_results(output, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        comparison = compare_metrics(
+            results, load_results(args.baseline)['results'],
+            {'single_appends_per_s': 'higher', 'batch_appends_per_s': 'higher', 'replay_events_per_s': 'higher'},
+            args.threshold
+        )
+        if print_comparison("Compared with baseline:", comparison):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
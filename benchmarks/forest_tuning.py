@@ -0,0 +1,104 @@
+"""Benchmark of Random Forest tuning: grid search against warm-started growth
+
+Runs the reference GridSearchCV tuner (kept here as it was before) and
+tune_random_forest in both scoring modes on the processed history, and
+reports wall time, the parameters each one picked and the test-set error
+of the refitted model.
+
+Usage:
+    python -m benchmarks.forest_tuning
+    python -m benchmarks.forest_tuning --save-baseline
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import GridSearchCV
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+
+sys.path.insert(0, PROJECT_ROOT)
+from models.ml_predictor import prepare_ml_data, split_data, tune_random_forest, model_params
+
+BENCHMARK_NAME = 'forest_tuning'
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+
+def legacy_tune(X_train, y_train):
+    """Reference copy of the tuner before warm starting: one fit per grid point and fold"""
+    params = model_params('random_forest_tuned')
+    grid_search = GridSearchCV(
+        RandomForestRegressor(random_state=params['random_state']), params['param_grid'],
+        cv=params['cv'], scoring='neg_mean_squared_error', n_jobs=-1
+    )
+    grid_search.fit(X_train, y_train)
+    return grid_search.best_estimator_
+
+def chosen_params(model):
+    return {k: model.get_params()[k] for k in model_params('random_forest_tuned')['param_grid']}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random Forest tuning benchmark")
+    parser.add_argument('--data', default=HISTORY_PATH)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    X, y, _, _ = prepare_ml_data(pd.read_csv(args.data))
+    X_train, X_test, y_train, y_test = split_data(X, y)
+
+    tuners = {
+        'grid_search': lambda: legacy_tune(X_train, y_train),
+        'warm_start_cv': lambda: tune_random_forest(X_train, y_train, {'scoring': 'cv'}),
+        'warm_start_oob': lambda: tune_random_forest(X_train, y_train, {'scoring': 'oob'}),
+    }
+    results = {}
+    picked = {}
+    for name, tune in tuners.items():
+        started = time.perf_counter()
+        model = tune()
+        results[f'{name}_s'] = round(time.perf_counter() - started, 2)
+        results[f'{name}_test_rmse'] = round(mean_squared_error(y_test, model.predict(X_test)) ** 0.5, 3)
+        picked[name] = chosen_params(model)
+
+    for name in ('warm_start_cv', 'warm_start_oob'):
+        results[f'{name}_speedup'] = round(results['grid_search_s'] / results[f'{name}_s'], 2)
+        results[f'{name}_same_params'] = picked[name] == picked['grid_search']
+
+    print("\nRandom Forest tuning")
+    print("=" * 50)
+    for name in tuners:
+        line = f"  {name}: {results[f'{name}_s']:.1f}s, test RMSE {results[f'{name}_test_rmse']:.2f}"
+        if name != 'grid_search':
+            line += f" ({results[f'{name}_speedup']}x, same params: {results[f'{name}_same_params']})"
+        print(line)
+        print(f"    {picked[name]}")
+
+    output = {'benchmark': BENCHMARK_NAME, 'meta': run_metadata(), 'results': results, 'params': picked}
+    output_path = save_results(output, BENCHMARK_NAME, args.output)
+    print(f"\nResults saved to {output_path}")
+
+    if args.save_baseline:
+        save_results(output, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        comparison = compare_metrics(
+            results, load_results(args.baseline)['results'],
+            {'warm_start_cv_s': 'lower', 'warm_start_oob_s': 'lower'}, args.threshold
+        )
+        if print_comparison("Compared with baseline:", comparison):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
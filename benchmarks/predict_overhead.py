@@ -0,0 +1,171 @@
+"""Microbenchmark of the per-request bookkeeping on the predict path
+
+Times everything /api/predict does around the model call: validation,
+request parsing, confidence and service-time calculation, response
+construction and JSON encoding. The pre-compilation implementation is
+kept here as a reference so the before/after overhead is reported side
+by side.
+
+Usage:
+    python -m benchmarks.predict_overhead
+    python -m benchmarks.predict_overhead --save-baseline
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+
+sys.path.insert(0, PROJECT_ROOT)
+from api.models import PredictionRequest, PredictionResponse
+from api.utils import (
+    RequestValidator, FastJSONProvider, calculate_confidence_level,
+    calculate_estimated_service_time
+)
+
+BENCHMARK_NAME = 'predict_overhead'
+
+SAMPLE_REQUEST = {
+    "branch": "Victoria Island",
+    "service_type": "Transfer",
+    "hour": 10,
+    "day_of_week": 1,
+    "service_duration": 5,
+    "current_queue_length": 3
+}
+SAMPLE_WAIT_TIME = 12.345
+
+def legacy_validate(data):
+    """Reference copy of the validator before the lookup tables were compiled"""
+    required_fields = [
+        'branch', 'service_type', 'hour', 'day_of_week',
+        'service_duration', 'current_queue_length'
+    ]
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        return False, f"Missing required fields: {', '.join(missing_fields)}"
+    try:
+        if not (8 <= int(data['hour']) <= 16):
+            return False, "Hour must be between 8 and 16 (banking hours)"
+        if not (0 <= int(data['day_of_week']) <= 6):
+            return False, "Day of week must be between 0 (Monday) and 6 (Sunday)"
+        if not (1 <= float(data['service_duration']) <= 120):
+            return False, "Service duration must be between 1 and 120 minutes"
+        if not (0 <= int(data['current_queue_length']) <= 100):
+            return False, "Queue length must be between 0 and 100"
+        valid_branches = ["Victoria Island", "Ikeja", "Surulere", "Abuja", "Port Harcourt"]
+        if data['branch'] not in valid_branches:
+            return False, f"Invalid branch. Must be one of: {', '.join(valid_branches)}"
+        valid_services = ["Account Opening", "Cash Withdrawal", "Transfer", "Loan Application", "General Inquiry"]
+        if data['service_type'] not in valid_services:
+            return False, f"Invalid service type. Must be one of: {', '.join(valid_services)}"
+    except (ValueError, TypeError) as e:
+        return False, f"Invalid data type: {str(e)}"
+    return True, "Valid"
+
+LEGACY_JSON = DefaultJSONProvider(Flask(__name__))
+
+def legacy_path():
+    """Bookkeeping as done before: list scans, keyword parsing, strftime, json.dumps"""
+    data = SAMPLE_REQUEST
+    legacy_validate(data)
+    request_fields = {
+        key: data.get(key) for key in (
+            'branch', 'service_type', 'hour', 'day_of_week',
+            'service_duration', 'current_queue_length'
+        )
+    }
+    confidence = calculate_confidence_level(SAMPLE_WAIT_TIME, request_fields['current_queue_length'])
+    estimated = (datetime.now() + timedelta(minutes=SAMPLE_WAIT_TIME)).strftime("%H:%M")
+    body = {
+        'wait_time_minutes': round(SAMPLE_WAIT_TIME, 1),
+        'confidence_level': confidence,
+        'branch': request_fields['branch'],
+        'queue_position': request_fields['current_queue_length'] + 1,
+        'estimated_service_time': estimated,
+        'timestamp': datetime.now().isoformat(),
+        'status': 'success'
+    }
+    return LEGACY_JSON.dumps(body, separators=(",", ":")) + "\n"
+
+def build_current_path():
+    """Bookkeeping as done by the current predict handler"""
+    provider = FastJSONProvider(Flask(__name__))
+
+    def current_path():
+        data = SAMPLE_REQUEST
+        RequestValidator.validate_prediction_request(data)
+        pred_request = PredictionRequest.from_dict(data)
+        now = datetime.now()
+        response = PredictionResponse(
+            wait_time_minutes=SAMPLE_WAIT_TIME,
+            confidence_level=calculate_confidence_level(SAMPLE_WAIT_TIME, pred_request.current_queue_length),
+            branch=pred_request.branch,
+            queue_position=pred_request.current_queue_length + 1,
+            estimated_service_time=calculate_estimated_service_time(SAMPLE_WAIT_TIME, now),
+            timestamp=now.isoformat()
+        )
+        return provider.dumps(response.to_dict()) + "\n"
+
+    return current_path
+
+def time_per_call(func, number, repeat):
+    """Best-of-repeat time per call in microseconds"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict path bookkeeping microbenchmark")
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    current_path = build_current_path()
+    timings = {
+        'legacy_us': time_per_call(legacy_path, args.number, args.repeat),
+        'current_us': time_per_call(current_path, args.number, args.repeat),
+        'validate_legacy_us': time_per_call(lambda: legacy_validate(SAMPLE_REQUEST), args.number, args.repeat),
+        'validate_current_us': time_per_call(
+            lambda: RequestValidator.validate_prediction_request(SAMPLE_REQUEST), args.number, args.repeat
+        )
+    }
+    timings = {key: round(value, 3) for key, value in timings.items()}
+    timings['speedup'] = round(timings['legacy_us'] / timings['current_us'], 2)
+
+    print("Predict path bookkeeping (per request)")
+    print("=" * 50)
+    print(f"  Before: {timings['legacy_us']:.2f} us")
+    print(f"  After:  {timings['current_us']:.2f} us  ({timings['speedup']}x)")
+    print(f"  Validation: {timings['validate_legacy_us']:.2f} us -> {timings['validate_current_us']:.2f} us")
+
+    results = {'benchmark': BENCHMARK_NAME, 'meta': run_metadata(), 'results': timings}
+    output_path = save_results(results, BENCHMARK_NAME, args.output)
+    print(f"\nResults saved to {output_path}")
+
+    if args.save_baseline:
+        save_results(results, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        comparison = compare_metrics(
+            timings, load_results(args.baseline)['results'],
+            {'current_us': 'lower', 'validate_current_us': 'lower'}, args.threshold
+        )
+        if print_comparison("Compared with baseline:", comparison):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Scaling benchmark for the data processing and model hot paths
+
+Generates seeded synthetic raw data at each size (default 10k, 100k and
+1M rows, drawn from the data generator's hour, weekday and service
+distributions) and runs clean_data, create_time_features,
+calculate_queue_metrics, prepare_ml_data, model training and single and
+batch prediction on it. Each stage reports throughput (rows per second,
+or calls per second for single predictions) and peak traced memory; the
+results are saved as JSON with a plot of the scaling curves, and
+compared with a stored baseline so regressions exit non-zero.
+
+Stages have row limits (see STAGE_LIMITS) so the default run finishes
+on a laptop; sizes above a stage's limit are recorded as skipped. Stages
+after calculate_queue_metrics take their input from the largest processed
+frame that was computed, resampled to the target size; when no size was
+under its limit, a RESAMPLE_POOL_ROWS frame is processed (untimed) to
+resample from. --no-limits lifts the limits.
+
+Usage:
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --sizes 10000,100000 --save-baseline
+    python -m benchmarks.scaling --no-memory --sizes 1000000
+    python -m benchmarks.scaling --no-memory --sizes 10000000   # needs far more than 5 GB RAM
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+
+sys.path.insert(0, PROJECT_ROOT)
+from data.data_generator import HOUR_WEIGHTS, DAY_MULTIPLIER, SERVICE_TYPES, BASE_CUSTOMERS
+from data_processor import clean_data, create_time_features, calculate_queue_metrics
+from models.ml_predictor import (
+    prepare_ml_data, train_random_forest, train_hist_gradient_boosting,
+    predict_wait_time, predict_wait_times
+)
+
+BENCHMARK_NAME = 'scaling'
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Largest input each stage runs on by default; None means no limit
+STAGE_LIMITS = {
+    'clean_data': None,
+    'create_time_features': None,
+    'calculate_queue_metrics': 1_000_000,
+    'prepare_ml_data': None,
+    'train_random_forest': 100_000,
+    'train_hist_gradient_boosting': None,
+    'predict_single': None,
+    'predict_batch': None
+}
+SINGLE_PREDICTIONS = 200
+MAX_BATCH = 1_000_000
+# Processed rows to resample from when every size is over the calculate_queue_metrics limit
+RESAMPLE_POOL_ROWS = 100_000
+
+def synthetic_raw(rows, seed=42):
+    """Seeded raw banking rows with the generator's arrival and service distributions"""
+    with open(CONFIG_PATH) as f:
+        branches = json.load(f)['bank_branches']
+    rng = np.random.default_rng(seed)
+
+    per_branch_day = (BASE_CUSTOMERS['min'] + BASE_CUSTOMERS['max']) / 2
+    n_days = max(1, int(np.ceil(rows / (len(branches) * per_branch_day))))
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    day_weight = np.array([DAY_MULTIPLIER[d] for d in dates.dayofweek])
+
+    services = list(SERVICE_TYPES)
+    service_p = np.array([SERVICE_TYPES[s]['weight'] for s in services])
+    service_idx = rng.choice(len(services), rows, p=service_p / service_p.sum())
+    low = np.array([SERVICE_TYPES[s]['min'] for s in services])[service_idx]
+    high = np.array([SERVICE_TYPES[s]['max'] for s in services])[service_idx]
+
+    hour = 8 + rng.choice(len(HOUR_WEIGHTS), rows, p=HOUR_WEIGHTS)
+    offset = pd.to_timedelta(hour * 60 + rng.integers(0, 60, rows), unit='min')
+    day = dates[rng.choice(n_days, rows, p=day_weight / day_weight.sum())]
+
+    return pd.DataFrame({
+        'customer_id': np.char.add('CUST_', np.arange(rows).astype(str)),
+        'service_type': np.array(services)[service_idx],
+        'service_duration_minutes': rng.integers(low, high + 1),
+        'arrival_time': day + offset,
+        'branch': np.array(branches)[rng.integers(0, len(branches), rows)]
+    })
+
+def resample(df, rows, seed=42):
+    """``rows`` rows drawn from df (with replacement when growing it)"""
+    if rows == len(df):
+        return df
+    idx = np.random.default_rng(seed).integers(0, len(df), rows)
+    return df.iloc[idx].reset_index(drop=True)
+
+def run_quietly(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+def measure(func, *args, repeat=1, memory=True):
+    """Best wall time over ``repeat`` runs, then peak traced MB from one traced run"""
+    best = np.inf
+    value = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        value = run_quietly(func, *args)
+        best = min(best, time.perf_counter() - started)
+
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run_quietly(func, *args)
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        tracemalloc.stop()
+    return value, best, peak_mb
+
+def single_predictions(model_data, requests):
+    for row in requests:
+        predict_wait_time(model_data, *row)
+
+def request_frame(processed):
+    """Prediction requests in the shape predict_wait_times takes"""
+    return pd.DataFrame({
+        'branch': processed['branch'].to_numpy(),
+        'service_type': processed['service_type'].to_numpy(),
+        'hour': processed['hour'].to_numpy(),
+        'day_of_week': processed['day_of_week'].to_numpy(),
+        'service_duration': processed['service_duration_minutes'].to_numpy(),
+        'current_queue_length': processed['queue_length_on_arrival'].to_numpy()
+    })
+
+def model_data_for(model, encoders, feature_columns):
+    return {'model': model, 'encoders': encoders, 'feature_columns': feature_columns, 'scaler': None}
+
+def run_size(rows, args, processed_pool):
+    """Every stage at one size; returns {stage: result}"""
+    limits = {stage: None for stage in STAGE_LIMITS} if args.no_limits else STAGE_LIMITS
+    repeat = args.repeat if rows <= 100_000 else 1
+    results = {}
+
+    def record(stage, n, func, *stage_args, unit='rows'):
+        if limits[stage] is not None and n > limits[stage]:
+            results[stage] = {'skipped': f"over the {limits[stage]:,}-row limit"}
+            return None
+        value, seconds, peak_mb = measure(func, *stage_args, repeat=repeat, memory=not args.no_memory)
+        results[stage] = {
+            'rows': n, 'seconds': round(seconds, 4),
+            f'{unit}_per_s': round(n / seconds, 1) if seconds > 0 else None, 'peak_mb': peak_mb
+        }
+        print(f"  {stage:<30} {n:>10,} {unit:<5} {seconds:>9.3f}s  "
+              f"{results[stage][f'{unit}_per_s']:>14,.0f} {unit}/s  peak {peak_mb} MB")
+        return value
+
+    raw = synthetic_raw(rows, args.seed)
+    cleaned = record('clean_data', rows, clean_data, raw)
+    featured = record('create_time_features', rows, create_time_features, cleaned)
+    del raw, cleaned
+
+    processed = record('calculate_queue_metrics', rows, calculate_queue_metrics, featured)
+    del featured
+    if processed is not None:
+        processed_pool[:] = [processed]
+    elif not processed_pool:
+        pool = synthetic_raw(RESAMPLE_POOL_ROWS, args.seed)
+        pool = run_quietly(lambda df: calculate_queue_metrics(create_time_features(clean_data(df))), pool)
+        processed_pool.append(pool)
+    processed = resample(processed_pool[0], rows, args.seed)
+
+    X, y, encoders, feature_columns = record('prepare_ml_data', rows, prepare_ml_data, processed)
+    models = {}
+    for stage, trainer in (('train_random_forest', train_random_forest),
+                           ('train_hist_gradient_boosting', train_hist_gradient_boosting)):
+        model = record(stage, rows, trainer, X, y)
+        if model is not None:
+            models[stage] = model_data_for(model, encoders, feature_columns)
+    del X, y
+
+    # Predictions use the histogram model, the one trained at every size
+    model_data = models['train_hist_gradient_boosting']
+    batch = request_frame(processed.iloc[:min(rows, MAX_BATCH)])
+    singles = list(batch.iloc[:SINGLE_PREDICTIONS].itertuples(index=False, name=None))
+    record('predict_single', len(singles), single_predictions, model_data, singles, unit='calls')
+    record('predict_batch', len(batch), predict_wait_times, model_data, batch)
+    return results
+
+def flatten(results):
+    """{'<stage>@<rows>_<metric>': value} for compare_metrics, with the rule for each metric"""
+    metrics, rules = {}, {}
+    for rows, stages in results.items():
+        for stage, result in stages.items():
+            for metric, better in (('rows_per_s', 'higher'), ('calls_per_s', 'higher'), ('peak_mb', 'lower')):
+                if result.get(metric) is not None:
+                    key = f'{stage}@{rows}_{metric}'
+                    metrics[key] = result[metric]
+                    rules[key] = better
+    return metrics, rules
+
+def plot_scaling(results, path):
+    """Throughput and peak memory against input size, one line per stage"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    stages = list(STAGE_LIMITS)
+    fig, (ax_rate, ax_mem) = plt.subplots(1, 2, figsize=(14, 5))
+    colors = plt.get_cmap('tab10')
+    for i, stage in enumerate(stages):
+        points = [(int(rows), r[stage]) for rows, r in results.items() if 'seconds' in r.get(stage, {})]
+        if not points:
+            continue
+        sizes = [rows for rows, _ in points]
+        rates = [r.get('rows_per_s') or r.get('calls_per_s') for _, r in points]
+        ax_rate.plot(sizes, rates, marker='o', color=colors(i), label=stage)
+        memory = [(rows, r['peak_mb']) for rows, r in points if r['peak_mb'] is not None]
+        if memory:
+            ax_mem.plot(*zip(*memory), marker='o', color=colors(i), label=stage)
+
+    ax_rate.set(xscale='log', yscale='log', xlabel='Input rows', ylabel='Rows (or calls) per second',
+                title='Throughput')
+    ax_mem.set(xscale='log', yscale='log', xlabel='Input rows', ylabel='Peak traced MB', title='Peak memory')
+    ax_rate.legend(fontsize=8)
+    ax_rate.grid(True, which='both', alpha=0.3)
+    ax_mem.grid(True, which='both', alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark for data and model hot paths")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage up to 100k rows")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run for peak memory")
+    parser.add_argument('--no-limits', action='store_true', help="Run every stage at every size")
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    results = {}
+    processed_pool = []
+    for rows in sizes:
+        print(f"\n{rows:,} rows")
+        print("=" * 50)
+        results[str(rows)] = run_size(rows, args, processed_pool)
+
+    output = {
+        'benchmark': BENCHMARK_NAME, 'meta': run_metadata(),
+        'config': {'sizes': sizes, 'seed': args.seed, 'limits': None if args.no_limits else STAGE_LIMITS},
+        'results': results
+    }
+    output_path = save_results(output, BENCHMARK_NAME, args.output)
+    plot_path = plot_scaling(results, os.path.splitext(output_path)[0] + '.png')
+    print(f"\nResults saved to {output_path}")
+    print(f"Scaling plot saved to {plot_path}")
+
+    if args.save_baseline:
+        save_results(output, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        current, rules = flatten(results)
+        baseline, _ = flatten(load_results(args.baseline)['results'])
+        if print_comparison("Compared with baseline:", compare_metrics(current, baseline, rules, args.threshold)):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
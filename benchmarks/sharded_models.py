@@ -0,0 +1,180 @@
+"""Benchmark of per-branch (or per-region) shard models against one global model
+
+Generates ``--rows`` seeded synthetic rows across every configured branch
+(see benchmarks.scaling), processes them, and holds out 20% as a shared
+test set. It then fits one global forest and one forest per shard with
+the same hyperparameters, and reports:
+
+- training: the global fit time, and the shards' wall time with one
+  worker and with ``--workers`` worker processes, plus the summed
+  per-shard fit time
+- size: the saved global model and each saved shard, in bytes
+- latency: per-request predict_wait_time through the global model and
+  through ShardRouter (warm), and the first request to each shard, which
+  pays for loading it
+- accuracy: RMSE, MAE and accuracy within 5 minutes of both on the test set
+
+Usage:
+    python -m benchmarks.sharded_models
+    python -m benchmarks.sharded_models --rows 200000 --by region --workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, latency_summary, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+from benchmarks.scaling import synthetic_raw, request_frame
+
+sys.path.insert(0, PROJECT_ROOT)
+from data_processor import clean_data, create_time_features, calculate_queue_metrics
+from models.ml_predictor import prepare_ml_data, predict_wait_time, predict_wait_times, model_params
+from shard_models import SHARD_TRAINERS, GROUPINGS, ShardRouter, train_shards
+
+BENCHMARK_NAME = 'sharded_models'
+
+def processed_history(rows, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return calculate_queue_metrics(create_time_features(clean_data(synthetic_raw(rows, seed))))
+
+def accuracy(y_true, y_pred):
+    errors = np.abs(np.asarray(y_true) - y_pred)
+    return {
+        'rmse': round(float(np.sqrt(np.mean(errors ** 2))), 3),
+        'mae': round(float(errors.mean()), 3),
+        'accuracy_5min': round(float(np.mean(errors <= 5) * 100), 1)
+    }
+
+def single_latencies(requests, model_for):
+    """Milliseconds per predict_wait_time call, model lookup included"""
+    latencies = []
+    for row in requests:
+        started = time.perf_counter()
+        predict_wait_time(model_for(row[0]), *row)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shard models versus one global model")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--by', choices=GROUPINGS, default='branch')
+    parser.add_argument('--model', choices=list(SHARD_TRAINERS), default='random_forest')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--requests', type=int, default=500, help="Single predictions timed per setup")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    processed = processed_history(args.rows, args.seed)
+    test_mask = np.random.default_rng(args.seed).random(len(processed)) < 0.2
+    train_df, test_df = processed[~test_mask], processed[test_mask]
+    print(f"Shards per {args.by} vs global {args.model} on {len(processed):,} rows "
+          f"({len(test_df):,} held out)")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Global model
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            X, y, encoders, feature_columns = prepare_ml_data(train_df)
+            model = SHARD_TRAINERS[args.model](X, y, model_params(args.model))
+        global_s = time.perf_counter() - started
+        global_data = {'model': model, 'encoders': encoders, 'feature_columns': feature_columns, 'scaler': None}
+        global_path = os.path.join(tmp, 'global.joblib')
+        joblib.dump(global_data, global_path)
+
+        # Shards, serially and then in worker processes
+        shard_dir = os.path.join(tmp, 'shards')
+        manifest, serial_s = train_shards(train_df, args.by, args.model, workers=1, test_size=0, shard_dir=shard_dir)
+        parallel_s = None
+        if args.workers > 1:
+            manifest, parallel_s = train_shards(train_df, args.by, args.model, workers=args.workers,
+                                                test_size=0, shard_dir=shard_dir)
+        shards = manifest['shards']
+
+        requests = request_frame(test_df)
+        singles = list(requests.iloc[:args.requests].itertuples(index=False, name=None))
+
+        router = ShardRouter(shard_dir)
+        cold_ms = {}
+        for key, entry in shards.items():
+            started = time.perf_counter()
+            router.model_for(entry['branches'][0])
+            cold_ms[key] = round((time.perf_counter() - started) * 1000, 1)
+
+        global_latency = latency_summary(single_latencies(singles, lambda branch: global_data))
+        shard_latency = latency_summary(single_latencies(singles, router.model_for))
+
+        shard_pred = np.empty(len(requests))
+        for branch, index in requests.groupby('branch').indices.items():
+            shard_pred[index] = predict_wait_times(router.model_for(branch), requests.iloc[index])
+        global_pred = predict_wait_times(global_data, requests)
+        global_bytes = os.path.getsize(global_path)
+
+    y_test = test_df['wait_time_minutes'].to_numpy()
+    results = {
+        'rows': len(processed), 'shards': len(shards),
+        'global_train_s': round(global_s, 3),
+        'shards_train_s_serial': round(serial_s, 3),
+        'shards_train_s_parallel': round(parallel_s, 3) if parallel_s is not None else None,
+        'shards_fit_s_sum': round(sum(e['train_seconds'] for e in shards.values()), 3),
+        'global_size_bytes': global_bytes,
+        'shards_size_bytes': {key: e['size_bytes'] for key, e in shards.items()},
+        'shard_rows': {key: e['rows'] for key, e in shards.items()},
+        'shard_cold_load_ms': cold_ms,
+        'global_latency_ms': global_latency,
+        'shard_latency_ms': shard_latency,
+        'global_accuracy': accuracy(y_test, global_pred),
+        'shard_accuracy': accuracy(y_test, shard_pred)
+    }
+
+    print(f"  Training: global {results['global_train_s']:.2f}s; shards {results['shards_train_s_serial']:.2f}s "
+          f"with 1 worker" + (f", {parallel_s:.2f}s with {args.workers}" if parallel_s is not None else ""))
+    print(f"  Size: global {global_bytes / 1e6:.2f} MB; shards "
+          + ", ".join(f"{k} {b / 1e6:.2f} MB" for k, b in results['shards_size_bytes'].items()))
+    print(f"  Shard first-request load: " + ", ".join(f"{k} {ms:.0f} ms" for k, ms in cold_ms.items()))
+    for name in ('global', 'shard'):
+        latency, scores = results[f'{name}_latency_ms'], results[f'{name}_accuracy']
+        print(f"  {name.capitalize():<6} latency p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms; "
+              f"RMSE {scores['rmse']:.2f}, MAE {scores['mae']:.2f}, within 5 min {scores['accuracy_5min']:.1f}%")
+
+    output = {
+        'benchmark': BENCHMARK_NAME, 'meta': run_metadata(),
+        'config': {'rows': args.rows, 'by': args.by, 'model': args.model, 'workers': args.workers},
+        'results': results
+    }
+    output_path = save_results(output, BENCHMARK_NAME, args.output)
+    print(f"\nResults saved to {output_path}")
+
+    if args.save_baseline:
+        save_results(output, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        baseline = load_results(args.baseline)['results']
+        flat = lambda r: {
+            'shards_train_s_serial': r['shards_train_s_serial'],
+            'shard_latency_p50_ms': r['shard_latency_ms']['p50'],
+            'shard_rmse': r['shard_accuracy']['rmse']
+        }
+        comparison = compare_metrics(flat(results), flat(baseline), dict.fromkeys(flat(results), 'lower'),
+                                     args.threshold)
+        if print_comparison("Compared with baseline:", comparison):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Benchmark of in-memory versus streamed training data and of the boosting models
+
+Enlarges the processed history into a temporary CSV of ``--rows`` rows
+(resampled with small noise on the numeric columns), then measures:
+
+- loading: the in-memory path (read_csv, prepare_ml_data, split_data)
+  against stream_training_data, each for wall time and peak traced memory
+- training: Gradient Boosting, Random Forest and Histogram Gradient
+  Boosting fitted on the same streamed split, for fit time, peak traced
+  memory and test-set RMSE, MAE and accuracy within 5 minutes
+
+Usage:
+    python -m benchmarks.training_paths
+    python -m benchmarks.training_paths --rows 1000000 --sample-fraction 0.25
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import (
+    PROJECT_ROOT, run_metadata, save_results, load_results,
+    default_baseline_path, compare_metrics, print_comparison
+)
+
+sys.path.insert(0, PROJECT_ROOT)
+from models.ml_predictor import (
+    prepare_ml_data, split_data, stream_training_data, evaluate_model,
+    train_gradient_boosting, train_random_forest, train_hist_gradient_boosting
+)
+
+BENCHMARK_NAME = 'training_paths'
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+
+TRAINERS = [
+    ('gradient_boosting', train_gradient_boosting),
+    ('random_forest', train_random_forest),
+    ('hist_gradient_boosting', train_hist_gradient_boosting),
+]
+
+def enlarge_history(rows, path, seed=42):
+    """Write ``rows`` resampled history rows with jittered durations and waits"""
+    history = pd.read_csv(HISTORY_PATH)
+    rng = np.random.default_rng(seed)
+    df = history.iloc[rng.integers(0, len(history), rows)].reset_index(drop=True)
+    df['service_duration_minutes'] = (df['service_duration_minutes'] * rng.uniform(0.9, 1.1, rows)).round(2)
+    df['wait_time_minutes'] = (df['wait_time_minutes'] + rng.normal(0, 2, rows)).clip(lower=0).round(2)
+    df.to_csv(path, index=False)
+    return path
+
+def measure(func, *args, **kwargs):
+    """Run a function once; returns (value, wall seconds, peak traced MB)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = func(*args, **kwargs)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, round(seconds, 3), round(peak / 1e6, 1)
+
+def load_in_memory(path):
+    X, y, _, _ = prepare_ml_data(pd.read_csv(path))
+    return split_data(X, y)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-memory vs streamed training data and boosting models")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--sample-fraction', type=float, default=1.0)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=default_baseline_path(BENCHMARK_NAME))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = enlarge_history(args.rows, os.path.join(tmp, 'history.csv'))
+        print(f"Training paths on {args.rows:,} rows ({os.path.getsize(path) / 1e6:.1f} MB CSV)")
+        print("=" * 50)
+
+        _, memory_s, memory_mb = measure(load_in_memory, path)
+        data, stream_s, stream_mb = measure(
+            stream_training_data, path, chunksize=args.chunk_size, sample_fraction=args.sample_fraction
+        )
+
+    results = {
+        'rows': args.rows,
+        'train_rows': int(len(data['y_train'])),
+        'load_in_memory_s': memory_s, 'load_in_memory_peak_mb': memory_mb,
+        'load_streamed_s': stream_s, 'load_streamed_peak_mb': stream_mb
+    }
+    print(f"  Load in memory: {memory_s:.2f}s, peak {memory_mb:.1f} MB")
+    print(f"  Load streamed:  {stream_s:.2f}s, peak {stream_mb:.1f} MB")
+
+    for key, trainer in TRAINERS:
+        model, fit_s, fit_mb = measure(trainer, data['X_train'], data['y_train'])
+        metrics, _ = evaluate_model(model, data['X_test'], data['y_test'], key)
+        results.update({
+            f'{key}_fit_s': fit_s, f'{key}_fit_peak_mb': fit_mb,
+            f'{key}_rmse': round(metrics['rmse'], 3), f'{key}_mae': round(metrics['mae'], 3),
+            f'{key}_accuracy_5min': round(metrics['accuracy_5min'], 1)
+        })
+
+    print("\nModel fits on the streamed split")
+    print("=" * 50)
+    for key, _ in TRAINERS:
+        print(f"  {key}: {results[f'{key}_fit_s']:.2f}s, peak {results[f'{key}_fit_peak_mb']:.1f} MB, "
+              f"RMSE {results[f'{key}_rmse']:.2f}, MAE {results[f'{key}_mae']:.2f}, "
+              f"within 5 min {results[f'{key}_accuracy_5min']:.1f}%")
+
+    output = {'benchmark': BENCHMARK_NAME, 'meta': run_metadata(), 'results': results}
+    output_path = save_results(output, BENCHMARK_NAME, args.output)
+    print(f"\nResults saved to {output_path}")
+
+    if args.save_baseline:
+        save_results(output, BENCHMARK_NAME, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        comparison = compare_metrics(
+            results, load_results(args.baseline)['results'],
+            {'load_streamed_peak_mb': 'lower', 'hist_gradient_boosting_fit_s': 'lower',
+             'hist_gradient_boosting_rmse': 'lower'},
+            args.threshold
+        )
+        if print_comparison("Compared with baseline:", comparison):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import argparse
+import csv
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+REGISTRY_PATH = os.path.join(PROJECT_ROOT, 'data', 'branches.csv')
+
+DEFAULT_REGION = 'Unassigned'
+DEFAULT_TELLERS = 3
+
+class Branch:
+    """One branch and its metadata"""
+
+    __slots__ = ('name', 'region', 'tellers')
+
+    def __init__(self, name, region=DEFAULT_REGION, tellers=DEFAULT_TELLERS):
+        self.name = name
+        self.region = region or DEFAULT_REGION
+        self.tellers = int(tellers)
+
+    def to_dict(self):
+        return {'name': self.name, 'region': self.region, 'tellers': self.tellers}
+
+class BranchRegistry:
+    """All known branches, with hashed lookups by name and by region
+
+    The registry is data, not code: it is read from data/branches.csv
+    (name, region, tellers), or from the branch list in config.json when
+    no registry file exists. Adding a branch is a new row in that file.
+    """
+
+    def __init__(self, branches):
+        self.branches = list(branches)
+        self.by_name = {b.name: b for b in self.branches}
+        if len(self.by_name) != len(self.branches):
+            raise ValueError("Branch names in the registry must be unique")
+        self.by_region = {}
+        for branch in self.branches:
+            self.by_region.setdefault(branch.region, []).append(branch)
+
+    @classmethod
+    def from_csv(cls, path=REGISTRY_PATH):
+        with open(path, newline='') as f:
+            return cls(
+                Branch(row['name'].strip(), (row.get('region') or '').strip(),
+                       row.get('tellers') or DEFAULT_TELLERS)
+                for row in csv.DictReader(f) if row.get('name', '').strip()
+            )
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(Branch(name) for name in config['bank_branches'])
+
+    @property
+    def names(self):
+        return [b.name for b in self.branches]
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def __len__(self):
+        return len(self.branches)
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def encoding_for(self, known_branches):
+        """Model encoding for every registered branch, given the branches a model was trained on
+
+        ``known_branches`` are the encoder's classes in code order. Returns
+        {name: (code, basis)}; basis is 'trained' for branches the model
+        saw, otherwise the trained branch standing in for it: the one in
+        the same region with the closest teller count ('region'), or the
+        closest teller count anywhere ('cluster') when the region has none.
+        """
+        codes = {name: code for code, name in enumerate(known_branches)}
+        if not codes:
+            return {}
+        known = [self.by_name.get(name) or Branch(name) for name in known_branches]
+
+        def closest(candidates, branch):
+            return min(candidates, key=lambda k: (abs(k.tellers - branch.tellers), k.name))
+
+        encoding = {}
+        for branch in self.branches:
+            if branch.name in codes:
+                encoding[branch.name] = (codes[branch.name], 'trained')
+                continue
+            peers = [k for k in known if k.region == branch.region and branch.region != DEFAULT_REGION]
+            if peers:
+                stand_in, basis = closest(peers, branch), 'region'
+            else:
+                stand_in, basis = closest(known, branch), 'cluster'
+            encoding[branch.name] = (codes[stand_in.name], f'{basis}:{stand_in.name}')
+        return encoding
+
+def load_registry(path=REGISTRY_PATH, config_path=CONFIG_PATH):
+    """The registry file if present, otherwise the branch list from config"""
+    if os.path.exists(path):
+        return BranchRegistry.from_csv(path)
+    with open(config_path) as f:
+        return BranchRegistry.from_config(json.load(f))
+
+def main():
+    parser = argparse.ArgumentParser(description="List registered branches and how a model encodes them")
+    parser.add_argument('--registry', default=REGISTRY_PATH)
+    parser.add_argument('--model', help="Saved model whose branch encoding to show")
+    args = parser.parse_args()
+
+    registry = load_registry(args.registry)
+    encoding = {}
+    if args.model:
+        import joblib
+        encoding = registry.encoding_for(list(joblib.load(args.model)['encoders']['branch'].classes_))
+
+    print(f"{len(registry)} branches in {len(registry.by_region)} regions")
+    for branch in registry.branches:
+        basis = encoding.get(branch.name, (None, ''))[1]
+        print(f"  {branch.name:<24} {branch.region:<16} {branch.tellers:>3} tellers  {basis}")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ const API_CONFIG = {
         PREDICT: '/api/predict',
         MODEL_STATUS: '/api/model/status',
         BRANCHES: '/api/branches',
-        SERVICES: '/api/services'
+        SERVICES: '/api/services',
+        FORECAST: '/api/forecast',
+        ANALYTICS: '/api/analytics'
     },
     REFRESH_INTERVAL: 30000, // 30 seconds
     REQUEST_TIMEOUT: 5000    // 5 seconds
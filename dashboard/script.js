@@ -64,6 +64,8 @@ class QueueSmartDashboard {
       await this.loadBranches()
       await this.loadServices()
       await this.loadModelInfo()
+      await this.loadForecast()
+      await this.loadAnalytics()
 
       // Update overview cards
       this.updateOverviewCards()
@@ -289,9 +291,13 @@ class QueueSmartDashboard {
   createWaitTimeChart() {
     const ctx = document.getElementById("waitTimeChart").getContext("2d")
 
-    // Generate sample time series data
-    const hours = Array.from({ length: 9 }, (_, i) => `${i + 8}:00`)
-    const waitTimes = hours.map(() => Math.floor(Math.random() * 25 + 5))
+    // Historical averages when available, otherwise sample data
+    const hours = this.hourlyAnalytics
+      ? this.hourlyAnalytics.map((row) => `${row.hour}:00`)
+      : Array.from({ length: 9 }, (_, i) => `${i + 8}:00`)
+    const waitTimes = this.hourlyAnalytics
+      ? this.hourlyAnalytics.map((row) => row.wait_mean)
+      : hours.map(() => Math.floor(Math.random() * 25 + 5))
 
     this.charts.waitTime = new Chart(ctx, {
       type: "line",
@@ -329,13 +335,53 @@ class QueueSmartDashboard {
     })
   }
 
+  async loadForecast() {
+    try {
+      const response = await API_UTILS.makeRequest(
+        API_CONFIG.ENDPOINTS.FORECAST
+      )
+      // Expected customers today, keyed by branch
+      this.forecast = {}
+      response.forecasts.forEach((item) => {
+        this.forecast[item.branch] = item.expected_customers
+      })
+    } catch (error) {
+      console.error("Failed to load forecast:", error)
+      this.forecast = null
+    }
+  }
+
+  async loadAnalytics() {
+    try {
+      const [hourly, services] = await Promise.all([
+        API_UTILS.makeRequest(`${API_CONFIG.ENDPOINTS.ANALYTICS}?by=hour`),
+        API_UTILS.makeRequest(
+          `${API_CONFIG.ENDPOINTS.ANALYTICS}?by=service_type`
+        ),
+      ])
+      this.hourlyAnalytics = hourly.groups
+      // Customers served, keyed by service type
+      this.serviceAnalytics = {}
+      services.groups.forEach((row) => {
+        this.serviceAnalytics[row.service_type] = row.customers
+      })
+    } catch (error) {
+      console.error("Failed to load analytics:", error)
+      this.hourlyAnalytics = null
+      this.serviceAnalytics = null
+    }
+  }
+
   createBranchChart() {
     const ctx = document.getElementById("branchChart").getContext("2d")
 
     if (!this.branches) return
 
-    const branchData = this.branches.map(() =>
-      Math.floor(Math.random() * 100 + 20)
+    // Use the arrival forecast when available, otherwise simulate
+    const branchData = this.branches.map((branch) =>
+      this.forecast && this.forecast[branch] !== undefined
+        ? Math.round(this.forecast[branch])
+        : Math.floor(Math.random() * 100 + 20)
     )
 
     this.charts.branch = new Chart(ctx, {
@@ -344,7 +390,7 @@ class QueueSmartDashboard {
         labels: this.branches,
         datasets: [
           {
-            label: "Daily Customers",
+            label: "Expected Customers Today",
             data: branchData,
             backgroundColor: DASHBOARD_CONFIG.CHARTS.COLORS.PRIMARY,
             borderColor: DASHBOARD_CONFIG.CHARTS.COLORS.SECONDARY,
@@ -378,8 +424,10 @@ class QueueSmartDashboard {
 
     if (!this.services) return
 
-    const serviceData = this.services.map(() =>
-      Math.floor(Math.random() * 50 + 10)
+    const serviceData = this.services.map((service) =>
+      this.serviceAnalytics
+        ? this.serviceAnalytics[service] || 0
+        : Math.floor(Math.random() * 50 + 10)
     )
 
     this.charts.service = new Chart(ctx, {
@@ -414,8 +462,12 @@ class QueueSmartDashboard {
   createHourlyChart() {
     const ctx = document.getElementById("hourlyChart").getContext("2d")
 
-    const hours = Array.from({ length: 9 }, (_, i) => `${i + 8}:00`)
-    const queueLengths = hours.map(() => Math.floor(Math.random() * 10 + 1))
+    const hours = this.hourlyAnalytics
+      ? this.hourlyAnalytics.map((row) => `${row.hour}:00`)
+      : Array.from({ length: 9 }, (_, i) => `${i + 8}:00`)
+    const queueLengths = this.hourlyAnalytics
+      ? this.hourlyAnalytics.map((row) => row.queue_mean)
+      : hours.map(() => Math.floor(Math.random() * 10 + 1))
 
     this.charts.hourly = new Chart(ctx, {
       type: "bar",
@@ -470,8 +522,8 @@ class QueueSmartDashboard {
   }
 
   updateChartsWithNewData() {
-    // Update wait time chart
-    if (this.charts.waitTime) {
+    // Update wait time chart, unless it shows real history
+    if (this.charts.waitTime && !this.hourlyAnalytics) {
       const newData = this.charts.waitTime.data.datasets[0].data.map(() =>
         Math.floor(Math.random() * 25 + 5)
       )
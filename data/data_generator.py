@@ -3,22 +3,38 @@ import numpy as np
 import random
 from datetime import datetime, timedelta
 import json
+
+# Share of daily arrivals in each opening hour, 8AM to 4PM
+HOUR_WEIGHTS = [0.05, 0.15, 0.20, 0.15, 0.10, 0.15, 0.10, 0.10]
+
+# More customers on Mondays and Fridays, fewer on Wednesdays
+DAY_MULTIPLIER = {0: 1.3, 1: 1.0, 2: 0.8, 3: 0.7, 4: 1.2}
+
+# Daily customer volume per branch before the day multiplier
+BASE_CUSTOMERS = {"min": 80, "max": 150}
+
+# Service mix and duration ranges (whole minutes, inclusive)
+SERVICE_TYPES = {
+    "Cash Withdrawal": {"min": 2, "max": 8, "weight": 0.4},
+    "Transfer": {"min": 3, "max": 10, "weight": 0.25},
+    "Account Opening": {"min": 15, "max": 45, "weight": 0.15},
+    "General Inquiry": {"min": 1, "max": 5, "weight": 0.15},
+    "Loan Application": {"min": 20, "max": 60, "weight": 0.05}
+}
+
 def generate_customer_arrivals(date, branch, total_customers=None):
     """Generate realistic customer arrival times for a specific day"""
     
     if total_customers is None:
-        # More customers on Mondays and Fridays, fewer on Wednesdays
-        day_multiplier = {0: 1.3, 1: 1.0, 2: 0.8, 3: 0.7, 4: 1.2}
-        base_customers = random.randint(80, 150)
-        total_customers = int(base_customers * day_multiplier[date.weekday()])
+        base_customers = random.randint(BASE_CUSTOMERS["min"], BASE_CUSTOMERS["max"])
+        total_customers = int(base_customers * DAY_MULTIPLIER[date.weekday()])
     
     arrivals = []
     
     # Generate arrival times throughout the day
     for i in range(total_customers):
         # Peak hours get more customers
-        hour_weights = [0.05, 0.15, 0.20, 0.15, 0.10, 0.15, 0.10, 0.10]  # 8AM to 4PM
-        hour = np.random.choice(range(8, 16), p=hour_weights)
+        hour = np.random.choice(range(8, 16), p=HOUR_WEIGHTS)
         minute = random.randint(0, 59)
         
         arrival_time = date.replace(hour=hour, minute=minute)
@@ -33,13 +49,7 @@ def generate_customer_arrivals(date, branch, total_customers=None):
 def generate_service_data(arrivals):
     """Generate service types and durations for customers"""
     
-    service_types = {
-        "Cash Withdrawal": {"min": 2, "max": 8, "weight": 0.4},
-        "Transfer": {"min": 3, "max": 10, "weight": 0.25},
-        "Account Opening": {"min": 15, "max": 45, "weight": 0.15},
-        "General Inquiry": {"min": 1, "max": 5, "weight": 0.15},
-        "Loan Application": {"min": 20, "max": 60, "weight": 0.05}
-    }
+    service_types = SERVICE_TYPES
     
     services = []
     
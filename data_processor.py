@@ -4,6 +4,10 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 import warnings
+from analytics_cube import update_cube, CUBE_PATH
+from wait_sketch import update_sketches, SKETCH_PATH
+from pipeline_cache import PipelineCache, FileInput
+import profiling
 warnings.filterwarnings('ignore')
 
 # Set style for plots
@@ -120,32 +124,32 @@ def calculate_queue_metrics(df):
     print("Queue metrics calculated successfully")
     return df_final
 
-def analyze_customer_patterns(df):
-    """Analyze customer arrival and service patterns"""
+def analyze_customer_patterns(cube):
+    """Analyze customer arrival and service patterns from the analytics cube"""
     
     print("=== CUSTOMER PATTERNS ANALYSIS ===\n")
     
     # Daily patterns
-    daily_customers = df.groupby(['date', 'branch']).size().reset_index(name='customer_count')
-    avg_daily = daily_customers.groupby('branch')['customer_count'].mean()
+    by_branch = cube.rollup('branch')
     
     print("Average daily customers by branch:")
-    for branch, avg in avg_daily.items():
-        print(f"  {branch}: {avg:.1f} customers")
+    for row in by_branch:
+        print(f"  {row['branch']}: {row['customers_per_day']:.1f} customers")
     
-    # Hourly patterns
-    hourly_avg = df.groupby(['hour', 'branch']).size().unstack(fill_value=0).mean(axis=1)
+    # Hourly patterns, averaged over branches
+    hourly = cube.rollup('hour')
+    peak_hours = sorted(hourly, key=lambda row: row['customers'], reverse=True)[:3]
     
     print(f"\nPeak hours across all branches:")
-    peak_hours = hourly_avg.nlargest(3)
-    for hour, count in peak_hours.items():
-        print(f"  {hour}:00 - {count:.1f} average customers")
+    for row in peak_hours:
+        print(f"  {row['hour']}:00 - {row['customers'] / len(by_branch):.1f} average customers")
     
     # Service type distribution
-    service_dist = df['service_type'].value_counts(normalize=True) * 100
+    services = sorted(cube.rollup('service_type'), key=lambda row: row['customers'], reverse=True)
+    total = sum(row['customers'] for row in services)
     print(f"\nService type distribution:")
-    for service, pct in service_dist.items():
-        print(f"  {service}: {pct:.1f}%")
+    for row in services:
+        print(f"  {row['service_type']}: {row['customers'] / total * 100:.1f}%")
 
 def create_visualizations(df):
     """Create visualizations for data analysis"""
@@ -187,10 +191,8 @@ def create_visualizations(df):
     
     print("Visualizations saved to data/analysis_plots.png")
 
-def process_banking_data(file_path):
-    """Complete data processing pipeline"""
-    
-    print("Starting data processing pipeline...\n")
+def build_processed_frame(file_path):
+    """Load, clean and enrich the raw data with time features and queue metrics"""
     
     # Load and clean data
     df = load_data(file_path)
@@ -199,16 +201,49 @@ def process_banking_data(file_path):
     # Create features
     df = create_time_features(df)
     df = calculate_queue_metrics(df)
+    return df
+
+def publish_processed_data(df, output_file):
+    """Save processed rows and fold them into the analytics cube and wait sketches"""
     
-    # Analyze patterns
-    analyze_customer_patterns(df)
-    
-    # Create visualizations
-    create_visualizations(df)
+    # Fold the processed days into the aggregate cube used for analytics
+    cube = update_cube(df)
+    print(f"Analytics cube updated: {cube.summary()['dates']} days saved to {CUBE_PATH}")
+    sketches = update_sketches(df)
+    print(f"Wait sketches updated for {', '.join(sketches.window())} in {SKETCH_PATH}")
     
     # Save processed data
-    output_file = 'data/processed_banking_data.csv'
     df.to_csv(output_file, index=False)
     print(f"\nProcessed data saved to {output_file}")
+    return cube
+
+@profiling.timed()
+def process_banking_data(file_path, cache=None):
+    """Complete data processing pipeline
+    
+    Each stage is cached by the content of its inputs and the source of
+    its code (see pipeline_cache), so stages whose inputs did not change
+    since the last run are loaded instead of recomputed.
+    """
+    
+    print("Starting data processing pipeline...\n")
+    cache = cache or PipelineCache()
+    output_file = 'data/processed_banking_data.csv'
+    
+    processed = cache.run(
+        'process', build_processed_frame, FileInput(file_path)
+    )
+    cube = cache.run(
+        'publish', publish_processed_data, processed, output_file,
+        outputs=[output_file, CUBE_PATH, SKETCH_PATH]
+    )
+    
+    # Analyze patterns
+    with profiling.stage('analyze'):
+        analyze_customer_patterns(cube.value)
+    
+    # Create visualizations
+    cache.run('visualizations', create_visualizations, processed,
+              outputs=['data/analysis_plots.png'])
     
-    return df
\ No newline at end of file
+    return processed.value
@@ -1,27 +1,29 @@
-import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import pandas as pd
+
+from validation_engine import run_validation, print_report, default_report_path
 
-# Load generated data
-df = pd.read_csv('data/sample_banking_data.csv')
+# Validate generated data in one streaming pass
+report = run_validation('sample', 'data/sample_banking_data.csv')
 
-# Basic validation
 print("Data Validation Report:")
-print(f"Total records: {len(df)}")
-print(f"Unique customers: {df['customer_id'].nunique()}")
-print(f"Branches: {df['branch'].unique()}")
-print(f"Service types: {df['service_type'].unique()}")
+print_report(report)
 
 # Check for reasonable service times
+stats = report['column_stats']['service_duration_minutes']
 print(f"\nService duration stats:")
-print(df['service_duration_minutes'].describe())
+print(f"  min {stats['min']:.0f}, mean {stats['mean']:.1f}, max {stats['max']:.0f} minutes")
 
-# Simple visualization
+# Simple visualization, from the counts gathered during validation
 plt.figure(figsize=(10, 6))
-df['service_type'].value_counts().plot(kind='bar')
+pd.Series(report['value_counts']['service_type']).sort_values(ascending=False).plot(kind='bar')
 plt.title('Distribution of Service Types')
 plt.xticks(rotation=45)
 plt.tight_layout()
 plt.savefig('data/service_distribution.png')
-plt.show()
+plt.close()
 
-print("\nData validation complete!")
\ No newline at end of file
+print(f"\nReport saved to {default_report_path('sample')}")
+print("Data validation complete!")
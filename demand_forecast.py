@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import warnings
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+FORECAST_PATH = os.path.join(PROJECT_ROOT, 'models', 'arrival_forecast.npz')
+
+def arrival_count_cube(df, branches, hours):
+    """Arrival counts as an array indexed [branch, date, hour] plus the dates covered"""
+    arrival_time = pd.to_datetime(df['arrival_time'])
+    days = arrival_time.dt.normalize()
+    dates = pd.DatetimeIndex(np.sort(days.unique()))
+
+    branch_idx = pd.Categorical(df['branch'], categories=branches).codes
+    date_idx = dates.get_indexer(days)
+    hour_idx = arrival_time.dt.hour.to_numpy() - hours[0]
+    valid = (branch_idx >= 0) & (hour_idx >= 0) & (hour_idx < len(hours))
+
+    shape = (len(branches), len(dates), len(hours))
+    flat = np.ravel_multi_index((branch_idx[valid], date_idx[valid], hour_idx[valid]), shape)
+    counts = np.bincount(flat, minlength=np.prod(shape)).reshape(shape)
+    return counts, dates
+
+def fit_weekday_rates(counts, dates, half_life_weeks=4.0):
+    """Exponentially weighted mean arrivals per [branch, weekday, hour]
+
+    A branch-day only counts as observed when it has at least one arrival,
+    so branches missing from the history are not mistaken for quiet days.
+    Recent weeks weigh more, with weights halving every ``half_life_weeks``.
+    Returns the rates (NaN where a branch never had that weekday) and the
+    number of observed days per [branch, weekday].
+    """
+    observed = counts.sum(axis=2) > 0
+    age_weeks = (dates.max() - dates).days.to_numpy() / 7.0
+    weights = observed * (0.5 ** (age_weeks / half_life_weeks))[None, :]
+    weekday = np.eye(7)[dates.dayofweek]
+
+    numerator = np.einsum('bdh,bd,dw->bwh', counts, weights, weekday)
+    denominator = np.einsum('bd,dw->bw', weights, weekday)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rates = numerator / denominator[:, :, None]
+
+    observed_days = np.einsum('bd,dw->bw', observed.astype(int), weekday).astype(int)
+    return rates, observed_days
+
+class ArrivalForecast:
+    """Precomputed per-branch hourly arrival-rate curves with O(1) lookups
+
+    ``weekday_rates`` is indexed [branch, weekday, hour]; its last branch row
+    is the network average, used for branches without history. ``curves``
+    holds the forecast for ``n_days`` consecutive days from ``start_date``,
+    indexed [branch, day, hour], with zeros on non-working days.
+    """
+
+    def __init__(self, branches, hours, weekday_rates, curves, start_date,
+                 working_days, fitted_through=None):
+        self.branches = list(branches)
+        self.hours = [int(h) for h in hours]
+        self.weekday_rates = weekday_rates
+        self.curves = curves
+        self.start_date = start_date
+        self.working_days = [int(d) for d in working_days]
+        self.fitted_through = fitted_through
+        self.branch_index = {branch: i for i, branch in enumerate(self.branches)}
+        self.fallback_index = len(self.branches)
+
+    @classmethod
+    def fit(cls, df, branches, hours, working_days, start_date=None, n_days=14,
+            half_life_weeks=4.0):
+        """Fit weekday/hour rates for all branches at once and precompute curves"""
+        counts, dates = arrival_count_cube(df, branches, hours)
+        rates, _ = fit_weekday_rates(counts, dates, half_life_weeks)
+
+        # Network average per weekday and hour; weekdays nobody has are all-NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            network = np.nan_to_num(np.nanmean(rates, axis=0))
+        rates = np.where(np.isnan(rates), network[None, :, :], rates)
+        weekday_rates = np.concatenate([rates, network[None, :, :]]).astype(np.float32)
+
+        start_date = start_date or date.today()
+        weekdays = np.array([(start_date + timedelta(days=i)).weekday() for i in range(n_days)])
+        curves = weekday_rates[:, weekdays, :].copy()
+        curves[:, ~np.isin(weekdays, working_days), :] = 0
+
+        return cls(branches, hours, weekday_rates, curves, start_date, working_days,
+                   fitted_through=dates.max().date() if len(dates) else None)
+
+    def save(self, path=FORECAST_PATH):
+        """Store the forecast as a compressed numpy archive"""
+        np.savez_compressed(
+            path,
+            branches=np.array(self.branches),
+            hours=np.array(self.hours),
+            weekday_rates=self.weekday_rates,
+            curves=self.curves,
+            start_date=np.array(self.start_date.isoformat()),
+            working_days=np.array(self.working_days),
+            fitted_through=np.array(self.fitted_through.isoformat() if self.fitted_through else '')
+        )
+        return path
+
+    @classmethod
+    def load(cls, path=FORECAST_PATH):
+        """Load a forecast written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            fitted_through = str(data['fitted_through'])
+            return cls(
+                data['branches'].tolist(), data['hours'].tolist(),
+                data['weekday_rates'], data['curves'],
+                date.fromisoformat(str(data['start_date'])),
+                data['working_days'].tolist(),
+                date.fromisoformat(fitted_through) if fitted_through else None
+            )
+
+    @property
+    def n_days(self):
+        return self.curves.shape[1]
+
+    def _branch(self, branch):
+        return self.branch_index.get(branch, self.fallback_index)
+
+    def weekday_rate(self, branch, day_of_week, hour):
+        """Expected arrivals in one hour of a weekday"""
+        hour_idx = int(hour) - self.hours[0]
+        if not (0 <= hour_idx < len(self.hours)):
+            return 0.0
+        return float(self.weekday_rates[self._branch(branch), int(day_of_week), hour_idx])
+
+    def curve(self, branch, day):
+        """Expected arrivals per opening hour for a branch on a date"""
+        offset = (day - self.start_date).days
+        if 0 <= offset < self.n_days:
+            return self.curves[self._branch(branch), offset]
+        if day.weekday() not in self.working_days:
+            return np.zeros(len(self.hours), dtype=np.float32)
+        return self.weekday_rates[self._branch(branch), day.weekday()]
+
+    def rate(self, branch, day, hour):
+        """Expected arrivals for a branch, date and hour"""
+        hour_idx = int(hour) - self.hours[0]
+        if not (0 <= hour_idx < len(self.hours)):
+            return 0.0
+        return float(self.curve(branch, day)[hour_idx])
+
+    def rates_for(self, branches, days_of_week, hours):
+        """Vectorized weekday_rate for aligned arrays of branches, weekdays and hours"""
+        branch_idx = np.array([self._branch(b) for b in branches])
+        hour_idx = np.asarray(hours, dtype=int) - self.hours[0]
+        inside = (hour_idx >= 0) & (hour_idx < len(self.hours))
+        values = self.weekday_rates[branch_idx, np.asarray(days_of_week, dtype=int),
+                                    np.clip(hour_idx, 0, len(self.hours) - 1)]
+        return np.where(inside, values, 0.0)
+
+def add_forecast_feature(df, forecast, column='forecast_arrival_rate'):
+    """Add the forecast arrival rate for each row's branch, weekday and hour"""
+    df = df.copy()
+    df[column] = forecast.rates_for(df['branch'].to_numpy(), df['day_of_week'], df['hour'])
+    return df
+
+def build_forecast(history_path=HISTORY_PATH, config_path=CONFIG_PATH, start_date=None,
+                   n_days=14, half_life_weeks=4.0):
+    """Fit a forecast from processed history using the branches and hours in config"""
+    with open(config_path) as f:
+        config = json.load(f)
+
+    hours = list(range(config['working_hours']['start'], config['working_hours']['end']))
+    df = pd.read_csv(history_path, usecols=['branch', 'arrival_time'])
+    return ArrivalForecast.fit(
+        df, config['bank_branches'], hours, config['working_days'],
+        start_date=start_date, n_days=n_days, half_life_weeks=half_life_weeks
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and store per-branch arrival forecasts")
+    parser.add_argument('--days', type=int, default=14, help="Days to precompute")
+    parser.add_argument('--start', help="First forecast date (YYYY-MM-DD, default today)")
+    parser.add_argument('--half-life', type=float, default=4.0, help="Recency half-life in weeks")
+    parser.add_argument('--output', default=FORECAST_PATH)
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d').date() if args.start else None
+    forecast = build_forecast(start_date=start_date, n_days=args.days, half_life_weeks=args.half_life)
+    forecast.save(args.output)
+
+    print(f"Forecast for {len(forecast.branches)} branches, {forecast.n_days} days from {forecast.start_date}")
+    print(f"History used through: {forecast.fitted_through}")
+    for branch in forecast.branches:
+        print(f"  {branch}: {forecast.curve(branch, forecast.start_date).sum():.1f} expected customers on {forecast.start_date}")
+    print(f"Forecast saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
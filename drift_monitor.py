@@ -0,0 +1,271 @@
+import argparse
+import bisect
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SIGNAL_PATH = os.environ.get('QUEUESMART_RETRAIN_SIGNAL',
+                             os.path.join(PROJECT_ROOT, 'models', 'retrain_signal.json'))
+
+# Joined predictions kept per (branch, hour) and overall for the rolling metrics
+WINDOW = 200
+# Predictions waiting for their actual wait; the oldest are dropped beyond this
+MAX_PENDING = 10000
+# Live feature histograms forget old requests with this per-request decay (~1000-request memory)
+FEATURE_DECAY = 0.999
+# Retrain when live MAE exceeds the model's test MAE by this ratio, or any feature's PSI passes the threshold
+MAE_RATIO = float(os.environ.get('QUEUESMART_DRIFT_MAE_RATIO', 1.5))
+PSI_THRESHOLD = float(os.environ.get('QUEUESMART_DRIFT_PSI', 0.2))
+# Evidence needed before each check can fire; PSI over 10 bins reads about
+# 9 / n from sampling noise alone, so it needs more requests than MAE
+MIN_SAMPLES = 50
+MIN_FEATURE_SAMPLES = 300
+# Thresholds are re-checked after this many joined predictions
+CHECK_EVERY = 25
+
+# Floor on bin shares so empty bins do not make the PSI infinite
+PSI_EPSILON = 1e-4
+
+def population_stability(expected, actual):
+    """Population stability index between two binned distributions"""
+    expected = np.clip(np.asarray(expected, dtype=float), PSI_EPSILON, None)
+    actual = np.asarray(actual, dtype=float)
+    actual = np.clip(actual / actual.sum(), PSI_EPSILON, None) if actual.sum() > 0 else expected
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def error_metrics(errors):
+    """MAE, RMSE and accuracy within 5 minutes of signed errors (actual - predicted)"""
+    if len(errors) == 0:
+        return {'count': 0, 'mae': None, 'rmse': None, 'accuracy_5min': None}
+    errors = np.abs(errors)
+    return {
+        'count': int(len(errors)),
+        'mae': round(float(errors.mean()), 3),
+        'rmse': round(float(np.sqrt(np.mean(errors ** 2))), 3),
+        'accuracy_5min': round(float(np.mean(errors <= 5) * 100), 1)
+    }
+
+class ErrorRing:
+    """The last ``size`` prediction errors in a fixed array"""
+
+    __slots__ = ('errors', 'count', 'position')
+
+    def __init__(self, size=WINDOW):
+        self.errors = np.zeros(size)
+        self.count = 0
+        self.position = 0
+
+    def add(self, error):
+        self.errors[self.position] = error
+        self.position = (self.position + 1) % len(self.errors)
+        self.count = min(self.count + 1, len(self.errors))
+
+    def values(self):
+        return self.errors[:self.count]
+
+class DriftTracker:
+    """Live accuracy and input drift of the serving model, in bounded memory
+
+    Served predictions are remembered by prediction_id (at most
+    ``max_pending``, oldest dropped first) until an observed wait arrives
+    for them; each joined pair adds its error to a fixed-size ring for its
+    branch and hour and to an overall ring. Request features are binned on
+    the training histograms stored with the model and counted with
+    exponential decay, and compared with the training shares by PSI. When
+    live MAE or any feature's PSI crosses its threshold a retrain signal
+    is raised once: kept on the tracker and written to ``signal_path``.
+    """
+
+    def __init__(self, histograms=None, baseline_mae=None, model_version=None,
+                 window=WINDOW, max_pending=MAX_PENDING, signal_path=SIGNAL_PATH):
+        self.baseline_mae = baseline_mae
+        self.model_version = model_version
+        self.window = window
+        self.max_pending = max_pending
+        self.signal_path = signal_path
+        self.pending = OrderedDict()
+        self.rings = {}
+        self.recent = ErrorRing(window)
+        self.joined = self.unmatched = self.expired = 0
+        self.signal = None
+        self.lock = threading.Lock()
+
+        histograms = histograms or {'columns': [], 'edges': [], 'proportions': []}
+        self.columns = histograms['columns']
+        self.edges = [list(e) for e in histograms['edges']]
+        self.expected = [np.asarray(p) for p in histograms['proportions']]
+        self.live = [np.zeros(len(p)) for p in self.expected]
+        # Decay is applied lazily: new counts get a growing weight, rescaled before it overflows
+        self.live_weight = 1.0
+        self.live_seen = 0
+
+    def record_prediction(self, branch, hour, predicted, features=None):
+        """Remember a served prediction; returns its prediction_id"""
+        prediction_id = uuid.uuid4().hex
+        with self.lock:
+            self.pending[prediction_id] = (branch, hour, float(predicted))
+            if len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+                self.expired += 1
+            if features and self.columns:
+                self._count_features(features)
+        return prediction_id
+
+    def _count_features(self, features):
+        self.live_weight /= FEATURE_DECAY
+        if self.live_weight > 1e12:
+            for counts in self.live:
+                counts /= self.live_weight
+            self.live_weight = 1.0
+        for column, edges, counts in zip(self.columns, self.edges, self.live):
+            value = features.get(column)
+            if value is not None:
+                counts[bisect.bisect_right(edges, value)] += self.live_weight
+        self.live_seen += 1
+
+    def record_actual(self, prediction_id, actual_wait):
+        """Join an observed wait to its prediction; False when the id is unknown or expired"""
+        with self.lock:
+            entry = self.pending.pop(prediction_id, None)
+            if entry is None:
+                self.unmatched += 1
+                return False
+            branch, hour, predicted = entry
+            ring = self.rings.get((branch, hour))
+            if ring is None:
+                ring = self.rings[(branch, hour)] = ErrorRing(self.window)
+            error = float(actual_wait) - predicted
+            ring.add(error)
+            self.recent.add(error)
+            self.joined += 1
+            due = self.joined % CHECK_EVERY == 0
+        if due:
+            self.check()
+        return True
+
+    def accuracy(self):
+        """Rolling metrics overall, per branch and per hour"""
+        with self.lock:
+            by_key = {key: ring.values().copy() for key, ring in self.rings.items()}
+            recent = self.recent.values().copy()
+        by_branch, by_hour = {}, {}
+        for (branch, hour), errors in by_key.items():
+            by_branch.setdefault(branch, []).append(errors)
+            by_hour.setdefault(hour, []).append(errors)
+        return {
+            'overall': error_metrics(recent),
+            'by_branch': {b: error_metrics(np.concatenate(e)) for b, e in sorted(by_branch.items())},
+            'by_hour': {str(h): error_metrics(np.concatenate(e)) for h, e in sorted(by_hour.items())}
+        }
+
+    def feature_drift(self):
+        """PSI of each feature's live distribution against training; empty before MIN_FEATURE_SAMPLES requests"""
+        with self.lock:
+            if self.live_seen < MIN_FEATURE_SAMPLES:
+                return {}
+            return {
+                column: round(population_stability(expected, live), 4)
+                for column, expected, live in zip(self.columns, self.expected, self.live)
+            }
+
+    def check(self):
+        """Evaluate the thresholds, raising the retrain signal the first time one is crossed"""
+        reasons = []
+        with self.lock:
+            overall = error_metrics(self.recent.values().copy())
+        if self.baseline_mae and overall['count'] >= MIN_SAMPLES and overall['mae'] > MAE_RATIO * self.baseline_mae:
+            reasons.append(f"live MAE {overall['mae']:.2f} exceeds {MAE_RATIO} x test MAE {self.baseline_mae:.2f}")
+        drift = self.feature_drift()
+        reasons.extend(
+            f"{column} PSI {psi:.3f} exceeds {PSI_THRESHOLD}"
+            for column, psi in drift.items() if psi > PSI_THRESHOLD
+        )
+        if reasons and self.signal is None:
+            self._raise_signal(reasons, overall, drift)
+        return self.signal
+
+    def _raise_signal(self, reasons, overall, drift):
+        signal = {
+            'retrain': True,
+            'reasons': reasons,
+            'model_version': self.model_version,
+            'raised_at': datetime.now().isoformat(),
+            'live_accuracy': overall,
+            'feature_psi': drift
+        }
+        with self.lock:
+            if self.signal is not None:
+                return
+            self.signal = signal
+        if self.signal_path:
+            tmp = f'{self.signal_path}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(signal, f, indent=2)
+            os.replace(tmp, self.signal_path)
+        print(f"Retrain signal raised: {'; '.join(reasons)}")
+
+    def summary(self):
+        return {
+            'model_version': self.model_version,
+            'baseline_mae': self.baseline_mae,
+            'joined': self.joined,
+            'pending': len(self.pending),
+            'unmatched': self.unmatched,
+            'expired': self.expired,
+            'accuracy': self.accuracy(),
+            'feature_psi': self.feature_drift(),
+            'thresholds': {'mae_ratio': MAE_RATIO, 'psi': PSI_THRESHOLD, 'min_samples': MIN_SAMPLES,
+                           'min_feature_samples': MIN_FEATURE_SAMPLES},
+            'retrain': self.check()
+        }
+
+def reference_from_history(model_data, history):
+    """Training histograms and test-set MAE for a model saved without them
+
+    Rebuilds the training split from processed history the way
+    train_models does (same preparation, same seeded split), so the MAE
+    is measured on rows the model did not train on.
+    """
+    from models.ml_predictor import prepare_ml_data, split_data, feature_histograms
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, _, feature_columns = prepare_ml_data(history)
+        X_train, X_test, _, y_test = split_data(X, y)
+    histograms = feature_histograms(X_train, feature_columns)
+    if model_data['feature_columns'] != feature_columns:
+        return histograms, None
+    X_eval = X_test if model_data['scaler'] is None else model_data['scaler'].transform(X_test)
+    baseline_mae = float(np.mean(np.abs(y_test - model_data['model'].predict(X_eval))))
+    return histograms, baseline_mae
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or clear the retrain signal raised by the drift tracker")
+    parser.add_argument('command', choices=['show', 'clear'])
+    parser.add_argument('--signal', default=SIGNAL_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.signal):
+        print("No retrain signal")
+        return 0
+    if args.command == 'clear':
+        os.remove(args.signal)
+        print(f"Cleared {args.signal}")
+        return 0
+    with open(args.signal) as f:
+        signal = json.load(f)
+    print(f"Retrain signal for {signal['model_version']} raised at {signal['raised_at']}")
+    for reason in signal['reasons']:
+        print(f"  {reason}")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import argparse
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+
+# Per-minute buckets kept for each branch; events older than this are dropped
+RING_MINUTES = 60
+# Window of the rolling mean wait and time constant of the arrival-rate decay
+RECENT_WAIT_MINUTES = 30
+ARRIVAL_DECAY_MINUTES = 15
+# Waits are summed in hundredths of a minute so bucket totals are exact
+WAIT_SCALE = 100
+
+FEATURE_COLUMNS = ['recent_wait_30min', 'arrival_rate_decayed']
+
+# Weight of the bucket k minutes back (k = 1..RING_MINUTES) in the arrival rate
+_ARRIVAL_WEIGHTS = np.exp(-np.arange(RING_MINUTES) / ARRIVAL_DECAY_MINUTES)
+_ARRIVAL_WEIGHTS /= _ARRIVAL_WEIGHTS.sum()
+
+def minute_of(timestamp):
+    """Whole minutes since the epoch for a datetime or timestamp string"""
+    return int(np.datetime64(pd.Timestamp(timestamp).to_datetime64(), 'm').astype(np.int64))
+
+def minutes_of(timestamps):
+    """Vectorized minute_of for a series of timestamps"""
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy().astype('datetime64[m]').astype(np.int64)
+
+class RollingFeatureStore:
+    """Recent-conditions features per branch, maintained incrementally
+
+    Each branch has a ring of ``RING_MINUTES`` per-minute buckets holding
+    integer counts of arrivals and service starts and the waits of those
+    starts in fixed point. Recording an event touches one bucket; reading
+    the features for a minute T combines the buckets of the complete
+    minutes before T with a fixed weight vector. Because the buckets are
+    exact integer totals, the features depend only on which events were
+    recorded for those minutes, not on the order they were recorded in,
+    so the offline replay and the live store give identical values for the
+    same timestamp as long as live events arrive within the ring.
+    """
+
+    def __init__(self, branches=(), ring_minutes=RING_MINUTES):
+        self.branches = list(branches)
+        self.ring_minutes = ring_minutes
+        self.branch_index = {b: i for i, b in enumerate(self.branches)}
+        shape = (len(self.branches), ring_minutes)
+        self.bucket_minutes = np.full(shape, -1, dtype=np.int64)
+        self.arrivals = np.zeros(shape, dtype=np.int64)
+        self.starts = np.zeros(shape, dtype=np.int64)
+        self.wait_sums = np.zeros(shape, dtype=np.int64)
+        self.lock = threading.Lock()
+
+    def _row(self, branch):
+        row = self.branch_index.get(branch)
+        if row is None:
+            row = self.branch_index[branch] = len(self.branches)
+            self.branches.append(branch)
+            self.bucket_minutes = np.vstack([self.bucket_minutes, np.full(self.ring_minutes, -1, np.int64)])
+            for name in ('arrivals', 'starts', 'wait_sums'):
+                setattr(self, name, np.vstack([getattr(self, name), np.zeros(self.ring_minutes, np.int64)]))
+        return row
+
+    def _bucket(self, row, minute):
+        """Ring slot for a minute, claiming it from an older minute; None if the minute is too old"""
+        slot = minute % self.ring_minutes
+        held = self.bucket_minutes[row, slot]
+        if held < minute:
+            self.bucket_minutes[row, slot] = minute
+            self.arrivals[row, slot] = self.starts[row, slot] = self.wait_sums[row, slot] = 0
+        elif held > minute:
+            return None
+        return slot
+
+    def record_arrival(self, branch, minute):
+        """A customer joined the queue at ``minute``"""
+        with self.lock:
+            row = self._row(branch)
+            slot = self._bucket(row, minute)
+            if slot is not None:
+                self.arrivals[row, slot] += 1
+
+    def record_start(self, branch, minute, wait_minutes):
+        """A customer reached a teller at ``minute`` after waiting ``wait_minutes``"""
+        with self.lock:
+            row = self._row(branch)
+            slot = self._bucket(row, minute)
+            if slot is not None:
+                self.starts[row, slot] += 1
+                self.wait_sums[row, slot] += int(round(wait_minutes * WAIT_SCALE))
+
+    def features_at(self, branch, minute):
+        """Feature values from the complete minutes before ``minute``
+
+        recent_wait_30min is the mean wait of services started in the last
+        RECENT_WAIT_MINUTES (0 when none started); arrival_rate_decayed is
+        an exponentially decayed arrivals-per-hour rate.
+        """
+        row = self.branch_index.get(branch)
+        if row is None:
+            return dict.fromkeys(FEATURE_COLUMNS, 0.0)
+
+        back = minute - np.arange(1, self.ring_minutes + 1)
+        with self.lock:
+            slots = back % self.ring_minutes
+            live = self.bucket_minutes[row, slots] == back
+            arrivals = np.where(live, self.arrivals[row, slots], 0)
+            starts = np.where(live, self.starts[row, slots], 0)
+            wait_sums = np.where(live, self.wait_sums[row, slots], 0)
+
+        recent_starts = int(starts[:RECENT_WAIT_MINUTES].sum())
+        recent_wait = int(wait_sums[:RECENT_WAIT_MINUTES].sum())
+        return {
+            'recent_wait_30min': recent_wait / WAIT_SCALE / recent_starts if recent_starts else 0.0,
+            'arrival_rate_decayed': float(arrivals @ _ARRIVAL_WEIGHTS) * 60
+        }
+
+    def features(self, branch, at=None):
+        """Feature values for a branch at a time (default now)"""
+        return self.features_at(branch, minute_of(at or datetime.now()))
+
+    def record_visit(self, branch, arrival_time, wait_minutes):
+        """Record both events of one completed wait"""
+        self.record_arrival(branch, minute_of(arrival_time))
+        self.record_start(branch, minute_of(arrival_time + timedelta(minutes=wait_minutes)), wait_minutes)
+
+def replay(df, store=None, shuffle_seed=None):
+    """Offline feature values for every row of processed history
+
+    Rows are replayed in arrival order through a RollingFeatureStore:
+    before each arrival, every arrival and service start from earlier
+    minutes is recorded, then the features are read for the arrival's
+    minute, exactly as the live store would serve them at that time.
+    ``shuffle_seed`` records each batch of events in a random order, which
+    must not change any value. Returns a frame aligned with ``df``.
+    """
+    store = store or RollingFeatureStore()
+    rng = np.random.default_rng(shuffle_seed) if shuffle_seed is not None else None
+    arrival_ts = pd.to_datetime(df['arrival_time'])
+    waits = df['wait_time_minutes'].to_numpy(dtype=float)
+    branches = df['branch'].to_numpy()
+    arrival = minutes_of(arrival_ts)
+    start = minutes_of(arrival_ts + pd.to_timedelta(waits, unit='min'))
+
+    # Events as (minute, row, is_start), in time order
+    event_minutes = np.concatenate([arrival, start])
+    event_rows = np.tile(np.arange(len(df)), 2)
+    event_is_start = np.repeat([False, True], len(df))
+    order = np.argsort(event_minutes, kind='stable')
+
+    values = np.zeros((len(df), len(FEATURE_COLUMNS)))
+    position = 0
+    for i in np.argsort(arrival, kind='stable'):
+        end = np.searchsorted(event_minutes[order], arrival[i], side='left')
+        batch = order[position:end]
+        if rng is not None:
+            batch = rng.permutation(batch)
+        for e in batch:
+            r = event_rows[e]
+            if event_is_start[e]:
+                store.record_start(branches[r], event_minutes[e], waits[r])
+            else:
+                store.record_arrival(branches[r], event_minutes[e])
+        position = end
+        features = store.features_at(branches[i], arrival[i])
+        values[i] = [features[c] for c in FEATURE_COLUMNS]
+
+    return pd.DataFrame(values, columns=FEATURE_COLUMNS, index=df.index)
+
+def add_rolling_features(df):
+    """Add the rolling feature columns to processed history"""
+    df = df.copy()
+    df[FEATURE_COLUMNS] = replay(df)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay rolling queue features over processed history")
+    parser.add_argument('--input', default=HISTORY_PATH)
+    parser.add_argument('--output', help="Write history with the feature columns added")
+    parser.add_argument('--check', action='store_true',
+                        help="Verify that recording events in another order gives identical values")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    features = replay(df)
+    print(features.describe().round(2).to_string())
+
+    if args.check:
+        shuffled = replay(df, shuffle_seed=1)
+        mismatches = int((features.to_numpy() != shuffled.to_numpy()).any(axis=1).sum())
+        print(f"\nReplay order check: {mismatches} of {len(df)} rows differ")
+        if mismatches:
+            return 1
+
+    if args.output:
+        df[FEATURE_COLUMNS] = features
+        df.to_csv(args.output, index=False)
+        print(f"History with rolling features saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
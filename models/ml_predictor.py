@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.model_selection import train_test_split, cross_val_score, KFold, ParameterGrid
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, ExtraTreesRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from sklearn.preprocessing import StandardScaler, LabelEncoder
@@ -12,8 +12,68 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-def prepare_ml_data(df):
-    """Prepare data for machine learning"""
+# Hours flagged as peak in the is_peak_hour feature
+PEAK_HOURS = [9, 10, 11, 13, 14, 15]
+
+# Model inputs, in order, before any extra features
+FEATURE_COLUMNS = [
+    'hour',
+    'day_of_week',
+    'branch_encoded',
+    'service_type_encoded',
+    'service_duration_minutes',
+    'queue_length_on_arrival',
+    'is_peak_hour'
+]
+
+# Default hyperparameters per model; the train functions accept overrides
+MODEL_PARAMS = {
+    'random_forest': {
+        'n_estimators': 100,
+        'max_depth': 10,
+        'min_samples_split': 5,
+        'min_samples_leaf': 2,
+        'random_state': 42
+    },
+    'gradient_boosting': {
+        'n_estimators': 100,
+        'learning_rate': 0.1,
+        'max_depth': 6,
+        'random_state': 42
+    },
+    'hist_gradient_boosting': {
+        'max_iter': 200,
+        'learning_rate': 0.1,
+        'max_leaf_nodes': 31,
+        'categorical_features': [
+            FEATURE_COLUMNS.index('branch_encoded'),
+            FEATURE_COLUMNS.index('service_type_encoded')
+        ],
+        'random_state': 42
+    },
+    'random_forest_tuned': {
+        'param_grid': {
+            'n_estimators': [50, 100, 200],
+            'max_depth': [5, 10, 15, None],
+            'min_samples_split': [2, 5, 10],
+            'min_samples_leaf': [1, 2, 4]
+        },
+        'cv': 5,
+        'scoring': 'cv',
+        'random_state': 42
+    }
+}
+
+def model_params(name, overrides=None):
+    """Hyperparameters for a model with any overrides applied"""
+    return {**MODEL_PARAMS[name], **(overrides or {})}
+
+def prepare_ml_data(df, extra_features=None):
+    """Prepare data for machine learning
+    
+    extra_features lists additional numeric columns already present in df
+    (for example forecast_arrival_rate) to append to the feature set.
+    """
     
     print("Preparing data for machine learning...")
     
@@ -34,15 +94,9 @@ def prepare_ml_data(df):
     }
     
     # Select features for prediction
-    feature_columns = [
-        'hour',
-        'day_of_week', 
-        'branch_encoded',
-        'service_type_encoded',
-        'service_duration_minutes',
-        'queue_length_on_arrival',
-        'is_peak_hour'
-    ]
+    feature_columns = list(FEATURE_COLUMNS)
+    if extra_features:
+        feature_columns = feature_columns + list(extra_features)
     
     # Convert boolean to int
     ml_df['is_peak_hour'] = ml_df['is_peak_hour'].astype(int)
@@ -57,6 +111,62 @@ def prepare_ml_data(df):
     
     return X, y, encoders, feature_columns
 
+def _category_levels(path, chunksize):
+    """Distinct branches and service types in a CSV, read column-wise in chunks"""
+    levels = {'branch': set(), 'service_type': set()}
+    for chunk in pd.read_csv(path, usecols=list(levels), chunksize=chunksize):
+        for column, values in levels.items():
+            values.update(chunk[column].dropna().unique())
+    return {column: sorted(values) for column, values in levels.items()}
+
+def stream_training_data(path, chunksize=100000, test_size=0.2, sample_fraction=1.0,
+                         random_state=42, levels=None):
+    """Build float32 train/test matrices from a processed CSV one chunk at a time
+    
+    Only the model columns are read, each chunk is encoded straight into a
+    compact float32 block and assigned row by row to the train or test
+    set, so neither the full frame nor split copies of it are ever held.
+    ``sample_fraction`` keeps a seeded random share of each chunk for
+    histories too large to use whole. ``levels`` gives the branch and
+    service type categories; by default a first column-only pass finds
+    them. Returns the same dictionary layout as the in-memory path.
+    """
+    rng = np.random.default_rng(random_state)
+    levels = levels or _category_levels(path, chunksize)
+    encoders = {column: LabelEncoder().fit(values) for column, values in levels.items()}
+    codes = {column: {v: i for i, v in enumerate(enc.classes_)} for column, enc in encoders.items()}
+    
+    usecols = ['hour', 'day_of_week', 'branch', 'service_type', 'service_duration_minutes',
+               'queue_length_on_arrival', 'is_peak_hour', 'wait_time_minutes']
+    parts = {'train': ([], []), 'test': ([], [])}
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        if sample_fraction < 1:
+            chunk = chunk[rng.random(len(chunk)) < sample_fraction]
+        
+        X = np.empty((len(chunk), len(FEATURE_COLUMNS)), dtype=np.float32)
+        for j, column in enumerate(FEATURE_COLUMNS):
+            if column.endswith('_encoded'):
+                source = column[:-len('_encoded')]
+                X[:, j] = chunk[source].map(codes[source]).to_numpy(dtype=np.float32)
+            else:
+                X[:, j] = chunk[column].to_numpy(dtype=np.float32)
+        y = chunk['wait_time_minutes'].to_numpy(dtype=np.float32)
+        
+        test = rng.random(len(chunk)) < test_size
+        parts['train'][0].append(X[~test])
+        parts['train'][1].append(y[~test])
+        parts['test'][0].append(X[test])
+        parts['test'][1].append(y[test])
+    
+    data = {'encoders': encoders, 'feature_columns': list(FEATURE_COLUMNS)}
+    for name, (X_parts, y_parts) in parts.items():
+        data[f'X_{name}'] = np.concatenate(X_parts) if X_parts else np.empty((0, len(FEATURE_COLUMNS)), np.float32)
+        data[f'y_{name}'] = np.concatenate(y_parts) if y_parts else np.empty(0, np.float32)
+    
+    print(f"Streamed training set: {len(data['y_train'])} samples")
+    print(f"Streamed testing set: {len(data['y_test'])} samples")
+    return data
+
 def split_data(X, y, test_size=0.2, random_state=42):
     """Split data into training and testing sets"""
     
@@ -83,35 +193,34 @@ def train_linear_regression(X_train, y_train):
     
     return model, scaler
 
-def train_random_forest(X_train, y_train):
+def train_random_forest(X_train, y_train, params=None):
     """Train Random Forest model"""
     
     print("Training Random Forest model...")
     
-    model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42
-    )
+    model = RandomForestRegressor(**model_params('random_forest', params))
     
     model.fit(X_train, y_train)
     
     return model
 
-def train_gradient_boosting(X_train, y_train):
+def train_gradient_boosting(X_train, y_train, params=None):
     """Train Gradient Boosting model"""
     
     print("Training Gradient Boosting model...")
     
-    model = GradientBoostingRegressor(
-        n_estimators=100,
-        learning_rate=0.1,
-        max_depth=6,
-        random_state=42
-    )
+    model = GradientBoostingRegressor(**model_params('gradient_boosting', params))
+    
+    model.fit(X_train, y_train)
     
+    return model
+
+def train_hist_gradient_boosting(X_train, y_train, params=None):
+    """Train histogram-based Gradient Boosting model (multi-threaded, binned splits)"""
+    
+    print("Training Histogram Gradient Boosting model...")
+    
+    model = HistGradientBoostingRegressor(**model_params('hist_gradient_boosting', params))
     model.fit(X_train, y_train)
     
     return model
@@ -202,35 +311,103 @@ def analyze_feature_importance(model, feature_columns, model_name):
         print(f"{model_name} does not support feature importance analysis")
         return None
 
-def tune_random_forest(X_train, y_train):
-    """Tune Random Forest hyperparameters"""
-    
-    print("Tuning Random Forest hyperparameters...")
-    
-    param_grid = {
-        'n_estimators': [50, 100, 200],
-        'max_depth': [5, 10, 15, None],
-        'min_samples_split': [2, 5, 10],
-        'min_samples_leaf': [1, 2, 4]
-    }
-    
-    rf = RandomForestRegressor(random_state=42)
-    
-    grid_search = GridSearchCV(
-        rf, param_grid, cv=5, 
-        scoring='neg_mean_squared_error',
-        n_jobs=-1, verbose=1
+def _grow_forest_scores(config, tree_counts, X_fit, y_fit, X_eval=None, y_eval=None, random_state=42):
+    """Grow one forest through ascending tree counts; MSE at each count
+    
+    With warm_start each step only adds the new trees, and because the
+    forest advances its random state past the existing trees the result
+    at every count is identical to a forest of that size fitted from
+    scratch. Scores on (X_eval, y_eval) when given, out-of-bag otherwise.
+    """
+    oob = X_eval is None
+    forest = RandomForestRegressor(
+        warm_start=True, oob_score=oob, random_state=random_state, n_jobs=-1, **config
     )
+    scores = []
+    for n_estimators in tree_counts:
+        forest.set_params(n_estimators=n_estimators)
+        forest.fit(X_fit, y_fit)
+        predictions = forest.oob_prediction_ if oob else forest.predict(X_eval)
+        scores.append(mean_squared_error(y_fit if oob else y_eval, predictions))
+    return scores
+
+def tune_random_forest(X_train, y_train, params=None):
+    """Tune Random Forest hyperparameters
     
-    grid_search.fit(X_train, y_train)
+    Every depth/split/leaf configuration is grown once through the
+    ``n_estimators`` values of the grid instead of being refitted per tree
+    count. ``scoring='oob'`` ranks configurations by out-of-bag error from
+    a single fit on the training data; ``scoring='cv'`` uses the same
+    K-fold indices, computed once, for every configuration, and picks the
+    same parameters as GridSearchCV would.
+    """
     
-    print(f"Best parameters: {grid_search.best_params_}")
-    print(f"Best cross-validation score: {-grid_search.best_score_:.2f}")
+    print("Tuning Random Forest hyperparameters...")
+    
+    params = model_params('random_forest_tuned', params)
+    grid = dict(params['param_grid'])
+    tree_counts = sorted(grid.pop('n_estimators', [100]))
+    configs = list(ParameterGrid(grid))
+    X = X_train.to_numpy() if hasattr(X_train, 'to_numpy') else np.asarray(X_train)
+    y = np.asarray(y_train)
     
-    return grid_search.best_estimator_
+    if params.get('scoring', 'cv') == 'oob':
+        folds = None
+        print(f"Growing {len(configs)} forests to {tree_counts[-1]} trees, scored out-of-bag")
+    else:
+        folds = list(KFold(n_splits=params['cv']).split(X))
+        print(f"Growing {len(configs)} forests to {tree_counts[-1]} trees on each of {len(folds)} folds")
+    
+    best_params, best_score = None, np.inf
+    for config in configs:
+        if folds is None:
+            scores = _grow_forest_scores(config, tree_counts, X, y, random_state=params['random_state'])
+        else:
+            scores = np.mean([
+                _grow_forest_scores(config, tree_counts, X[fit], y[fit], X[held], y[held],
+                                    params['random_state'])
+                for fit, held in folds
+            ], axis=0)
+        for n_estimators, score in zip(tree_counts, scores):
+            if score < best_score:
+                best_params = {**config, 'n_estimators': n_estimators}
+                best_score = score
+    
+    print(f"Best parameters: {best_params}")
+    print(f"Best {'out-of-bag' if folds is None else 'cross-validation'} score: {best_score:.2f}")
+    
+    best_model = RandomForestRegressor(random_state=params['random_state'], n_jobs=-1, **best_params)
+    best_model.fit(X_train, y_train)
+    return best_model
 
-def save_model(model, encoders, feature_columns, model_name, scaler=None):
-    """Save trained model and associated data"""
+def feature_histograms(X, feature_columns, bins=10):
+    """Compact histograms of the training inputs, one per feature
+    
+    Features with at most 2 * bins distinct values get one bin per value,
+    the rest get quantile bins. Each feature keeps its inner bin edges and
+    the share of rows in each bin, so live inputs can be compared with the
+    training distribution without storing the training data.
+    """
+    X = np.asarray(X, dtype=float)
+    edges, proportions = [], []
+    for j in range(X.shape[1]):
+        values = X[:, j]
+        distinct = np.unique(values)
+        if len(distinct) <= 2 * bins:
+            inner = (distinct[1:] + distinct[:-1]) / 2
+        else:
+            inner = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(inner, values, side='right'), minlength=len(inner) + 1)
+        edges.append(inner.tolist())
+        proportions.append((counts / max(len(values), 1)).tolist())
+    return {'columns': list(feature_columns), 'edges': edges, 'proportions': proportions}
+
+def save_model(model, encoders, feature_columns, model_name, scaler=None, histograms=None, metrics=None):
+    """Save trained model and associated data
+    
+    histograms (from feature_histograms) and test-set metrics are kept in
+    the artifact as the reference for live drift and accuracy checks.
+    """
     
     model_data = {
         'model': model,
@@ -238,7 +415,9 @@ def save_model(model, encoders, feature_columns, model_name, scaler=None):
         'feature_columns': feature_columns,
         'scaler': scaler,
         'model_name': model_name,
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'feature_histograms': histograms,
+        'metrics': metrics
     }
     
     filename = f'models/{model_name.lower().replace(" ", "_")}_model.joblib'
@@ -257,20 +436,48 @@ def load_model(filename):
     
     return model_data
 
-def predict_wait_time(model_data, branch, service_type, hour, day_of_week, 
-                     service_duration, current_queue_length):
-    """Make wait time prediction using loaded model"""
-    
-    # Prepare input data
+def encode_branches(model_data, branches):
+    """Model codes for branch names
+    
+    Uses model_data['branch_codes'] ({name: code}, e.g. set from the branch
+    registry so unseen branches map to a stand-in) when present, and the
+    branch LabelEncoder otherwise.
+    """
+    codes = model_data.get('branch_codes')
+    if codes is None:
+        return model_data['encoders']['branch'].transform(branches)
+    try:
+        return np.array([codes[b] for b in branches])
+    except KeyError as e:
+        raise ValueError(f"Unknown branch: {e.args[0]}")
+
+def build_input_frame(model_data, branch, service_type, hour, day_of_week,
+                      service_duration, current_queue_length, extra_features=None):
+    """Feature frame for a single request, in the model's column order"""
     input_data = pd.DataFrame({
         'hour': [hour],
         'day_of_week': [day_of_week],
-        'branch_encoded': [model_data['encoders']['branch'].transform([branch])[0]],
+        'branch_encoded': [encode_branches(model_data, [branch])[0]],
         'service_type_encoded': [model_data['encoders']['service_type'].transform([service_type])[0]],
         'service_duration_minutes': [service_duration],
         'queue_length_on_arrival': [current_queue_length],
-        'is_peak_hour': [1 if hour in [9, 10, 11, 13, 14, 15] else 0]
+        'is_peak_hour': [1 if hour in PEAK_HOURS else 0]
     })
+    return _with_extra_features(input_data, model_data, extra_features)
+
+def predict_wait_time(model_data, branch, service_type, hour, day_of_week, 
+                     service_duration, current_queue_length, extra_features=None):
+    """Make wait time prediction using loaded model
+    
+    extra_features maps any additional feature columns the model was
+    trained with to their values for this request.
+    """
+    
+    # Prepare input data
+    input_data = build_input_frame(
+        model_data, branch, service_type, hour, day_of_week,
+        service_duration, current_queue_length, extra_features
+    )
     
     # Make prediction
     if model_data['scaler'] is not None:
@@ -279,4 +486,101 @@ def predict_wait_time(model_data, branch, service_type, hour, day_of_week,
     else:
         prediction = model_data['model'].predict(input_data)[0]
     
-    return max(0, prediction)  # Ensure non-negative prediction
\ No newline at end of file
+    return max(0, prediction)  # Ensure non-negative prediction
+
+def supports_intervals(model):
+    """Whether a model's trees can give per-tree predictions to build intervals from"""
+    return isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)) and hasattr(model, 'estimators_')
+
+def _forest_leaf_table(model_data):
+    """Leaf values of all trees in one flat array plus each tree's offset into it
+    
+    Built once per loaded model and kept in model_data.
+    """
+    table = model_data.get('_leaf_table')
+    if table is None:
+        values = [tree.tree_.value[:, 0, 0] for tree in model_data['model'].estimators_]
+        offsets = np.cumsum([0] + [len(v) for v in values[:-1]])
+        table = (np.concatenate(values), offsets)
+        model_data['_leaf_table'] = table
+    return table
+
+def predict_with_intervals(model_data, input_data, quantiles=(10, 90)):
+    """Point predictions and quantile bounds from the spread of a forest's trees
+    
+    One apply() call finds every tree's leaf for every row; the per-tree
+    predictions are then a single gather from the flat leaf table, so no
+    estimator's predict is called separately. Returns (predictions, bounds)
+    where bounds has one column per quantile, or None when the model is not
+    a forest.
+    """
+    model = model_data['model']
+    X = input_data if model_data['scaler'] is None else model_data['scaler'].transform(input_data)
+    
+    if not supports_intervals(model):
+        return np.maximum(0, model.predict(X)), None
+    
+    leaf_values, offsets = _forest_leaf_table(model_data)
+    per_tree = leaf_values[model.apply(X) + offsets]
+    predictions = per_tree.mean(axis=1)
+    bounds = np.percentile(per_tree, quantiles, axis=1).T
+    return np.maximum(0, predictions), np.maximum(0, bounds)
+
+def predict_wait_time_interval(model_data, branch, service_type, hour, day_of_week,
+                               service_duration, current_queue_length,
+                               quantiles=(10, 90), extra_features=None):
+    """Wait prediction with lower and upper quantile bounds
+    
+    Returns (prediction, lower, upper); the bounds are None for models
+    without per-tree outputs.
+    """
+    input_data = build_input_frame(
+        model_data, branch, service_type, hour, day_of_week,
+        service_duration, current_queue_length, extra_features
+    )
+    predictions, bounds = predict_with_intervals(model_data, input_data, quantiles)
+    if bounds is None:
+        return float(predictions[0]), None, None
+    return float(predictions[0]), float(bounds[0, 0]), float(bounds[0, -1])
+
+def _with_extra_features(input_data, model_data, extra_features):
+    """Add extra feature values and order columns as the model expects"""
+    feature_columns = model_data['feature_columns']
+    if len(feature_columns) == input_data.shape[1]:
+        return input_data
+    
+    for column in feature_columns:
+        if column not in input_data:
+            if extra_features is None or column not in extra_features:
+                raise ValueError(f"Missing value for model feature '{column}'")
+            # Positional, not index-aligned: requests_df may carry any index
+            input_data[column] = np.asarray(extra_features[column])
+    return input_data[feature_columns]
+
+def predict_wait_times(model_data, requests_df):
+    """Vectorized predict_wait_time for many requests in one model call
+    
+    requests_df has one row per request with the columns branch,
+    service_type, hour, day_of_week, service_duration and
+    current_queue_length, plus any extra feature columns the model was
+    trained with. Returns a numpy array of non-negative waits.
+    """
+    hours = requests_df['hour'].to_numpy()
+    
+    input_data = pd.DataFrame({
+        'hour': hours,
+        'day_of_week': requests_df['day_of_week'].to_numpy(),
+        'branch_encoded': encode_branches(model_data, requests_df['branch']),
+        'service_type_encoded': model_data['encoders']['service_type'].transform(requests_df['service_type']),
+        'service_duration_minutes': requests_df['service_duration'].to_numpy(),
+        'queue_length_on_arrival': requests_df['current_queue_length'].to_numpy(),
+        'is_peak_hour': np.isin(hours, PEAK_HOURS).astype(int)
+    })
+    input_data = _with_extra_features(input_data, model_data, requests_df)
+    
+    if model_data['scaler'] is not None:
+        predictions = model_data['model'].predict(model_data['scaler'].transform(input_data))
+    else:
+        predictions = model_data['model'].predict(input_data)
+    
+    return np.maximum(0, predictions)
@@ -0,0 +1,235 @@
+import dis
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+import time
+import types
+
+import joblib
+
+import profiling
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.pipeline_cache')
+
+class FileInput:
+    """A stage input that is a file; it is keyed by its content, not its path"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def digest(self):
+        sha = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+class StageResult:
+    """Value produced by a stage together with the key it was stored under
+
+    Passing a StageResult to a later stage keys that stage by this key
+    rather than by hashing the (possibly large) value again.
+    """
+
+    __slots__ = ('name', 'key', 'value', 'cached', 'seconds')
+
+    def __init__(self, name, key, value, cached, seconds):
+        self.name = name
+        self.key = key
+        self.value = value
+        self.cached = cached
+        self.seconds = seconds
+
+# UPPER_CASE module values of these types are part of a stage key when its code names them;
+# strings are left out so path constants do not tie keys to where the project lives
+CONSTANT_TYPES = (dict, list, tuple, set, frozenset, int, float, bool)
+
+def _source(func):
+    """Source text of a function, falling back to its qualified name"""
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+def _in_project(obj):
+    path = getattr(inspect.getmodule(obj), '__file__', None)
+    return path is not None and os.path.abspath(path).startswith(PROJECT_ROOT + os.sep)
+
+def _code_objects(code):
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _code_objects(const)
+
+def _references(func):
+    """Objects a function's code names: globals, imported names and attributes of project modules"""
+    code = getattr(inspect.unwrap(func), '__code__', None)
+    if code is None:
+        return []
+    namespace = inspect.unwrap(func).__globals__
+    found = []
+    for c in _code_objects(code):
+        modules = [namespace[n] for n in c.co_names if isinstance(namespace.get(n), types.ModuleType)]
+        for ins in dis.get_instructions(c):
+            if ins.opname == 'IMPORT_NAME' and not ins.argval.startswith('.'):
+                try:
+                    modules.append(importlib.import_module(ins.argval))
+                except ImportError:
+                    pass
+        modules = [m for m in modules if _in_project(m)]
+        for name in c.co_names:
+            if name in namespace:
+                found.append((name, namespace[name]))
+            found.extend((name, getattr(m, name)) for m in modules if hasattr(m, name))
+    return found
+
+def dependencies(roots):
+    """Project functions and classes reachable from ``roots``, and the constants they name
+
+    Follows the names each function's code uses (and, for classes, their
+    methods') through every module of the project, so a stage is keyed by
+    the helpers it actually calls rather than a hand-kept list. Returns
+    ``(callables, constants)`` in a stable order.
+    """
+    callables, constants, pending = {}, {}, list(roots)
+    while pending:
+        obj = inspect.unwrap(pending.pop())
+        if not (inspect.isfunction(obj) or inspect.isclass(obj)) or not _in_project(obj):
+            continue
+        name = f"{obj.__module__}.{obj.__qualname__}"
+        if name in callables:
+            continue
+        callables[name] = obj
+        if inspect.isclass(obj):
+            members = [getattr(m, '__func__', getattr(m, 'fget', m)) for m in vars(obj).values()]
+            pending.extend(m for m in members if inspect.isfunction(m))
+            continue
+        for ref_name, value in _references(obj):
+            if isinstance(value, CONSTANT_TYPES):
+                if ref_name.isupper():
+                    constants[f"{obj.__module__}.{ref_name}"] = value
+            else:
+                pending.append(value)
+    return [callables[k] for k in sorted(callables)], {k: constants[k] for k in sorted(constants)}
+
+class PipelineCache:
+    """Content-addressed cache of pipeline stage results
+
+    A stage's key is a hash of its name, the source of the stage function
+    and of every project function and class it reaches (see dependencies;
+    ``deps`` adds any it cannot see, such as methods called on arguments),
+    the module constants they name, its keyword parameters,
+    the content of its FileInput arguments and the keys of the upstream
+    StageResults it consumes. Results are stored with joblib under that
+    key, so a stage is skipped whenever nothing that feeds it changed, and
+    a change anywhere invalidates exactly the stages downstream of it.
+    Stages that write files list them in ``outputs``; a digest of each is
+    stored with the result, and the stage reruns if any of them is missing
+    or no longer matches (for example when a run with other inputs wrote
+    them since).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, enabled=True, verbose=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.verbose = verbose
+        self.history = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, name, func, args, kwargs, deps=()):
+        values = list(args) + [kwargs[k] for k in sorted(kwargs)]
+        callables, constants = dependencies(
+            [func, *deps, *(v for v in values if inspect.isfunction(v) or inspect.isclass(v))]
+        )
+        parts = [name] + [_source(f) for f in callables]
+        parts += [f"const:{k}:{joblib.hash(v)}" for k, v in constants.items()]
+        for arg in values:
+            if isinstance(arg, StageResult):
+                parts.append(f"stage:{arg.key}")
+            elif isinstance(arg, FileInput):
+                parts.append(f"file:{arg.digest()}")
+            else:
+                parts.append(f"value:{joblib.hash(arg)}")
+        parts.append(json.dumps(sorted(kwargs), default=str))
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()[:24]
+
+    def _path(self, name, key):
+        safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        return os.path.join(self.cache_dir, f"{safe_name}-{key}.joblib")
+
+    def run(self, name, func, *args, deps=(), outputs=(), **kwargs):
+        """Run ``func(*args, **kwargs)`` as a named stage, or load its cached result"""
+        with profiling.stage(name) as record:
+            result = self._run(name, func, args, kwargs, deps, outputs)
+            record['cached'] = result.cached
+        return self._record(result)
+
+    def _run(self, name, func, args, kwargs, deps, outputs):
+        started = time.perf_counter()
+        key = self.key_for(name, func, args, kwargs, deps)
+        path = self._path(name, key)
+
+        if self.enabled and os.path.exists(path) and self._outputs_match(path, outputs):
+            value = joblib.load(path)
+            return StageResult(name, key, value, True, time.perf_counter() - started)
+
+        call_args = [
+            a.value if isinstance(a, StageResult) else a.path if isinstance(a, FileInput) else a
+            for a in args
+        ]
+        call_kwargs = {
+            k: v.value if isinstance(v, StageResult) else v.path if isinstance(v, FileInput) else v
+            for k, v in kwargs.items()
+        }
+        value = func(*call_args, **call_kwargs)
+
+        tmp_path = f"{path}.tmp"
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+        if outputs:
+            digests = {p: FileInput(p).digest() for p in outputs if os.path.exists(p)}
+            with open(f"{tmp_path}.json", 'w') as f:
+                json.dump(digests, f)
+            os.replace(f"{tmp_path}.json", self._outputs_path(path))
+        return StageResult(name, key, value, False, time.perf_counter() - started)
+
+    @staticmethod
+    def _outputs_path(path):
+        return f"{path}.outputs.json"
+
+    def _outputs_match(self, path, outputs):
+        """Whether every output file still holds what this stage key wrote"""
+        if not outputs:
+            return True
+        try:
+            with open(self._outputs_path(path)) as f:
+                digests = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return all(
+            p in digests and os.path.exists(p) and FileInput(p).digest() == digests[p]
+            for p in outputs
+        )
+
+    def _record(self, result):
+        self.history.append(result)
+        if self.verbose:
+            status = "cached" if result.cached else "ran"
+            print(f"[pipeline] {result.name}: {status} in {result.seconds:.2f}s (key {result.key[:10]})")
+        return result
+
+    def print_summary(self):
+        """Which stages ran, which were reused, and the time spent"""
+        ran = [r for r in self.history if not r.cached]
+        print(f"\nPipeline: {len(ran)} of {len(self.history)} stages ran, "
+              f"{len(self.history) - len(ran)} reused from {self.cache_dir}")
+        print(f"Total stage time: {sum(r.seconds for r in self.history):.2f}s")
+
+    def clear(self):
+        """Delete every cached result"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import cProfile
+import functools
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Instrumentation is off unless QUEUESMART_PROFILE is set; the settings are read once at import
+ENABLED = os.environ.get('QUEUESMART_PROFILE', '0') not in ('', '0')
+PROFILE_DIR = os.environ.get('QUEUESMART_PROFILE_DIR', os.path.join(PROJECT_ROOT, 'profiles'))
+SAMPLE_RATE = float(os.environ.get('QUEUESMART_PROFILE_SAMPLE', 0.01))
+MAX_PROFILES = int(os.environ.get('QUEUESMART_PROFILE_KEEP', 50))
+STAGE_LOG_BYTES = int(os.environ.get('QUEUESMART_PROFILE_LOG_BYTES', 5 * 1024 * 1024))
+STAGE_LOG_BACKUPS = 3
+# Peak memory comes from tracemalloc, which slows the traced code; QUEUESMART_PROFILE_MEMORY=0 skips it
+TRACE_MEMORY = os.environ.get('QUEUESMART_PROFILE_MEMORY', '1') != '0'
+
+STAGE_LOG = 'stages.jsonl'
+
+_local = threading.local()
+_logger = None
+_logger_lock = threading.Lock()
+
+def _stage_logger():
+    """JSON-lines logger for stage records, rotated by size"""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(PROFILE_DIR, STAGE_LOG), maxBytes=STAGE_LOG_BYTES, backupCount=STAGE_LOG_BACKUPS
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _logger = logging.getLogger('queuesmart.profiling')
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            _logger.addHandler(handler)
+    return _logger
+
+@contextlib.contextmanager
+def _timed_stage(name, fields):
+    # Stack of [stage name, peak traced bytes seen so far] for this thread's open stages
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+
+    started_tracing = TRACE_MEMORY and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    # Peaks are per stage: bank the enclosing stage's peak so far, then restart the count
+    if stack:
+        stack[-1][1] = max(stack[-1][1], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    stack.append([name, 0])
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield fields
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        path = ';'.join(frame[0] for frame in stack)
+        peak = max(stack.pop()[1], tracemalloc.get_traced_memory()[1])
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+        if started_tracing:
+            tracemalloc.stop()
+        record = {
+            'timestamp': datetime.now().isoformat(), 'pid': os.getpid(), 'stage': name, 'stack': path,
+            'wall_s': round(wall, 6), 'cpu_s': round(cpu, 6),
+            'peak_mb': round(peak / 1e6, 3) if TRACE_MEMORY else None, **fields
+        }
+        _stage_logger().info(json.dumps(record, default=str))
+
+def stage(name, **fields):
+    """Context manager timing one pipeline stage when profiling is enabled
+
+    Records wall time, CPU time and the peak traced memory of the stage to
+    PROFILE_DIR/stages.jsonl, one JSON object per line, with ``stack``
+    naming the enclosing stages. Extra ``fields`` (and anything the body
+    adds to the yielded dict) are stored with the record. When profiling
+    is disabled this is a no-op context.
+    """
+    if not ENABLED:
+        return contextlib.nullcontext({})
+    return _timed_stage(name, dict(fields))
+
+def timed(name=None):
+    """Decorator recording every call of a function as a stage; a no-op when disabled"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_stage(name or func.__name__, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorate
+
+def _prune_profiles(prefix):
+    """Keep only the newest MAX_PROFILES profile files for a prefix"""
+    paths = sorted(glob.glob(os.path.join(PROFILE_DIR, f'{prefix}-*.prof')), key=os.path.getmtime)
+    for path in paths[:-MAX_PROFILES] if MAX_PROFILES > 0 else paths:
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
+def sampled_profile(name, rate=None):
+    """Decorator that cProfiles a random fraction of calls when profiling is enabled
+
+    Each sampled call writes a pstats file PROFILE_DIR/<name>-<time>-<pid>.prof,
+    readable by pstats, snakeviz or flameprof; only the newest MAX_PROFILES
+    are kept. When profiling is disabled the function is returned unchanged.
+    """
+    rate = SAMPLE_RATE if rate is None else rate
+
+    def decorate(func):
+        if not ENABLED or rate <= 0:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if random.random() >= rate:
+                return func(*args, **kwargs)
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+                profiler.dump_stats(os.path.join(PROFILE_DIR, f'{name}-{stamp}-{os.getpid()}.prof'))
+                _prune_profiles(name)
+
+        return wrapper
+    return decorate
+
+def read_stage_records(profile_dir=PROFILE_DIR):
+    """All stage records from the current and rotated stage logs, oldest file first"""
+    base = os.path.join(profile_dir, STAGE_LOG)
+    paths = [f'{base}.{i}' for i in range(STAGE_LOG_BACKUPS, 0, -1)] + [base]
+    records = []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path) as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+def folded_stacks(records, metric='wall_s'):
+    """Stage records as folded stacks ("a;b;c <microseconds>"), the input format of
+    flamegraph.pl and speedscope; each stage's own time excludes its child stages"""
+    totals = defaultdict(float)
+    children = defaultdict(float)
+    for record in records:
+        totals[record['stack']] += record[metric]
+        parent, _, _ = record['stack'].rpartition(';')
+        if parent:
+            children[parent] += record[metric]
+    return [
+        f"{stack} {max(0, round((seconds - children[stack]) * 1e6))}"
+        for stack, seconds in sorted(totals.items())
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or export recorded stage timings")
+    parser.add_argument('command', choices=['summary', 'folded'])
+    parser.add_argument('--dir', default=PROFILE_DIR)
+    parser.add_argument('--metric', choices=['wall_s', 'cpu_s'], default='wall_s')
+    args = parser.parse_args()
+
+    records = read_stage_records(args.dir)
+    if not records:
+        print(f"No stage records in {args.dir}; run with QUEUESMART_PROFILE=1 first")
+        return 1
+
+    if args.command == 'folded':
+        print('\n'.join(folded_stacks(records, args.metric)))
+        return 0
+
+    by_stack = defaultdict(list)
+    for record in records:
+        by_stack[record['stack']].append(record)
+    print(f"{'stage':<40} {'runs':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+    for stack, runs in sorted(by_stack.items()):
+        print(f"{stack:<40} {len(runs):>5} {sum(r['wall_s'] for r in runs) / len(runs):>9.3f} "
+              f"{sum(r['cpu_s'] for r in runs) / len(runs):>9.3f} {max(r['peak_mb'] or 0 for r in runs):>9.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
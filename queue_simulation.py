@@ -0,0 +1,172 @@
+import numpy as np
+
+from data.data_generator import HOUR_WEIGHTS, DAY_MULTIPLIER, BASE_CUSTOMERS, SERVICE_TYPES
+
+DEFAULT_OPEN_HOUR = 8
+WAIT_PERCENTILES = [50, 90, 95]
+
+def generator_arrival_profile(day_of_week):
+    """Expected arrivals per opening hour from the data generator's weights"""
+    mean_daily = (BASE_CUSTOMERS['min'] + BASE_CUSTOMERS['max']) / 2
+    mean_daily *= DAY_MULTIPLIER.get(day_of_week, 1.0)
+    return mean_daily * np.asarray(HOUR_WEIGHTS, dtype=float)
+
+def history_arrival_profile(df, branch, day_of_week, open_hour=DEFAULT_OPEN_HOUR, n_hours=8):
+    """Average arrivals per opening hour for a branch and weekday in processed history
+
+    Returns None when the history has no days for that branch and weekday.
+    """
+    subset = df[(df['branch'] == branch) & (df['day_of_week'] == day_of_week)]
+    n_days = subset['date'].nunique()
+    if n_days == 0:
+        return None
+
+    hours = range(open_hour, open_hour + n_hours)
+    counts = subset.groupby('hour').size().reindex(hours, fill_value=0)
+    return counts.to_numpy(dtype=float) / n_days
+
+def sample_service_durations(rng, size, service_mix=None):
+    """Draw service durations (minutes) using the generator's service mix"""
+    service_mix = SERVICE_TYPES if service_mix is None else service_mix
+    names = list(service_mix)
+    weights = np.array([service_mix[s]['weight'] for s in names], dtype=float)
+    low = np.array([service_mix[s]['min'] for s in names])
+    high = np.array([service_mix[s]['max'] for s in names])
+
+    choice = rng.choice(len(names), size=size, p=weights / weights.sum())
+    return rng.integers(low[choice], high[choice] + 1).astype(float)
+
+def sample_day(arrival_rates, replications, rng, service_mix=None):
+    """Draw arrivals and service durations for many replications of one day
+
+    Arrivals are Poisson per hour and uniform within the hour. Returns
+    ``arrivals`` (minutes after opening, sorted per replication, padded
+    with inf) and ``durations``, both of shape (replications, max arrivals).
+    """
+    rates = np.asarray(arrival_rates, dtype=float)
+    n_hours = len(rates)
+
+    counts = rng.poisson(rates, size=(replications, n_hours))
+    per_replication = counts.sum(axis=1)
+    n_max = max(int(per_replication.max()), 1)
+
+    flat_counts = counts.ravel()
+    hour_idx = np.repeat(np.tile(np.arange(n_hours), replications), flat_counts)
+    rep_idx = np.repeat(np.arange(replications), per_replication)
+    times = hour_idx * 60 + rng.random(len(hour_idx)) * 60
+
+    # Arrivals are already grouped by replication, so sort within each group
+    order = np.lexsort((times, rep_idx))
+    starts = np.concatenate(([0], np.cumsum(per_replication)[:-1]))
+    position = np.arange(len(order)) - starts[rep_idx]
+
+    arrivals = np.full((replications, n_max), np.inf)
+    arrivals[rep_idx, position] = times[order]
+    durations = sample_service_durations(rng, (replications, n_max), service_mix)
+    return arrivals, durations
+
+def expand_teller_schedule(tellers, n_hours):
+    """Turn a teller count or per-hour list into a per-hour schedule"""
+    if isinstance(tellers, (list, tuple)):
+        if len(tellers) != n_hours:
+            raise ValueError(f"Teller schedule must have {n_hours} hourly values")
+        return [int(t) for t in tellers]
+    return [int(tellers)] * n_hours
+
+def _duty_tables(tellers_by_hour):
+    """On-duty flags and next on-duty start times per teller slot and hour
+
+    An extra overflow hour after closing keeps the closing staff on duty so
+    the queue drains.
+    """
+    staffing = np.asarray(tellers_by_hour, dtype=int)
+    staffing = np.append(staffing, max(int(staffing[-1]), 1))
+    n_slots = max(int(staffing.max()), 1)
+    n_hours = len(staffing)
+
+    on_duty = np.arange(n_slots)[:, None] < staffing[None, :]
+    next_on = np.full((n_slots, n_hours), np.inf)
+    upcoming = np.full(n_slots, np.inf)
+    for h in range(n_hours - 1, -1, -1):
+        upcoming = np.where(on_duty[:, h], h * 60.0, upcoming)
+        next_on[:, h] = upcoming
+    return on_duty, next_on
+
+def simulate_waits(arrivals, durations, tellers_by_hour):
+    """Multi-teller FIFO simulation vectorized across replications
+
+    ``tellers_by_hour`` gives the tellers on duty in each opening hour. Each
+    customer, in arrival order, goes to the teller who can start serving
+    them earliest; a teller only starts a service while on duty but always
+    finishes one in progress. Returns waits in minutes, NaN for padding.
+    """
+    replications, n_max = arrivals.shape
+    on_duty, next_on = _duty_tables(tellers_by_hour)
+    n_slots, n_hours = on_duty.shape
+    rows = np.arange(replications)
+    slots = np.arange(n_slots)[None, :]
+
+    free = np.broadcast_to(next_on[:, 0], (replications, n_slots)).copy()
+    waits = np.full((replications, n_max), np.nan)
+
+    for i in range(n_max):
+        t = arrivals[:, i]
+        active = np.isfinite(t)
+        if not active.any():
+            break
+        t = np.where(active, t, 0.0)
+
+        ready = np.maximum(free, t[:, None])
+        hour = np.minimum(ready // 60, n_hours - 1).astype(int)
+        start = np.where(on_duty[slots, hour], ready, next_on[slots, hour])
+
+        teller = start.argmin(axis=1)
+        service_start = start[rows, teller]
+        waits[:, i] = np.where(active, service_start - t, np.nan)
+        free[rows, teller] = np.where(
+            active, service_start + durations[:, i], free[rows, teller]
+        )
+
+    return waits
+
+def summarize_waits(arrivals, waits, open_hour=DEFAULT_OPEN_HOUR, n_hours=8,
+                    percentiles=WAIT_PERCENTILES):
+    """Wait statistics per arrival hour, pooled across replications"""
+    replications = arrivals.shape[0]
+    active = np.isfinite(arrivals)
+    hour_idx = (np.where(active, arrivals, -60.0) // 60).astype(int)
+
+    hours = []
+    for h in range(n_hours):
+        hour_waits = waits[hour_idx == h]
+        entry = {
+            'hour': open_hour + h,
+            'arrivals_mean': round(len(hour_waits) / replications, 2)
+        }
+        if len(hour_waits):
+            entry['wait_mean'] = round(float(hour_waits.mean()), 2)
+            for p, value in zip(percentiles, np.percentile(hour_waits, percentiles)):
+                entry[f'wait_p{p}'] = round(float(value), 2)
+        else:
+            entry['wait_mean'] = None
+            for p in percentiles:
+                entry[f'wait_p{p}'] = None
+        hours.append(entry)
+
+    all_waits = waits[active]
+    day = {'customers_mean': round(len(all_waits) / replications, 2)}
+    if len(all_waits):
+        day['wait_mean'] = round(float(all_waits.mean()), 2)
+        for p, value in zip(percentiles, np.percentile(all_waits, percentiles)):
+            day[f'wait_p{p}'] = round(float(value), 2)
+        day['share_waiting_over_15min'] = round(float(np.mean(all_waits > 15)), 3)
+
+    return {'hours': hours, 'day': day}
+
+def simulate_day(arrival_rates, tellers_by_hour, replications=100, seed=None,
+                 open_hour=DEFAULT_OPEN_HOUR, service_mix=None):
+    """Simulate one branch day and summarize waits per hour"""
+    rng = np.random.default_rng(seed)
+    arrivals, durations = sample_day(arrival_rates, replications, rng, service_mix)
+    waits = simulate_waits(arrivals, durations, tellers_by_hour)
+    return summarize_waits(arrivals, waits, open_hour, len(arrival_rates))
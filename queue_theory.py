@@ -0,0 +1,272 @@
+import argparse
+import calendar
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data.data_generator import SERVICE_TYPES
+from queue_simulation import generator_arrival_profile, DEFAULT_OPEN_HOUR
+from branch_registry import load_registry
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'data', 'config.json')
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+
+# Utilization at which the steady-state wait is evaluated for hours whose
+# load meets or exceeds the tellers (there the true M/G/c wait is unbounded)
+MAX_UTILIZATION = 0.99
+
+def erlang_c(tellers, offered_load):
+    """Probability an arrival has to wait in an M/M/c queue (Erlang C), elementwise
+
+    ``offered_load`` is arrival rate times mean service time, in erlangs.
+    Uses the Erlang B recursion, which stays stable for large loads; the
+    loop runs to the largest teller count, not the number of requests.
+    """
+    tellers = np.asarray(tellers, dtype=int)
+    load = np.asarray(offered_load, dtype=float)
+    blocking = np.ones(np.broadcast(tellers, load).shape)
+    for k in range(1, int(tellers.max(initial=1)) + 1):
+        step = load * blocking / (k + load * blocking)
+        blocking = np.where(k <= tellers, step, blocking)
+    utilization = np.minimum(load / tellers, MAX_UTILIZATION)
+    return blocking / (1 - utilization * (1 - blocking))
+
+def steady_state_wait(arrival_rate, mean_service, service_scv, tellers):
+    """Mean queue wait in an M/G/c queue (Allen-Cunneen), in the units of mean_service
+
+    ``arrival_rate`` is per unit of mean_service and ``service_scv`` is the
+    squared coefficient of variation of service times (1 for exponential,
+    which gives the exact M/M/c wait). Load is capped at MAX_UTILIZATION
+    per teller, so overloaded hours get a large finite wait.
+    """
+    tellers = np.asarray(tellers, dtype=int)
+    mean_service = np.asarray(mean_service, dtype=float)
+    load = np.minimum(np.asarray(arrival_rate, dtype=float) * mean_service, MAX_UTILIZATION * tellers)
+    waiting = erlang_c(tellers, load)
+    return waiting * mean_service / (tellers - load) * (1 + np.asarray(service_scv, dtype=float)) / 2
+
+def wait_given_queue(queue_length, tellers, mean_service, residual_service):
+    """Mean wait of an arrival finding ``queue_length`` customers ahead in an M/G/c queue
+
+    With fewer customers ahead than tellers a teller is free. Otherwise
+    the arrival waits for the first of c busy tellers to finish (about a
+    mean residual service over c) and then for the queue ahead of it to
+    clear at c services per mean service time. For exponential service
+    the residual equals the mean and this is the exact M/M/c wait.
+    """
+    queue_length = np.asarray(queue_length, dtype=float)
+    tellers = np.asarray(tellers, dtype=float)
+    ahead = queue_length - tellers
+    return np.where(ahead < 0, 0.0, (ahead * mean_service + residual_service) / tellers)
+
+class QueueingEstimator:
+    """Analytic queue waits per branch from arrival rates, service moments and tellers
+
+    Fitted once from processed history into small arrays: arrivals per
+    minute by branch, weekday and hour (the generator's profile where a
+    branch has no history for a weekday), the mean and second moment of
+    service time per service type, each branch's service mix and its
+    tellers from the branch registry. A FIFO queue serves whatever mix
+    arrives, so waits use the branch's mixed service moments; the
+    arriving customer's own service type does not change its wait.
+    Steady-state waits are tabulated at fit time for every branch, weekday
+    and hour, so every estimate is a few array lookups and numpy
+    expressions, for one request or a whole batch.
+    """
+
+    def __init__(self, branches, services, tellers, arrival_rates, service_moments, service_mix):
+        self.branches = list(branches)
+        self.branch_index = {name: i for i, name in enumerate(self.branches)}
+        self.branch_lookup = pd.Index(self.branches)
+        self.services = list(services)
+        self.tellers = np.asarray(tellers, dtype=int)
+        # (branch, weekday, hour) -> arrivals per minute
+        self.arrival_rates = np.asarray(arrival_rates, dtype=float)
+        # (service, [mean, second moment]) in minutes and minutes squared
+        self.service_moments = np.asarray(service_moments, dtype=float)
+        # (branch, service) shares of arrivals
+        self.service_mix = np.asarray(service_mix, dtype=float)
+
+        mixed = self.service_mix @ self.service_moments
+        self.mean_service = mixed[:, 0]
+        self.residual_service = mixed[:, 1] / (2 * mixed[:, 0])
+        self.service_scv = mixed[:, 1] / mixed[:, 0] ** 2 - 1
+        # Steady-state waits for every branch, weekday and hour, so lookups do no queueing math
+        self.steady_waits = steady_state_wait(
+            self.arrival_rates, self.mean_service[:, None, None],
+            self.service_scv[:, None, None], self.tellers[:, None, None]
+        )
+
+    @classmethod
+    def fit(cls, df, registry=None, services=None, tellers=None):
+        """Estimate arrival rates, service moments and service mix from processed history
+
+        Tellers come from the branch registry; ``tellers`` overrides them
+        with one count for every branch or a dict of counts by branch.
+        """
+        registry = registry or load_registry()
+        branches = registry.names
+        services = list(services or SERVICE_TYPES)
+        if not isinstance(tellers, dict):
+            tellers = dict.fromkeys(branches, tellers) if tellers else {}
+        tellers = [tellers.get(b) or registry.by_name[b].tellers for b in branches]
+
+        # Generator defaults for anything the history has not seen
+        rates = np.zeros((len(branches), 7, 24))
+        for day in range(7):
+            profile = generator_arrival_profile(day) / 60
+            rates[:, day, DEFAULT_OPEN_HOUR:DEFAULT_OPEN_HOUR + len(profile)] = profile
+        moments = np.full((len(services), 2), np.nan)
+        for i, name in enumerate(services):
+            if name in SERVICE_TYPES:
+                durations = np.arange(SERVICE_TYPES[name]['min'], SERVICE_TYPES[name]['max'] + 1)
+                moments[i] = durations.mean(), (durations ** 2).mean()
+        weights = np.array([SERVICE_TYPES.get(name, {}).get('weight', 0.0) for name in services])
+        mix = np.tile(weights / weights.sum(), (len(branches), 1))
+
+        df = df[df['branch'].isin(branches) & df['service_type'].isin(services)]
+        if len(df):
+            branch_idx = df['branch'].map({b: i for i, b in enumerate(branches)}).to_numpy()
+            service_idx = df['service_type'].map({s: i for i, s in enumerate(services)}).to_numpy()
+            days = df['day_of_week'].to_numpy(dtype=int)
+            hours = df['hour'].to_numpy(dtype=int)
+
+            counts = np.zeros_like(rates)
+            np.add.at(counts, (branch_idx, days, hours), 1)
+            n_days = df.groupby(['branch', 'day_of_week'])['date'].nunique()
+            for (branch, day), n in n_days.items():
+                rates[branches.index(branch), day] = counts[branches.index(branch), day] / (n * 60)
+
+            durations = df['service_duration_minutes'].to_numpy(dtype=float)
+            served = np.bincount(service_idx, minlength=len(services))
+            seen = served > 0
+            moments[seen, 0] = np.bincount(service_idx, durations, len(services))[seen] / served[seen]
+            moments[seen, 1] = np.bincount(service_idx, durations ** 2, len(services))[seen] / served[seen]
+
+            by_branch = np.zeros((len(branches), len(services)))
+            np.add.at(by_branch, (branch_idx, service_idx), 1)
+            observed = by_branch.sum(axis=1) > 0
+            mix[observed] = by_branch[observed] / by_branch[observed].sum(axis=1, keepdims=True)
+
+        # Service types neither in history nor the generator get the mean of the known ones
+        missing = np.isnan(moments[:, 0])
+        if missing.any():
+            moments[missing] = np.nanmean(moments, axis=0)
+        return cls(branches, services, tellers, rates, moments, mix)
+
+    def _branch_idx(self, branches):
+        index = self.branch_lookup.get_indexer(np.atleast_1d(branches))
+        if (index < 0).any():
+            unknown = sorted(set(np.atleast_1d(branches)[index < 0]))
+            raise ValueError(f"Unknown branch(es): {', '.join(unknown)}")
+        return index
+
+    def _steady_state(self, b, days_of_week, hours):
+        return self.steady_waits[b, days_of_week, hours]
+
+    def _given_queue(self, b, queue_lengths):
+        return wait_given_queue(queue_lengths, self.tellers[b], self.mean_service[b], self.residual_service[b])
+
+    def steady_state_waits(self, branches, days_of_week, hours):
+        """Expected wait (minutes) at each branch, weekday and hour, from Erlang C"""
+        return self._steady_state(self._branch_idx(branches), np.asarray(days_of_week, dtype=int),
+                                  np.asarray(hours, dtype=int))
+
+    def waits_given_queue(self, branches, queue_lengths):
+        """Expected wait (minutes) of arrivals finding ``queue_lengths`` customers ahead"""
+        return self._given_queue(self._branch_idx(branches), queue_lengths)
+
+    def estimate(self, branch, hour, day_of_week, current_queue_length=None):
+        """Expected wait for one request; from the queue ahead when it is known, else steady state"""
+        b = self.branch_index.get(branch)
+        if b is None:
+            raise ValueError(f"Unknown branch(es): {branch}")
+        if current_queue_length is None:
+            return float(self._steady_state(b, int(day_of_week), int(hour)))
+        return float(self._given_queue(b, current_queue_length))
+
+    def utilization(self, branch, day_of_week, hour):
+        """Offered load per teller (may exceed 1 for overloaded hours)"""
+        b = self.branch_index[branch]
+        return float(self.arrival_rates[b, day_of_week, hour] * self.mean_service[b] / self.tellers[b])
+
+class QueueingBaseline:
+    """Predicts waits of encoded feature rows with a QueueingEstimator, like a fitted model
+
+    Lets evaluate_model score the analytic estimate on the same test set
+    as the trained models: branch, weekday, hour and queue length are read
+    from the prepared feature matrix and the branch code is decoded.
+    """
+
+    def __init__(self, estimator, encoders, feature_columns, steady_state=False):
+        self.estimator = estimator
+        self.branch_names = np.asarray(encoders['branch'].classes_)
+        self.columns = {name: i for i, name in enumerate(feature_columns)}
+        self.steady_state = steady_state
+
+    def predict(self, X):
+        X = np.asarray(X)
+        column = lambda name: X[:, self.columns[name]].astype(int)
+        branches = self.branch_names[column('branch_encoded')]
+        if self.steady_state:
+            return self.estimator.steady_state_waits(branches, column('day_of_week'), column('hour'))
+        return self.estimator.waits_given_queue(branches, column('queue_length_on_arrival'))
+
+def observed_tellers(df):
+    """Most customers in service at once at each branch, from processed history's service times"""
+    n = len(df)
+    events = pd.DataFrame({
+        'branch': np.concatenate([df['branch'].to_numpy()] * 2),
+        'time': np.concatenate([pd.to_datetime(df['service_start_time']).to_numpy(),
+                                pd.to_datetime(df['service_end_time']).to_numpy()]),
+        'change': np.repeat([1, -1], n)
+    })
+    # At equal times a finishing customer frees the teller before the next one starts
+    events = events.sort_values(['branch', 'time', 'change'], kind='stable')
+    busy = events.groupby('branch')['change'].cumsum()
+    return {branch: int(count) for branch, count in busy.groupby(events['branch']).max().items()}
+
+def add_erlang_feature(df, estimator, column='erlang_c_wait'):
+    """Add the steady-state Erlang C wait for each row's branch, weekday and hour"""
+    df = df.copy()
+    df[column] = estimator.steady_state_waits(df['branch'].to_numpy(), df['day_of_week'], df['hour'])
+    return df
+
+def build_estimator(history_path=HISTORY_PATH):
+    """Fit an estimator from processed history (generator defaults when there is none)"""
+    columns = ['branch', 'service_type', 'service_duration_minutes', 'day_of_week', 'hour', 'date']
+    if os.path.exists(history_path):
+        df = pd.read_csv(history_path, usecols=columns)
+    else:
+        df = pd.DataFrame(columns=columns)
+    return QueueingEstimator.fit(df)
+
+def main():
+    parser = argparse.ArgumentParser(description="Erlang C queue waits per branch and hour")
+    parser.add_argument('--day', type=int, default=0, help="Weekday (0 = Monday)")
+    parser.add_argument('--history', default=HISTORY_PATH)
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    hours = range(config['working_hours']['start'], config['working_hours']['end'])
+    estimator = build_estimator(args.history)
+
+    print(f"M/G/c waits on {calendar.day_name[args.day]}")
+    print("=" * 50)
+    for i, branch in enumerate(estimator.branches):
+        print(f"{branch}: {estimator.tellers[i]} tellers, mean service {estimator.mean_service[i]:.1f} min "
+              f"(SCV {estimator.service_scv[i]:.2f})")
+        waits = estimator.steady_state_waits([branch] * len(hours), [args.day] * len(hours), hours)
+        for hour, wait in zip(hours, waits):
+            load = estimator.utilization(branch, args.day, hour)
+            flag = " (overloaded)" if load >= 1 else ""
+            print(f"  {hour:02d}:00  utilization {load:5.2f}  wait {wait:7.1f} min{flag}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,15 @@
 from data_processor import process_banking_data
+from pipeline_cache import PipelineCache
 import pandas as pd
+import sys
 
 # Run the complete analysis
 print("QueueSmart Data Analysis Pipeline")
 print("=" * 40)
 
-# Process the data
-df = process_banking_data('data/sample_banking_data.csv')
+# Process the data, reusing cached stages unless --no-cache is given
+cache = PipelineCache(enabled='--no-cache' not in sys.argv)
+df = process_banking_data('data/sample_banking_data.csv', cache)
 
 # Display summary statistics
 print("\n=== SUMMARY STATISTICS ===")
@@ -24,4 +27,5 @@ print(f"Average wait during peak hours: {peak_wait:.1f} minutes")
 print(f"Average wait during normal hours: {normal_wait:.1f} minutes")
 print(f"Peak hour impact: {((peak_wait/normal_wait - 1) * 100):.1f}% longer wait times")
 
+cache.print_summary()
 print("\nAnalysis complete! Check the generated plots and processed data files.")
\ No newline at end of file
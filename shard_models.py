@@ -0,0 +1,236 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+from models.ml_predictor import (
+    prepare_ml_data, split_data, evaluate_model, model_params,
+    train_random_forest, train_gradient_boosting, train_hist_gradient_boosting
+)
+from branch_registry import load_registry, DEFAULT_REGION
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+SHARD_DIR = os.path.join(PROJECT_ROOT, 'models', 'shards')
+MANIFEST_NAME = 'manifest.json'
+
+# How branches are grouped into shards: one per branch, or one per registry region
+GROUPINGS = ('branch', 'region')
+
+# Models a shard can be; the tuned forest's grid search is too costly to repeat per shard
+SHARD_TRAINERS = {
+    'random_forest': train_random_forest,
+    'gradient_boosting': train_gradient_boosting,
+    'hist_gradient_boosting': train_hist_gradient_boosting
+}
+
+def shard_key(branch, grouping, registry):
+    """Shard a branch belongs to under a grouping"""
+    if grouping == 'branch':
+        return branch
+    entry = registry.get(branch)
+    return entry.region if entry is not None else DEFAULT_REGION
+
+def shard_filename(key):
+    return f"{key.lower().replace(' ', '_')}.joblib"
+
+def _train_shard(job):
+    """Fit, evaluate and save one shard; runs in a worker process"""
+    key, frame, model_key, params, test_size, path = job
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, encoders, feature_columns = prepare_ml_data(frame)
+        if test_size:
+            X_train, X_test, y_train, y_test = split_data(X, y, test_size)
+        else:
+            X_train, y_train = X, y
+        model = SHARD_TRAINERS[model_key](X_train, y_train, params)
+        metrics = evaluate_model(model, X_test, y_test, key)[0] if test_size else {}
+    seconds = time.perf_counter() - started
+
+    model_data = {
+        'model': model,
+        'encoders': encoders,
+        'feature_columns': feature_columns,
+        'scaler': None,
+        'model_name': f"{model_key} shard {key}",
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'shard': key
+    }
+    # Replace the live shard atomically so a serving process never loads half a file
+    tmp = f'{path}.tmp'
+    joblib.dump(model_data, tmp)
+    os.replace(tmp, path)
+    return {
+        'file': os.path.basename(path),
+        'branches': sorted(frame['branch'].unique()),
+        'rows': len(frame),
+        'train_seconds': round(seconds, 3),
+        'size_bytes': os.path.getsize(path),
+        'trained': model_data['timestamp'],
+        **{m: round(float(metrics[m]), 3) for m in ('rmse', 'mae', 'accuracy_5min') if m in metrics}
+    }
+
+def read_manifest(shard_dir=SHARD_DIR):
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(manifest, shard_dir=SHARD_DIR):
+    """Replace the manifest atomically so a serving process never reads half a file"""
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+def train_shards(df, grouping='branch', model_key='random_forest', params=None, keys=None,
+                 workers=1, test_size=0.2, shard_dir=SHARD_DIR, registry=None):
+    """Train one model per shard of processed history, in parallel processes when workers > 1
+
+    ``keys`` limits training to those shards, leaving the others' files and
+    manifest entries as they are, so a single shard can be retrained on
+    its own. Each shard holds out ``test_size`` of its rows for the metrics
+    in the manifest. Returns the manifest and the wall-clock seconds.
+    """
+    registry = registry or load_registry()
+    groups = df['branch'].map(lambda b: shard_key(b, grouping, registry))
+    available = list(dict.fromkeys(groups))
+    keys = available if keys is None else list(keys)
+    missing = [k for k in keys if k not in available]
+    if missing:
+        raise ValueError(f"No history for shard(s): {', '.join(missing)}")
+
+    manifest = read_manifest(shard_dir)
+    if manifest is None or manifest['grouping'] != grouping or manifest['model'] != model_key:
+        if manifest is not None and len(keys) < len(available):
+            raise ValueError(f"Existing shards are per {manifest['grouping']} ({manifest['model']}); "
+                             f"retrain them all to switch")
+        for entry in (manifest or {}).get('shards', {}).values():
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(shard_dir, entry['file']))
+        manifest = {'grouping': grouping, 'model': model_key, 'shards': {}}
+
+    os.makedirs(shard_dir, exist_ok=True)
+    params = model_params(model_key, params)
+    jobs = [
+        (key, df[groups == key], model_key, params, test_size, os.path.join(shard_dir, shard_filename(key)))
+        for key in keys
+    ]
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(_train_shard, jobs))
+    else:
+        outcomes = [_train_shard(job) for job in jobs]
+    seconds = time.perf_counter() - started
+
+    manifest['shards'].update(zip(keys, outcomes))
+    write_manifest(manifest, shard_dir)
+    return manifest, seconds
+
+class ShardRouter:
+    """Routes branches to their shard models, loading each shard on first use
+
+    The manifest is re-read when its file changes, and a shard whose entry
+    changed (because it was retrained) is dropped and reloaded on its next
+    request; the other loaded shards are kept.
+    """
+
+    def __init__(self, shard_dir=SHARD_DIR, registry=None, prepare=None):
+        self.shard_dir = shard_dir
+        self.registry = registry or load_registry()
+        self.prepare = prepare
+        self.manifest = {'grouping': 'branch', 'shards': {}}
+        self.manifest_mtime = None
+        self.loaded = {}
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the manifest if it changed on disk"""
+        path = os.path.join(self.shard_dir, MANIFEST_NAME)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime == self.manifest_mtime:
+            return
+        manifest = read_manifest(self.shard_dir) or {'grouping': 'branch', 'shards': {}}
+        with self.lock:
+            old = self.manifest['shards']
+            self.loaded = {k: v for k, v in self.loaded.items() if manifest['shards'].get(k) == old.get(k)}
+            self.manifest, self.manifest_mtime = manifest, mtime
+
+    def shard_for(self, branch):
+        """Shard key serving a branch, or None when no shard covers it"""
+        key = shard_key(branch, self.manifest['grouping'], self.registry)
+        return key if key in self.manifest['shards'] else None
+
+    def model_for(self, branch):
+        """Model data of the branch's shard, or None to use the global model"""
+        self.refresh()
+        key = self.shard_for(branch)
+        if key is None:
+            return None
+        model_data = self.loaded.get(key)
+        if model_data is None:
+            with self.lock:
+                model_data = self.loaded.get(key)
+                if model_data is None:
+                    model_data = joblib.load(os.path.join(self.shard_dir, self.manifest['shards'][key]['file']))
+                    if self.prepare is not None:
+                        self.prepare(model_data)
+                    self.loaded[key] = model_data
+        return model_data
+
+    def info(self):
+        return {
+            'grouping': self.manifest['grouping'],
+            'model': self.manifest.get('model'),
+            'shards': {
+                key: {**entry, 'loaded': key in self.loaded}
+                for key, entry in self.manifest['shards'].items()
+            }
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Train per-branch or per-region shard models")
+    parser.add_argument('--data', default=HISTORY_PATH)
+    parser.add_argument('--by', choices=GROUPINGS, default='branch')
+    parser.add_argument('--model', choices=list(SHARD_TRAINERS), default='random_forest')
+    parser.add_argument('--shard', action='append', help="Retrain only this shard (repeatable)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--dir', default=SHARD_DIR)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    try:
+        manifest, seconds = train_shards(df, args.by, args.model, keys=args.shard, workers=args.workers,
+                                         test_size=args.test_size, shard_dir=args.dir)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    trained = args.shard or list(manifest['shards'])
+    print(f"Trained {len(trained)} {args.model} shard(s) per {args.by} in {seconds:.2f}s "
+          f"with {args.workers} worker(s)")
+    print(f"{'shard':<20} {'rows':>8} {'train s':>8} {'size KB':>9} {'rmse':>7} {'mae':>7}")
+    for key in trained:
+        entry = manifest['shards'][key]
+        print(f"{key:<20} {entry['rows']:>8,} {entry['train_seconds']:>8.2f} {entry['size_bytes'] / 1024:>9.1f} "
+              f"{entry.get('rmse', float('nan')):>7.2f} {entry.get('mae', float('nan')):>7.2f}")
+    print(f"Manifest saved to {os.path.join(args.dir, MANIFEST_NAME)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
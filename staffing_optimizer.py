@@ -0,0 +1,160 @@
+import argparse
+import calendar
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from queue_simulation import sample_day, simulate_waits, generator_arrival_profile
+from demand_forecast import build_forecast, CONFIG_PATH
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STAFFING_PLAN_PATH = os.path.join(PROJECT_ROOT, 'data', 'staffing_plan.csv')
+
+def hour_wait_quantile(arrivals, durations, schedule, hour_idx, quantile=90):
+    """Wait quantile for customers arriving in one opening hour
+
+    Later arrivals cannot delay earlier ones under FIFO, so only customers
+    arriving up to the end of that hour are simulated.
+    """
+    end = (hour_idx + 1) * 60
+    n_cols = max(int((arrivals < end).sum(axis=1).max()), 1)
+    window = arrivals[:, :n_cols]
+    window = np.where(window < end, window, np.inf)
+
+    waits = simulate_waits(window, durations[:, :n_cols], schedule)
+    in_hour = waits[(window >= hour_idx * 60) & np.isfinite(window)]
+    if len(in_hour) == 0:
+        return 0.0
+    return float(np.percentile(in_hour, quantile))
+
+def optimize_day(arrival_rates, sla_minutes, quantile=90, min_tellers=1, max_tellers=12,
+                 replications=100, seed=42):
+    """Fewest tellers per hour whose simulated wait quantile stays under the SLA
+
+    Hours are staffed in order. For each hour a bisection over the teller
+    count (waits are monotone in tellers) keeps the earlier hours fixed and
+    later hours at the maximum. Every evaluation reuses the same sampled
+    days (common random numbers), so comparisons between counts are not
+    swamped by sampling noise. A final pass re-checks the whole schedule
+    and adds tellers where the lower later staffing pushed an hour over.
+    """
+    rng = np.random.default_rng(seed)
+    arrivals, durations = sample_day(arrival_rates, replications, rng)
+    n_hours = len(arrival_rates)
+    schedule = [max_tellers] * n_hours
+    feasible = [True] * n_hours
+
+    def meets_sla(h, tellers):
+        trial = schedule[:h] + [tellers] + [max_tellers] * (n_hours - h - 1)
+        return hour_wait_quantile(arrivals, durations, trial, h, quantile) <= sla_minutes
+
+    for h in range(n_hours):
+        if not meets_sla(h, max_tellers):
+            feasible[h] = False
+            continue
+
+        low, high = min_tellers, max_tellers
+        while low < high:
+            mid = (low + high) // 2
+            if meets_sla(h, mid):
+                high = mid
+            else:
+                low = mid + 1
+        schedule[h] = low
+
+    # Re-check the final schedule hour by hour
+    waits = simulate_waits(arrivals, durations, schedule)
+    hour_of = np.where(np.isfinite(arrivals), arrivals, -60) // 60
+    for h in range(n_hours):
+        while feasible[h] and schedule[h] < max_tellers:
+            in_hour = waits[hour_of == h]
+            if len(in_hour) == 0 or np.percentile(in_hour, quantile) <= sla_minutes:
+                break
+            schedule[h] += 1
+            waits = simulate_waits(arrivals, durations, schedule)
+
+    rows = []
+    for h in range(n_hours):
+        in_hour = waits[hour_of == h]
+        wait_q = float(np.percentile(in_hour, quantile)) if len(in_hour) else 0.0
+        rows.append({
+            'tellers': schedule[h],
+            'expected_arrivals': round(float(arrival_rates[h]), 2),
+            f'wait_p{quantile}': round(wait_q, 2),
+            'wait_mean': round(float(in_hour.mean()), 2) if len(in_hour) else 0.0,
+            'meets_sla': bool(wait_q <= sla_minutes)
+        })
+    return rows
+
+def plan_staffing(branches=None, days=None, sla_minutes=15, quantile=90, source='forecast',
+                  min_tellers=1, max_tellers=12, replications=100, seed=42, forecast=None):
+    """Weekly staffing table for every branch, working day and opening hour
+
+    With ``source='forecast'`` the rates come from ``forecast``, or from
+    one fitted from history when none is given.
+    """
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+
+    hours = list(range(config['working_hours']['start'], config['working_hours']['end']))
+    branches = branches or config['bank_branches']
+    days = config['working_days'] if days is None else days
+    if source != 'forecast':
+        forecast = None
+    elif forecast is None:
+        forecast = build_forecast()
+
+    rows = []
+    for branch in branches:
+        for day in days:
+            if forecast is not None:
+                rates = np.array([forecast.weekday_rate(branch, day, hour) for hour in hours])
+            else:
+                rates = generator_arrival_profile(day)
+
+            day_rows = optimize_day(
+                rates, sla_minutes, quantile, min_tellers, max_tellers, replications, seed
+            )
+            for hour, row in zip(hours, day_rows):
+                rows.append(dict(
+                    branch=branch, day_of_week=day, day_name=calendar.day_name[day],
+                    hour=hour, **row
+                ))
+
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimum teller staffing that meets a wait-time SLA")
+    parser.add_argument('--sla', type=float, default=15, help="Wait target in minutes")
+    parser.add_argument('--quantile', type=int, default=90, help="Wait percentile held to the SLA")
+    parser.add_argument('--source', choices=['forecast', 'generator'], default='forecast')
+    parser.add_argument('--max-tellers', type=int, default=12)
+    parser.add_argument('--replications', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=STAFFING_PLAN_PATH)
+    args = parser.parse_args()
+
+    print("QueueSmart Staffing Optimizer")
+    print("=" * 40)
+    started = time.perf_counter()
+    plan = plan_staffing(
+        sla_minutes=args.sla, quantile=args.quantile, source=args.source,
+        max_tellers=args.max_tellers, replications=args.replications, seed=args.seed
+    )
+    elapsed = time.perf_counter() - started
+
+    summary = plan.pivot_table(index='branch', columns='day_of_week', values='tellers', aggfunc='sum')
+    summary.columns = [calendar.day_name[d] for d in summary.columns]
+    print(f"Teller-hours per day (p{args.quantile} wait <= {args.sla} min):")
+    print(summary.to_string())
+    if not plan['meets_sla'].all():
+        print(f"\n{(~plan['meets_sla']).sum()} hours cannot meet the SLA even with {args.max_tellers} tellers")
+
+    plan.to_csv(args.output, index=False)
+    print(f"\nPlan computed in {elapsed:.1f}s and saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
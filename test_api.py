@@ -68,6 +68,15 @@ def test_model_status():
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     print("-" * 50)
 
+def test_readiness():
+    """Test readiness probe"""
+    print("Testing readiness endpoint...")
+    
+    response = requests.get(f"{BASE_URL}/api/ready")
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
 def test_branches():
     """Test branches endpoint"""
     print("Testing branches endpoint...")
@@ -86,6 +95,101 @@ def test_services():
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     print("-" * 50)
 
+def test_simulation():
+    """Test the what-if staffing simulation endpoint"""
+    print("Testing simulation endpoint...")
+    
+    # One extra teller from 9 to 12 on Monday, compared with two all day
+    test_data = {
+        "branch": "Ikeja",
+        "day_of_week": 0,
+        "tellers": [2, 3, 3, 3, 2, 2, 2, 2],
+        "baseline_tellers": 2,
+        "replications": 100,
+        "seed": 42
+    }
+    
+    response = requests.post(f"{BASE_URL}/api/simulate", json=test_data)
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
+def test_best_time():
+    """Test the best time to visit planner endpoint"""
+    print("Testing best time endpoint...")
+    
+    params = {"branch": "Victoria Island", "service_type": "Transfer", "limit": 5}
+    response = requests.get(f"{BASE_URL}/api/best-time", params=params)
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
+def test_analytics():
+    """Test the historical analytics roll-up endpoint"""
+    print("Testing analytics endpoint...")
+    
+    params = {"by": "hour", "branch": "Victoria Island"}
+    response = requests.get(f"{BASE_URL}/api/analytics", params=params)
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
+def test_wait_percentiles():
+    """Test the observation feed and live wait percentiles"""
+    print("Testing wait percentiles endpoints...")
+    
+    # A wait observation, then a bare arrival for the rolling features
+    observation = {"branch": "Ikeja", "wait_time_minutes": 12.5}
+    response = requests.post(f"{BASE_URL}/api/observations", json=observation)
+    print(f"Status Code: {response.status_code}")
+    response = requests.post(f"{BASE_URL}/api/observations", json={"branch": "Ikeja"})
+    print(f"Status Code: {response.status_code}")
+    
+    params = {"branch": "Ikeja", "days": 1}
+    response = requests.get(f"{BASE_URL}/api/wait-percentiles", params=params)
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
+def test_events():
+    """Test appending queue events to the event log"""
+    print("Testing events endpoint...")
+    
+    events = {"events": [
+        {"branch": "Ikeja", "kind": "arrival", "customer_id": "T-101", "service_type": "Transfer"},
+        {"branch": "Ikeja", "kind": "service_start", "customer_id": "T-101", "value": 6.0, "teller": 1}
+    ]}
+    response = requests.post(f"{BASE_URL}/api/events", json=events)
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
+def test_model_drift():
+    """Test joining an observed wait to its prediction and the drift report"""
+    print("Testing model drift endpoint...")
+    
+    prediction = requests.post(f"{BASE_URL}/api/predict", json={
+        "branch": "Ikeja", "service_type": "Transfer", "hour": 10,
+        "day_of_week": 1, "service_duration": 5, "current_queue_length": 3
+    }).json()
+    observation = {"branch": "Ikeja", "wait_time_minutes": 14.0, "prediction_id": prediction.get("prediction_id")}
+    response = requests.post(f"{BASE_URL}/api/observations", json=observation)
+    print(f"Status Code: {response.status_code}")
+    
+    response = requests.get(f"{BASE_URL}/api/model/drift")
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
+def test_model_shadow():
+    """Test the shadow model report (enabled with QUEUESMART_SHADOW_MODEL)"""
+    print("Testing model shadow endpoint...")
+    
+    response = requests.get(f"{BASE_URL}/api/model/shadow")
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print("-" * 50)
+
 def main():
     print("QueueSmart API Testing Suite")
     print("=" * 50)
@@ -95,10 +199,18 @@ def main():
     try:
         test_health_check()
         test_model_status()
+        test_readiness()
         test_branches()
         test_services()
         test_prediction()
         test_invalid_prediction()
+        test_simulation()
+        test_best_time()
+        test_analytics()
+        test_wait_percentiles()
+        test_events()
+        test_model_drift()
+        test_model_shadow()
         
         print("All tests completed!")
         
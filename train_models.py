@@ -1,86 +1,218 @@
 from models.ml_predictor import *
+from pipeline_cache import PipelineCache, FileInput
+import profiling
+from feature_store import add_rolling_features, FEATURE_COLUMNS as ROLLING_FEATURES
+from queue_theory import QueueingEstimator, QueueingBaseline, add_erlang_feature, observed_tellers
+import argparse
+import json
 import pandas as pd
 
-def main():
+PROCESSED_DATA_PATH = 'data/processed_banking_data.csv'
+
+# History columns the queueing baseline is fitted from
+BASELINE_COLUMNS = ['branch', 'service_type', 'service_duration_minutes', 'day_of_week', 'hour', 'date',
+                    'service_start_time', 'service_end_time']
+
+# Pipeline key, display name and training function for every model
+MODELS = [
+    ('linear_regression', "Linear Regression", train_linear_regression),
+    ('random_forest', "Random Forest", train_random_forest),
+    ('gradient_boosting', "Gradient Boosting", train_gradient_boosting),
+    ('hist_gradient_boosting', "Hist Gradient Boosting", train_hist_gradient_boosting),
+    ('random_forest_tuned', "Random Forest Tuned", tune_random_forest),
+]
+
+def load_training_data(path, rolling_features=False, erlang_feature=False):
+    """Read processed data, prepare features and split into train and test sets
+    
+    rolling_features adds the feature store's recent-conditions columns,
+    replayed offline exactly as the API serves them live. erlang_feature
+    adds the steady-state Erlang C wait for each row's branch, weekday and
+    hour, from an estimator fitted on the same data as the API's.
+    """
+    df = pd.read_csv(path)
+    extra_features = []
+    if rolling_features:
+        df = add_rolling_features(df)
+        extra_features += ROLLING_FEATURES
+    if erlang_feature:
+        df = add_erlang_feature(df, QueueingEstimator.fit(df))
+        extra_features.append('erlang_c_wait')
+    X, y, encoders, feature_columns = prepare_ml_data(df, extra_features=extra_features or None)
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    return {
+        'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test,
+        'encoders': encoders, 'feature_columns': feature_columns
+    }
+
+def fit_model(data, trainer, params=None):
+    """Train one model; returns (model, scaler)"""
+    if params:
+        fitted = trainer(data['X_train'], data['y_train'], params)
+    else:
+        fitted = trainer(data['X_train'], data['y_train'])
+    return fitted if isinstance(fitted, tuple) else (fitted, None)
+
+def evaluate_fitted(data, fitted, model_name):
+    """Test-set metrics and predictions for a fitted model"""
+    model, scaler = fitted
+    return evaluate_model(model, data['X_test'], data['y_test'], model_name, scaler)
+
+def evaluate_queueing_baseline(path, data):
+    """Test-set metrics of the analytic M/G/c wait given the queue ahead
+    
+    Uses as many tellers per branch as the history shows serving at once,
+    so the baseline models the queue that produced the recorded waits.
+    """
+    df = pd.read_csv(path, usecols=BASELINE_COLUMNS)
+    estimator = QueueingEstimator.fit(df, tellers=observed_tellers(df))
+    baseline = QueueingBaseline(estimator, data['encoders'], data['feature_columns'])
+    return evaluate_model(baseline, data['X_test'], data['y_test'], "Queueing Baseline (M/G/c)")
+
+def render_model_plots(data, fitted, evaluation, model_name):
+    """Prediction and feature-importance plots for a model"""
+    model, _ = fitted
+    plot_predictions(data['y_test'], evaluation[1], model_name)
+    analyze_feature_importance(model, data['feature_columns'], model_name)
+    return model_name
+
+def save_best_model(data, fitted, model_name, metrics=None):
+    """Save the selected model with its encoders, feature list and drift reference"""
+    model, scaler = fitted
+    histograms = feature_histograms(data['X_train'], data['feature_columns'])
+    return save_model(model, data['encoders'], data['feature_columns'], model_name, scaler,
+                      histograms=histograms, metrics=metrics)
+
+def model_filename(model_name):
+    return f'models/{model_name.lower().replace(" ", "_")}_model.joblib'
+
+def plot_filenames(model_name, model):
+    stem = f'models/{model_name.lower().replace(" ", "_")}'
+    paths = [f'{stem}_results.png']
+    if hasattr(model, 'feature_importances_'):
+        paths.append(f'{stem}_importance.png')
+    return paths
+
+def parse_overrides(assignments):
+    """Turn ['random_forest.n_estimators=300', ...] into per-model parameter dicts"""
+    overrides = {}
+    for assignment in assignments:
+        target, _, raw = assignment.partition('=')
+        model_key, _, param = target.partition('.')
+        if model_key not in MODEL_PARAMS or not param or not raw:
+            raise SystemExit(f"Invalid --set '{assignment}'. Use <model>.<param>=<value> with model in: "
+                             f"{', '.join(MODEL_PARAMS)}")
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        overrides.setdefault(model_key, {})[param] = value
+    return overrides
+
+@profiling.timed('train_models')
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and compare wait-time models")
+    parser.add_argument('--data', default=PROCESSED_DATA_PATH)
+    parser.add_argument('--set', dest='overrides', action='append', default=[],
+                        help="Override a hyperparameter, e.g. random_forest.n_estimators=300")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Stream the data in chunks into float32 matrices instead of loading it whole")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--sample-fraction', type=float, default=1.0,
+                        help="With --out-of-core, train on this random share of the rows")
+    parser.add_argument('--rolling-features', action='store_true',
+                        help="Add recent wait and arrival-rate features from the feature store")
+    parser.add_argument('--erlang-feature', action='store_true',
+                        help="Add the steady-state Erlang C wait for each branch, weekday and hour")
+    parser.add_argument('--models', help="Comma-separated model keys to train (default: all)")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every stage")
+    parser.add_argument('--clear-cache', action='store_true', help="Delete cached stage results first")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+
     print("QueueSmart ML Model Training Pipeline")
     print("=" * 50)
-    
-    # Load processed data
-    df = pd.read_csv('data/processed_banking_data.csv')
-    
-    # Prepare data for ML
-    X, y, encoders, feature_columns = prepare_ml_data(df)
-    X_train, X_test, y_train, y_test = split_data(X, y)
-    
-    # Train different models
-    models = {}
+
+    cache = PipelineCache(enabled=not args.no_cache)
+    if args.clear_cache:
+        cache.clear()
+
+    selected = MODELS
+    if args.models:
+        keys = args.models.split(',')
+        unknown = [k for k in keys if k not in {key for key, _, _ in MODELS}]
+        if unknown:
+            raise SystemExit(f"Unknown model(s): {', '.join(unknown)}")
+        selected = [m for m in MODELS if m[0] in keys]
+
+    if args.out_of_core and (args.rolling_features or args.erlang_feature):
+        raise SystemExit("--rolling-features and --erlang-feature need the in-memory path; drop --out-of-core")
+
+    # Load processed data and prepare it for ML
+    if args.out_of_core:
+        data = cache.run('prepare:stream', stream_training_data, FileInput(args.data),
+                         chunksize=args.chunk_size, sample_fraction=args.sample_fraction)
+    else:
+        data = cache.run('prepare', load_training_data, FileInput(args.data),
+                         rolling_features=args.rolling_features, erlang_feature=args.erlang_feature)
+
+    # Train, evaluate and plot each model; unchanged models come from the cache
+    fitted_models = {}
     results = []
-    
-    # 1. Linear Regression
-    lr_model, lr_scaler = train_linear_regression(X_train, y_train)
-    lr_results, lr_pred = evaluate_model(lr_model, X_test, y_test, "Linear Regression", lr_scaler)
-    plot_predictions(y_test, lr_pred, "Linear Regression")
-    models['linear_regression'] = (lr_model, lr_scaler)
-    results.append(lr_results)
-    
-    # 2. Random Forest
-    rf_model = train_random_forest(X_train, y_train)
-    rf_results, rf_pred = evaluate_model(rf_model, X_test, y_test, "Random Forest")
-    plot_predictions(y_test, rf_pred, "Random Forest")
-    analyze_feature_importance(rf_model, feature_columns, "Random Forest")
-    models['random_forest'] = (rf_model, None)
-    results.append(rf_results)
-    
-    # 3. Gradient Boosting
-    gb_model = train_gradient_boosting(X_train, y_train)
-    gb_results, gb_pred = evaluate_model(gb_model, X_test, y_test, "Gradient Boosting")
-    plot_predictions(y_test, gb_pred, "Gradient Boosting")
-    analyze_feature_importance(gb_model, feature_columns, "Gradient Boosting")
-    models['gradient_boosting'] = (gb_model, None)
-    results.append(gb_results)
-    
-    # 4. Tuned Random Forest
-    rf_tuned = tune_random_forest(X_train, y_train)
-    rf_tuned_results, rf_tuned_pred = evaluate_model(rf_tuned, X_test, y_test, "Random Forest Tuned")
-    models['random_forest_tuned'] = (rf_tuned, None)
-    results.append(rf_tuned_results)
-    
+    for key, model_name, trainer in selected:
+        # Resolved hyperparameters, so editing MODEL_PARAMS re-keys this and every later stage
+        params = model_params(key, overrides.get(key)) if key in MODEL_PARAMS else None
+        fitted = cache.run(f'train:{key}', fit_model, data, trainer, params=params)
+        evaluation = cache.run(f'evaluate:{key}', evaluate_fitted, data, fitted, model_name)
+        if evaluation.cached:
+            print(f"\n{model_name} Results (cached):")
+            for metric in ('rmse', 'mae', 'r2_score', 'accuracy_5min'):
+                print(f"  {metric}: {evaluation.value[0][metric]:.3f}")
+        if key != 'random_forest_tuned':
+            cache.run(f'plots:{key}', render_model_plots, data, fitted, evaluation, model_name,
+                      outputs=plot_filenames(model_name, fitted.value[0]))
+        fitted_models[model_name] = fitted
+        results.append(evaluation.value[0])
+
+    # Analytic baseline the models should beat; shown in the comparison, never selected
+    baseline = cache.run('evaluate:queueing_baseline', evaluate_queueing_baseline, FileInput(args.data), data)
+    if baseline.cached:
+        print(f"\nQueueing Baseline (M/G/c) Results (cached):")
+        for metric in ('rmse', 'mae', 'r2_score', 'accuracy_5min'):
+            print(f"  {metric}: {baseline.value[0][metric]:.3f}")
+
     # Compare all models
     print("\n" + "=" * 50)
     print("MODEL COMPARISON SUMMARY")
     print("=" * 50)
-    
+
     results_df = pd.DataFrame(results)
-    print(results_df.to_string(index=False))
-    
+    print(pd.DataFrame(results + [baseline.value[0]]).to_string(index=False))
+
     # Find best model
     best_model_idx = results_df['rmse'].idxmin()
     best_model_name = results_df.loc[best_model_idx, 'model_name']
-    
+
     print(f"\nBest performing model: {best_model_name}")
-    
-    # Save best model
-    if 'tuned' in best_model_name.lower():
-        best_model, best_scaler = models['random_forest_tuned']
-    elif 'random forest' in best_model_name.lower():
-        best_model, best_scaler = models['random_forest']
-    elif 'gradient' in best_model_name.lower():
-        best_model, best_scaler = models['gradient_boosting']
-    else:
-        best_model, best_scaler = models['linear_regression']
-    
-    save_model(best_model, encoders, feature_columns, best_model_name, best_scaler)
-    
+
+    # Save best model, unless this exact model is already saved
+    best_metrics = {k: float(v) for k, v in results[best_model_idx].items() if k != 'model_name'}
+    cache.run('save', save_best_model, data, fitted_models[best_model_name], best_model_name, best_metrics,
+              outputs=[model_filename(best_model_name)])
+
     # Test prediction functionality
     print(f"\n" + "=" * 50)
     print("TESTING PREDICTION FUNCTIONALITY")
     print("=" * 50)
-    
+
     # Load the saved model and test it
-    model_filename = f'models/{best_model_name.lower().replace(" ", "_")}_model.joblib'
-    loaded_model = load_model(model_filename)
-    
-    # Test prediction
+    loaded_model = load_model(model_filename(best_model_name))
+
+    # Test prediction, with an idle branch's values for any rolling features
+    extra_features = dict.fromkeys(ROLLING_FEATURES, 0.0) if args.rolling_features else {}
+    if args.erlang_feature:
+        estimator = QueueingEstimator.fit(pd.read_csv(args.data, usecols=BASELINE_COLUMNS))
+        extra_features['erlang_c_wait'] = estimator.estimate("Victoria Island", 10, 1)
     test_prediction = predict_wait_time(
         loaded_model,
         branch="Victoria Island",
@@ -88,11 +220,13 @@ def main():
         hour=10,  # Peak hour
         day_of_week=1,  # Tuesday
         service_duration=5,
-        current_queue_length=3
+        current_queue_length=3,
+        extra_features=extra_features or None
     )
-    
+
     print(f"Test prediction: {test_prediction:.1f} minutes wait time")
+    cache.print_summary()
     print("Model training pipeline completed successfully!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from api.utils import RequestValidator, load_config, get_branch_registry
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_PATH = os.path.join(PROJECT_ROOT, 'data', 'sample_banking_data.csv')
+PROCESSED_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+REPORT_DIR = os.path.join(PROJECT_ROOT, 'data')
+
+CHUNK_SIZE = 50000
+MAX_EXAMPLES = 5
+# Composite-key hashes are spilled to 2**KEY_BUCKET_BITS files by their top bits
+KEY_BUCKET_BITS = 6
+KEY_RECORD = np.dtype([('hash', '<u8'), ('row', '<i8')])
+
+# Request fields whose limits also bound a column of the data files
+LIMIT_COLUMNS = {
+    'hour': 'hour',
+    'day_of_week': 'day_of_week',
+    'service_duration': 'service_duration_minutes',
+    'current_queue_length': 'queue_length_on_arrival'
+}
+
+def build_rules(kind='sample', config=None):
+    """Declarative rule set for the raw sample data or the processed data
+
+    Ranges come from RequestValidator.LIMITS (what the API accepts) and the
+    enums from the branch registry and project config, so data and
+    requests are held to the same bounds.
+    """
+    config = config or load_config()
+    RequestValidator.compile(config)
+
+    required = ['customer_id', 'service_type', 'service_duration_minutes', 'arrival_time', 'branch']
+    if kind == 'processed':
+        required += ['hour', 'day_of_week', 'date', 'time_period', 'is_peak_hour',
+                     'wait_time_minutes', 'queue_length_on_arrival',
+                     'service_start_time', 'service_end_time']
+
+    ranges = {
+        column: RequestValidator.LIMITS[field]
+        for field, column in LIMIT_COLUMNS.items() if column in required
+    }
+    if kind == 'processed':
+        ranges['wait_time_minutes'] = (0, RequestValidator.MAX_OBSERVED_WAIT)
+
+    return {
+        'kind': kind,
+        'required_columns': required,
+        'not_null': required,
+        'ranges': ranges,
+        'enums': {'branch': get_branch_registry().names, 'service_type': config['service_types']},
+        'unique_key': ['branch', 'customer_id'],
+        'timestamp': 'arrival_time',
+        'ordered_by': 'branch'
+    }
+
+class _Check:
+    """Running violation count and first few offending row numbers for one rule"""
+
+    def __init__(self, rule, **details):
+        self.rule = rule
+        self.details = details
+        self.violations = 0
+        self.examples = []
+
+    def record(self, mask, row_numbers):
+        count = int(mask.sum())
+        if count:
+            self.violations += count
+            room = MAX_EXAMPLES - len(self.examples)
+            if room > 0:
+                self.examples.extend(int(r) for r in row_numbers[mask][:room])
+
+    def to_dict(self):
+        return {
+            'rule': self.rule, **self.details,
+            'violations': self.violations, 'example_rows': self.examples,
+            'passed': self.violations == 0
+        }
+
+class ValidationEngine:
+    """Check a rule set over a CSV in one streaming pass of fixed-size chunks
+
+    Memory is bounded by the chunk size plus small per-branch state: the
+    ordering check keeps the last timestamp per branch, and the composite
+    key is checked across the whole file by spilling a 64-bit hash of each
+    key to 2**KEY_BUCKET_BITS temporary files by its top bits, then sorting one
+    bucket at a time. A hash collision could report a false duplicate
+    (about n**2 / 2**65 for n rows), never a missed one.
+    """
+
+    def __init__(self, rules, chunk_size=CHUNK_SIZE):
+        self.rules = rules
+        self.chunk_size = chunk_size
+
+    def validate(self, path):
+        rules = self.rules
+        started = time.perf_counter()
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        missing = [c for c in rules['required_columns'] if c not in header]
+        present = lambda columns: [c for c in columns if c in header]
+
+        checks = {}
+        for column in present(rules['not_null']):
+            checks[('not_null', column)] = _Check('not_null', column=column)
+        for column, (low, high) in rules['ranges'].items():
+            if column in header:
+                checks[('range', column)] = _Check('range', column=column, min=low, max=high)
+        for column, values in rules['enums'].items():
+            if column in header:
+                checks[('enum', column)] = _Check('enum', column=column, allowed=list(values))
+
+        key = rules['unique_key']
+        timestamp, ordered_by = rules['timestamp'], rules['ordered_by']
+        track_keys = not missing and timestamp in header
+        if track_keys:
+            checks['unique'] = _Check('unique', columns=key, scope='file', match='64-bit key hash')
+            checks['ordered'] = _Check('ordered', column=timestamp, per=ordered_by)
+            checks['timestamp'] = _Check('parseable', column=timestamp)
+
+        stats = {column: {'min': None, 'max': None, 'sum': 0.0, 'count': 0}
+                 for column in rules['ranges'] if column in header}
+        value_counts = {column: {} for column in rules['enums'] if column in header}
+        last_seen = {}
+        rows = 0
+        chunks = 0
+
+        usecols = sorted(set(present(rules['required_columns'])) | set(present(list(rules['ranges']))))
+        with tempfile.TemporaryDirectory(prefix='validation_keys_') as key_dir:
+            buckets = [os.path.join(key_dir, f'{b}.bin') for b in range(2 ** KEY_BUCKET_BITS)]
+            for chunk in pd.read_csv(path, usecols=usecols, chunksize=self.chunk_size):
+                row_numbers = np.arange(rows, rows + len(chunk))
+                rows += len(chunk)
+                chunks += 1
+
+                for column in present(rules['not_null']):
+                    checks[('not_null', column)].record(chunk[column].isna().to_numpy(), row_numbers)
+
+                for column, (low, high) in rules['ranges'].items():
+                    if column not in header:
+                        continue
+                    values = pd.to_numeric(chunk[column], errors='coerce')
+                    bad = values.notna() & ((values < low) | (values > high))
+                    checks[('range', column)].record(bad.to_numpy(), row_numbers)
+                    s = stats[column]
+                    valid = values.dropna()
+                    if len(valid):
+                        s['min'] = float(valid.min()) if s['min'] is None else min(s['min'], float(valid.min()))
+                        s['max'] = float(valid.max()) if s['max'] is None else max(s['max'], float(valid.max()))
+                        s['sum'] += float(valid.sum())
+                        s['count'] += len(valid)
+
+                for column, values in rules['enums'].items():
+                    if column not in header:
+                        continue
+                    checks[('enum', column)].record(
+                        (~chunk[column].isin(values) & chunk[column].notna()).to_numpy(), row_numbers
+                    )
+                    for value, count in chunk[column].value_counts().items():
+                        value_counts[column][value] = value_counts[column].get(value, 0) + int(count)
+
+                if not track_keys:
+                    continue
+
+                ts = pd.to_datetime(chunk[timestamp], errors='coerce')
+                checks['timestamp'].record((ts.isna() & chunk[timestamp].notna()).to_numpy(), row_numbers)
+
+                # Timestamps must not go backwards within a branch, across chunks too
+                previous = ts.groupby(chunk[ordered_by]).shift()
+                carried = chunk[ordered_by].map(last_seen)
+                first_in_chunk = previous.isna() & ~chunk[ordered_by].duplicated()
+                previous = previous.where(~first_in_chunk, pd.to_datetime(carried))
+                checks['ordered'].record((ts < previous).fillna(False).to_numpy(), row_numbers)
+                last_seen.update(ts.groupby(chunk[ordered_by]).max().dropna().to_dict())
+
+                # Spill composite key hashes to their bucket files for the file-wide check
+                keys = chunk[key]
+                complete = keys.notna().all(axis=1).to_numpy()
+                hashed = np.empty(int(complete.sum()), dtype=KEY_RECORD)
+                hashed['hash'] = pd.util.hash_pandas_object(keys[complete], index=False).to_numpy()
+                hashed['row'] = row_numbers[complete]
+                bucket_of = hashed['hash'] >> np.uint64(64 - KEY_BUCKET_BITS)
+                for b in np.unique(bucket_of):
+                    with open(buckets[b], 'ab') as f:
+                        f.write(hashed[bucket_of == b].tobytes())
+
+            if track_keys:
+                # Later occurrences of a hash are the duplicates, one bucket in memory at a time
+                duplicates = []
+                for bucket in buckets:
+                    if not os.path.exists(bucket):
+                        continue
+                    hashed = np.fromfile(bucket, dtype=KEY_RECORD)
+                    hashed = hashed[np.argsort(hashed['hash'], kind='stable')]
+                    repeat = np.r_[False, hashed['hash'][1:] == hashed['hash'][:-1]]
+                    duplicates.append(hashed['row'][repeat])
+                duplicates = np.sort(np.concatenate(duplicates)) if duplicates else np.array([], dtype=np.int64)
+                checks['unique'].record(np.ones(len(duplicates), dtype=bool), duplicates)
+
+        check_list = [c.to_dict() for c in checks.values()]
+
+        return {
+            'file': display_path(path),
+            'rule_set': rules['kind'],
+            'generated_at': datetime.now().isoformat(),
+            'rows': rows,
+            'chunks': chunks,
+            'chunk_size': self.chunk_size,
+            'passed': not missing and all(c['passed'] for c in check_list),
+            'missing_columns': missing,
+            'checks': check_list,
+            'column_stats': {
+                column: {
+                    'min': s['min'], 'max': s['max'],
+                    'mean': round(s['sum'] / s['count'], 3) if s['count'] else None
+                }
+                for column, s in stats.items()
+            },
+            'value_counts': value_counts,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        }
+
+def display_path(path):
+    """Path relative to the project when inside it, as given otherwise"""
+    path = os.path.abspath(path)
+    return os.path.relpath(path, PROJECT_ROOT) if path.startswith(PROJECT_ROOT + os.sep) else path
+
+def save_report(report, path):
+    """Write a validation report as JSON"""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def default_report_path(kind):
+    return os.path.join(REPORT_DIR, f'validation_report_{kind}.json')
+
+def print_report(report):
+    """Short human-readable summary of a report"""
+    print(f"Validation of {report['file']} ({report['rule_set']} rules)")
+    print(f"  Rows: {report['rows']:,} in {report['chunks']} chunks, {report['elapsed_seconds']}s")
+    if report['missing_columns']:
+        print(f"  ⚠ Missing columns: {', '.join(report['missing_columns'])}")
+    for check in report['checks']:
+        target = check.get('column') or ', '.join(check.get('columns', []))
+        mark = "✓" if check['passed'] else "⚠"
+        line = f"  {mark} {check['rule']} [{target}]: {check['violations']} violations"
+        if check['example_rows']:
+            line += f" (rows {', '.join(map(str, check['example_rows']))})"
+        print(line)
+    print(f"  Result: {'PASSED' if report['passed'] else 'FAILED'}")
+
+def run_validation(kind, path=None, chunk_size=CHUNK_SIZE, report_path=None):
+    """Validate a data file with the rule set for its kind and save the report"""
+    path = path or (PROCESSED_PATH if kind == 'processed' else SAMPLE_PATH)
+    report = ValidationEngine(build_rules(kind), chunk_size).validate(path)
+    save_report(report, report_path or default_report_path(kind))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate banking data files in one streaming pass")
+    parser.add_argument('--kind', choices=['sample', 'processed'], default='sample')
+    parser.add_argument('--input', help="CSV to validate (defaults to the file for --kind)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--report', help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = run_validation(args.kind, args.input, args.chunk_size, args.report)
+    print_report(report)
+    print(f"\nReport saved to {args.report or default_report_path(args.kind)}")
+    return 0 if report['passed'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import argparse
+import glob
+import os
+import tempfile
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed_banking_data.csv')
+SKETCH_PATH = os.path.join(PROJECT_ROOT, 'data', 'wait_sketches.npz')
+MERGED_PATH = os.path.join(PROJECT_ROOT, 'data', 'wait_sketches.merged.npz')
+
+# Log-spaced buckets with 1% relative error between MIN_WAIT and MAX_WAIT minutes
+RELATIVE_ACCURACY = 0.01
+MIN_WAIT = 0.1
+MAX_WAIT = 24 * 60
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+N_BUCKETS = int(np.ceil(np.log(MAX_WAIT / MIN_WAIT) / np.log(GAMMA))) + 1
+HOURS = 24
+DEFAULT_PERCENTILES = [50, 90, 99]
+
+def bucket_index(waits):
+    """Bucket for each wait; bucket 0 holds waits under MIN_WAIT"""
+    waits = np.asarray(waits, dtype=float)
+    scaled = np.maximum(waits, MIN_WAIT) / MIN_WAIT
+    idx = np.ceil(np.log(scaled) / np.log(GAMMA)).astype(int)
+    return np.where(waits < MIN_WAIT, 0, np.clip(idx, 1, N_BUCKETS - 1))
+
+def bucket_value(idx):
+    """Representative wait of a bucket, within RELATIVE_ACCURACY of any value in it"""
+    idx = np.asarray(idx)
+    value = MIN_WAIT * 2 * GAMMA ** idx / (GAMMA + 1)
+    return np.where(idx == 0, 0.0, value)
+
+def quantiles_from_counts(counts, percentiles):
+    """Percentiles from bucket counts along the last axis; NaN where empty"""
+    counts = np.asarray(counts)
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    # Same rank convention as the lower nearest-rank percentile
+    ranks = np.floor(np.asarray(percentiles, dtype=float) / 100 * np.maximum(total - 1, 0))
+    idx = (cumulative[..., None, :] <= ranks[..., None]).sum(axis=-1)
+    values = bucket_value(np.minimum(idx, N_BUCKETS - 1))
+    return np.where(total > 0, values, np.nan)
+
+def _day_ordinals(days):
+    """Date ordinals for dates, datetimes or YYYY-MM-DD strings"""
+    return pd.to_datetime(pd.Series(days)).map(pd.Timestamp.toordinal).to_numpy(dtype=np.int64)
+
+class WaitSketchStore:
+    """Sliding-window wait-time sketches per (branch, hour)
+
+    Each branch, hour and day keeps a fixed-size log-bucketed histogram
+    (a DDSketch with ``RELATIVE_ACCURACY`` relative error), so memory does
+    not grow with the number of observations. Days live in a ring of
+    ``window_days`` slots; a day always maps to the slot ``ordinal %
+    window_days`` and overwrites whatever older day held it. Sketches
+    merge by adding counts, so stores from several workers or processing
+    runs can be combined.
+    """
+
+    def __init__(self, branches=(), window_days=7, counts=None, slot_days=None):
+        self.branches = list(branches)
+        self.window_days = int(window_days)
+        if counts is None:
+            counts = np.zeros((self.window_days, len(self.branches), HOURS, N_BUCKETS), dtype=np.uint32)
+        if slot_days is None:
+            slot_days = np.full(self.window_days, -1, dtype=np.int64)
+        self.counts = counts
+        self.slot_days = slot_days
+        self.branch_index = {b: i for i, b in enumerate(self.branches)}
+        self.lock = threading.Lock()
+
+    def _branch_rows(self, branches):
+        new = [b for b in dict.fromkeys(branches) if b not in self.branch_index]
+        if new:
+            extra = np.zeros((self.window_days, len(new), HOURS, N_BUCKETS), dtype=np.uint32)
+            self.counts = np.concatenate([self.counts, extra], axis=1)
+            for b in new:
+                self.branch_index[b] = len(self.branches)
+                self.branches.append(b)
+        return np.array([self.branch_index[b] for b in branches], dtype=int)
+
+    def _claim_slots(self, ordinals):
+        """Point each day's ring slot at it; returns which days are still in the window"""
+        keep = np.zeros(len(ordinals), dtype=bool)
+        for day in np.unique(ordinals):
+            slot = day % self.window_days
+            if self.slot_days[slot] < day:
+                self.counts[slot] = 0
+                self.slot_days[slot] = day
+            keep |= (ordinals == day) & (self.slot_days[slot] == day)
+        return keep
+
+    def add_many(self, branches, days, hours, waits):
+        """Record observed waits; days older than the window are ignored"""
+        ordinals = _day_ordinals(days)
+        hours = np.asarray(hours, dtype=int)
+        waits = np.asarray(waits, dtype=float)
+        valid = (hours >= 0) & (hours < HOURS) & np.isfinite(waits) & (waits >= 0)
+
+        with self.lock:
+            rows = self._branch_rows(list(branches))
+            keep = valid & self._claim_slots(ordinals)
+            np.add.at(
+                self.counts,
+                (ordinals[keep] % self.window_days, rows[keep], hours[keep], bucket_index(waits[keep])),
+                1
+            )
+        return int(keep.sum())
+
+    def add(self, branch, day, hour, wait):
+        return self.add_many([branch], [day], [hour], [wait])
+
+    def reset(self, branches, days):
+        """Drop the sketches of (branch, day) pairs, e.g. before re-processing them
+
+        Other branches' sketches for the same days are kept.
+        """
+        ordinals = _day_ordinals(days)
+        with self.lock:
+            rows = self._branch_rows(list(branches))
+            slots = ordinals % self.window_days
+            held = self.slot_days[slots] == ordinals
+            self.counts[slots[held], rows[held]] = 0
+
+    def copy(self):
+        with self.lock:
+            return WaitSketchStore(self.branches, self.window_days, self.counts.copy(), self.slot_days.copy())
+
+    def merge(self, other):
+        """Add another store's counts for the days both windows can hold"""
+        with self.lock:
+            rows = self._branch_rows(other.branches)
+            for slot_days, counts in zip(other.slot_days, other.counts):
+                if slot_days < 0:
+                    continue
+                if self._claim_slots(np.array([slot_days]))[0]:
+                    slot = slot_days % self.window_days
+                    self.counts[slot][rows] += counts
+        return self
+
+    def quantiles(self, branch=None, percentiles=DEFAULT_PERCENTILES, days=None, end_date=None):
+        """Wait percentiles per hour over the last ``days`` days up to ``end_date``
+
+        ``branch`` None merges all branches. Defaults to the whole window
+        ending on the newest day seen. Returns rows for hours with data.
+        """
+        days = self.window_days if days is None else min(int(days), self.window_days)
+        with self.lock:
+            end = int(self.slot_days.max()) if end_date is None else _day_ordinals([end_date])[0]
+            in_window = (self.slot_days > end - days) & (self.slot_days <= end)
+            counts = self.counts[in_window]
+            if branch is not None:
+                if branch not in self.branch_index:
+                    return []
+                counts = counts[:, [self.branch_index[branch]]]
+            by_hour = counts.sum(axis=(0, 1), dtype=np.int64)
+
+        values = quantiles_from_counts(by_hour, percentiles)
+        totals = by_hour.sum(axis=1)
+        return [
+            dict(
+                hour=hour, observations=int(totals[hour]),
+                **{f'wait_p{p}': round(float(v), 1) for p, v in zip(percentiles, values[hour])}
+            )
+            for hour in range(HOURS) if totals[hour] > 0
+        ]
+
+    def window(self):
+        """Dates currently held in the ring, oldest first"""
+        return [date.fromordinal(int(d)).isoformat() for d in np.sort(self.slot_days) if d >= 0]
+
+    def save(self, path=SKETCH_PATH):
+        """Store all sketches as a compressed numpy archive, replaced atomically"""
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f'{name}.', suffix='.tmp', dir=directory)
+        try:
+            with self.lock, os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f, branches=np.array(self.branches), counts=self.counts,
+                    slot_days=self.slot_days, relative_accuracy=np.array(RELATIVE_ACCURACY)
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path=SKETCH_PATH):
+        """Load a store written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            if float(data['relative_accuracy']) != RELATIVE_ACCURACY:
+                raise ValueError(f"{path} was written with a different sketch accuracy")
+            counts = data['counts']
+            return cls(data['branches'].tolist(), counts.shape[0], counts, data['slot_days'])
+
+def worker_sketch_path(path=SKETCH_PATH, pid=None):
+    """Sketch file of one API worker: the shared path with the process id before the extension"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.worker-{os.getpid() if pid is None else pid}{ext}"
+
+def worker_sketch_paths(path=SKETCH_PATH):
+    """Every worker's sketch file next to the shared path"""
+    stem, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(stem)}.worker-*{ext}"))
+
+def _worker_pid(path):
+    """Process id in a worker sketch file name"""
+    stem, _ = os.path.splitext(os.path.basename(path))
+    return int(stem.rsplit('.worker-', 1)[1])
+
+def _running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def adopt_dead_workers(store, own_path, path=SKETCH_PATH):
+    """Fold the files of workers no longer running into ``store``, save it and delete them
+
+    Keeps the number of worker files bounded by the workers alive without
+    losing what dead ones observed. Each file is first renamed to a name
+    only this process uses, so two workers starting at once never both
+    adopt it. Returns how many files were adopted.
+    """
+    claimed = []
+    for worker_path in worker_sketch_paths(path):
+        if worker_path == own_path or _running(_worker_pid(worker_path)):
+            continue
+        claim = f"{worker_path}.adopted-{os.getpid()}"
+        try:
+            os.rename(worker_path, claim)
+        except FileNotFoundError:
+            continue
+        claimed.append(claim)
+        store.merge(WaitSketchStore.load(claim))
+    if claimed:
+        store.save(own_path)
+        for claim in claimed:
+            os.remove(claim)
+    return len(claimed)
+
+def load_merged(paths, window_days=7):
+    """One store holding the sum of the stores at ``paths``; missing files are skipped"""
+    store = None
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        loaded = WaitSketchStore.load(path)
+        store = loaded if store is None else store.merge(loaded)
+    return store if store is not None else WaitSketchStore(window_days=window_days)
+
+def update_sketches(df, path=SKETCH_PATH, window_days=7):
+    """Fold processed rows into the stored sketches, replacing the (branch, day) pairs they cover"""
+    store = WaitSketchStore.load(path) if os.path.exists(path) else WaitSketchStore(window_days=window_days)
+    pairs = df[['branch', 'date']].drop_duplicates()
+    store.reset(pairs['branch'].tolist(), pairs['date'])
+    store.add_many(df['branch'].tolist(), df['date'], df['hour'], df['wait_time_minutes'])
+    store.save(path)
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, merge or query wait-time sketches")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Fold processed history into the sketch store")
+    build.add_argument('--input', default=HISTORY_PATH)
+    build.add_argument('--output', default=SKETCH_PATH)
+    build.add_argument('--window-days', type=int, default=7)
+
+    merge = subparsers.add_parser('merge', help="Merge stores from several workers")
+    merge.add_argument('inputs', nargs='*',
+                       help="Stores to merge (default: the processed-history store and every worker's)")
+    merge.add_argument('--output', default=MERGED_PATH)
+
+    query = subparsers.add_parser('query', help="Print wait percentiles per hour")
+    query.add_argument('--input', help="Store to query (default: all stores merged)")
+    query.add_argument('--branch')
+    query.add_argument('--days', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        store = update_sketches(pd.read_csv(args.input), args.output, args.window_days)
+        print(f"Sketches for {len(store.branches)} branches over {store.window()} saved to {args.output}")
+    elif args.command == 'merge':
+        inputs = args.inputs or [SKETCH_PATH] + worker_sketch_paths()
+        load_merged(inputs).save(args.output)
+        print(f"Merged {len(inputs)} stores into {args.output}")
+    else:
+        store = load_merged([args.input] if args.input else [SKETCH_PATH] + worker_sketch_paths())
+        print(pd.DataFrame(store.quantiles(args.branch, days=args.days)).to_string(index=False))
+
+if __name__ == "__main__":
+    main()